@@ -3,16 +3,22 @@
 # SPDX-License-Identifier: MIT
 # flake8: noqa: F401
 # pyright: reportUnusedImport = false
-from lobs.core.package import Package
+from lobs.core.language.base import Glob
+from lobs.core.package import Package, PackageRef
 from lobs.core.version import Version
 from lobs.core.project import ProjectMeta
+from lobs.core.variants import Variant, VariantMatrix
 from lobs.domains import cpp
 from lobs.version import __version__, __version_tuple__
 
 __all__ = [
+    "Glob",
     "Package",
+    "PackageRef",
     "Version",
     "ProjectMeta",
+    "Variant",
+    "VariantMatrix",
     "cpp",
     "__version__",
     "__version_tuple__",
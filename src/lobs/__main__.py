@@ -1,24 +1,64 @@
+import asyncio
+import json
 import typing as t
 from pathlib import Path
 
 import click
 
+from lobs.core import checks
 from lobs.core import exporter
+from lobs.core import graph
+from lobs.core import inputs
 from lobs.core import package as pm
-from lobs._machinery.modules import import_module
+from lobs.core import sharding
+from lobs.core.history import History
+from lobs.core.variants import Variant, VariantMatrix
+from lobs.exporter import esp_idf
+from lobs.report import build_times, ctest_times, size
+from lobs.server import Client, RemoteError, Server, client_environment
 from lobs import exporter as _     # noqa: F401 register exporters
 
 
-@click.group()
+PROJECTLESS_COMMANDS = ('serve',)
+"""Commands that do not operate on a project, for which the project file is not evaluated."""
+
+
+class _ProjectGroup(click.Group):
+    """The main group, whose optional PROJECT_PATH argument would otherwise swallow the command name."""
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        first = next((i for i, x in enumerate(args) if not x.startswith('-')), None)
+        if first is not None and args[first] in self.commands and not Path(args[first]).exists():
+            # PROJECT_PATH is left out of the parser, see `get_params`
+            ctx.meta['lobs-no-project-path'] = True
+        return super().parse_args(ctx, args)
+
+    def get_params(self, ctx: click.Context) -> list[click.Parameter]:
+        params = super().get_params(ctx)
+        if ctx.meta.get('lobs-no-project-path'):
+            return [x for x in params if x.name != 'project_path']
+        return params
+
+
+@click.group(cls=_ProjectGroup)
 @click.argument(
     'project_path',
     required=False,
     type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True, path_type=Path),
 )
+@click.option(
+    '--server/--no-server',
+    default=True,
+    show_default=True,
+    help='Forward commands to a running `lobs serve` process, when there is one.',
+)
 @click.pass_context
-def main(ctx: click.Context, project_path: Path | None = None):
+def main(ctx: click.Context, project_path: Path | None = None, server: bool = True):
     ctx.ensure_object(dict)
-    print(f'Project: {project_path}')
+    ctx.obj['lobs-server'] = server
+    if ctx.invoked_subcommand in PROJECTLESS_COMMANDS:
+        return
+    click.echo(f'Project: {project_path}', err=True)
     if project_path is None:
         cwd = Path.cwd()
         project_path = cwd / cwd.parent.with_suffix('.py').stem
@@ -26,10 +66,44 @@ def main(ctx: click.Context, project_path: Path | None = None):
         project_path = Path.cwd() / project_path
     else:
         project_path = project_path.absolute()
-    if not project_path.exists():
-        raise FileNotFoundError(f"Project file {project_path} does not exist.")
-    module = pm.Package.from_module(import_module('project_module', project_path))
-    ctx.obj['lobs-package'] = module
+    ctx.obj['lobs-project-path'] = project_path
+
+
+def _get_package(ctx: click.Context) -> pm.IPackage:
+    """The package of the project file, evaluated on first use so that forwarded commands do not pay for it."""
+    if 'lobs-package' not in ctx.obj:
+        project_path: Path = ctx.obj['lobs-project-path']
+        if not project_path.exists():
+            raise FileNotFoundError(f"Project file {project_path} does not exist.")
+        ctx.obj['lobs-package'] = pm.Package.from_file(project_path)
+    return t.cast(pm.IPackage, ctx.obj['lobs-package'])
+
+
+def _get_subgraph(ctx: click.Context, name: str | None) -> pm.IPackage:
+    """The package named `name` in the graph of the project (evaluating what leads to it), or the project's."""
+    package = _get_package(ctx)
+    if name is None:
+        return package
+    try:
+        return graph.find(package, name)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--only'") from e
+
+
+@main.command()
+@click.option(
+    '--socket', 'socket_path',
+    type=click.Path(dir_okay=False, path_type=Path),
+    help='The socket to listen on. Defaults to $LOBS_SOCKET, else lobs.sock in $XDG_RUNTIME_DIR.',
+)
+def serve(socket_path: Path | None):
+    """Keep evaluated projects in memory and answer requests from other lobs invocations and tools."""
+    server = Server(socket_path)
+    click.echo(f'Listening on {server.socket_path}', err=True)
+    try:
+        asyncio.run(server.serve_forever())
+    except RuntimeError as e:
+        raise click.ClickException(str(e)) from e
 
 
 @main.command()
@@ -38,9 +112,269 @@ def main(ctx: click.Context, project_path: Path | None = None):
     required=True,
     type=click.Choice(list(exporter.IExporter.KNOWN.keys()), case_sensitive=False),
 )
+@click.option(
+    '--shard',
+    metavar='I/N',
+    help='Only export the packages of shard I (one-based) out of N, computed from the whole package graph.',
+)
+@click.option(
+    '--shard-cost',
+    type=click.Choice(sharding.COST_MODELS),
+    default='size',
+    show_default=True,
+    help='How package costs are estimated when sharding. Every worker shall estimate the same costs: timings '
+    'read the build history of the project (e.g. committed), falling back to source sizes.',
+)
+@click.option(
+    '--if-changed',
+    is_flag=True,
+    help='Skip the export if no file recorded by the last one (see the `regenerate` options) changed.',
+)
+@click.option(
+    '--variant', 'variant_specs',
+    multiple=True,
+    metavar='NAME[:FIELD=VALUE,...]',
+    help='Export a variant declared by the package, or one overriding fields of the exporter configuration, '
+    'into its own folder. Repeat to export several variants from a single evaluation.',
+)
+@click.option(
+    '--only',
+    metavar='NAME',
+    help='Only export the package NAME of the graph and its dependencies. Dependencies declared by a '
+    '`PackageRef` are then only evaluated if they are on the way.',
+)
 @click.pass_context
-def export(ctx: click.Context, exporter_tag: str):
-    module = t.cast(pm.IPackage, ctx.obj['lobs-package'])
+def export(
+    ctx: click.Context,
+    exporter_tag: str,
+    shard: str | None,
+    shard_cost: sharding.CostModel,
+    if_changed: bool,
+    variant_specs: tuple[str, ...],
+    only: str | None,
+):
+    try:
+        parsed = sharding.parse_shard(shard) if shard is not None else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--shard'") from e
+    if parsed is not None and variant_specs:
+        raise click.BadParameter("Variants cannot be sharded.", param_hint="'--variant'")
+    if parsed is not None and not exporter.IExporter.KNOWN[exporter_tag].SHARDABLE:
+        raise click.BadParameter(
+            f"The {exporter_tag} exporter renders the whole package graph at once.", param_hint="'--shard'"
+        )
+
+    if if_changed:
+        project_path: Path = ctx.obj['lobs-project-path']
+        pending = [x for x in (variant_specs or [None]) if _inputs_changed(project_path, exporter_tag, x)]
+        if not pending:
+            return
+        variant_specs = tuple(x for x in pending if x is not None)
+
+    if variant_specs:
+        package = _get_subgraph(ctx, only)
+        try:
+            variants = _parse_variants(package, exporter_tag, variant_specs)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="'--variant'") from e
+        for variant, folder in zip(variants, exporter.run_variants(package, exporter_tag, variants)):
+            click.echo(f'Variant {variant.name}: {folder}', err=True)
+        return
+
+    client = Client.connect() if ctx.obj['lobs-server'] else None
+    if client is not None:
+        with client:
+            try:
+                exported = client.call(
+                    'export',
+                    project=str(ctx.obj['lobs-project-path']),
+                    exporter_tag=exporter_tag,
+                    shard=parsed,
+                    shard_cost=shard_cost,
+                    cwd=str(Path.cwd()),
+                    only=only,
+                    env=client_environment(),
+                )
+            except RemoteError as e:
+                raise click.ClickException(f'lobs server: {e}') from e
+        stages = [(x['package'], x['stage']) for x in exported]
+    else:
+        assignments = exporter.run_export(_get_subgraph(ctx, only), exporter_tag, parsed, shard_cost)
+        stages = [(a.package.meta.name, a.stage) for a in assignments]
+
+    if shard is not None:
+        for name, stage in stages:
+            click.echo(f'Shard {shard}: {name} (stage {stage})', err=True)
+
+
+def _inputs_changed(project_path: Path, exporter_tag: str, variant_spec: str | None) -> bool:
+    """Whether the inputs recorded by the last export (of the variant) changed, or were not recorded.
+
+    The package export of a package declaring variants changed if any of the variants did.
+    """
+    if variant_spec is not None and ':' in variant_spec:
+        # Only the exports of variants declared by the package are recorded
+        return True
+    recorded = inputs.ExportInputs.load(inputs.manifest_path(project_path, exporter_tag, variant_spec))
+    if recorded is None:
+        return True
+    if changed := recorded.changed():
+        click.echo(f'Changed: {", ".join(changed)}', err=True)
+        return True
+    if recorded.variants:
+        return any(_inputs_changed(project_path, exporter_tag, x) for x in recorded.variants)
+    click.echo(f'Export{f" of variant {variant_spec}" if variant_spec else ""} is up to date.', err=True)
+    return False
+
+
+def _parse_variants(package: pm.IPackage, exporter_tag: str, specs: tuple[str, ...]) -> list[Variant]:
+    matrix = VariantMatrix.of(package.meta.exporter_configuration)
     klass = exporter.IExporter.KNOWN[exporter_tag]
-    _exp = klass(module)
-    _exp.export()
+    variants: list[Variant] = []
+    for spec in specs:
+        if ':' in spec:
+            variants.append(Variant.parse(spec, klass(package).package_config))
+        elif matrix is None:
+            raise ValueError(f"The package declares no variants, '{spec}' needs its fields (NAME:FIELD=VALUE,...).")
+        else:
+            variants.extend(matrix.select([spec]))
+    if len({x.name for x in variants}) != len(variants):
+        raise ValueError("Variant names shall be unique.")
+    return variants
+
+
+@main.command()
+@click.option(
+    '--exporter', 'exporter_tags',
+    multiple=True,
+    type=click.Choice(list(exporter.IExporter.KNOWN.keys()), case_sensitive=False),
+    help='Also check each package for the exporter. Defaults to the exporters configured by the package.',
+)
+@click.option('--jobs', type=int, help='The number of concurrent checks. Defaults to the number of processors.')
+@click.option('--json', 'as_json', is_flag=True, help='Output the problems as JSON.')
+@click.pass_context
+def check(ctx: click.Context, exporter_tags: tuple[str, ...], jobs: int | None, as_json: bool):
+    """Check the whole package graph for structural problems, reporting all of them at once."""
+    package = _get_package(ctx)
+    tags = list(exporter_tags) or checks.configured_exporters(package)
+    problems = checks.run_checks(package, [checks.exporter_check(x) for x in tags], jobs)
+    if as_json:
+        click.echo(json.dumps([x.to_dict() for x in problems], indent=2))
+    else:
+        for problem in problems:
+            click.echo(str(problem))
+        click.echo(f'{len(problems)} problem(s) found.' if problems else 'No problems found.', err=True)
+    if problems:
+        ctx.exit(1)
+
+
+@main.group()
+def report():
+    """Reports on builds produced from lobs exports."""
+
+
+@report.command('build-times')
+@click.argument(
+    'build-dir',
+    required=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+)
+@click.option('--time-trace', is_flag=True, help='Include the Clang -ftime-trace breakdown, when available.')
+@click.option('--top', default=20, show_default=True, help='Number of translation units to list.')
+@click.option('--json', 'as_json', is_flag=True, help='Output the report as JSON.')
+@click.option('--record/--no-record', default=True, show_default=True, help='Store the timings in the history.')
+@click.pass_context
+def build_times_cmd(ctx: click.Context, build_dir: Path, time_trace: bool, top: int, as_json: bool, record: bool):
+    module = _get_package(ctx)
+    result = build_times.analyse(module, build_dir, time_trace=time_trace)
+    if record:
+        history = History(module)
+        for kind, samples in build_times.history_samples(result).items():
+            history.record(kind, samples)
+    if as_json:
+        click.echo(json.dumps(result.to_dict(), indent=2))
+    else:
+        click.echo(build_times.format_report(result, top))
+
+
+@report.command('test-times')
+@click.argument(
+    'build-dir',
+    required=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+)
+@click.option('--top', default=20, show_default=True, help='Number of tests to list.')
+@click.option('--json', 'as_json', is_flag=True, help='Output the report as JSON.')
+@click.option('--record/--no-record', default=True, show_default=True, help='Store the durations in the history.')
+@click.pass_context
+def test_times_cmd(ctx: click.Context, build_dir: Path, top: int, as_json: bool, record: bool):
+    """Test durations recorded by CTest, used as test costs by the cmake exporter."""
+    module = _get_package(ctx)
+    result = ctest_times.analyse(build_dir)
+    if record:
+        history = History(module)
+        for kind, samples in ctest_times.history_samples(result).items():
+            history.record(kind, samples)
+    if as_json:
+        click.echo(json.dumps(result.to_dict(), indent=2))
+    else:
+        click.echo(ctest_times.format_report(result, top))
+
+
+def _parse_budget(ctx: click.Context, param: click.Parameter, values: tuple[str, ...]) -> dict[str, int]:
+    budgets: dict[str, int] = {}
+    for value in values:
+        region, _, amount = value.partition('=')
+        if region not in size.REGIONS or not amount.isdigit():
+            raise click.BadParameter(f"expected REGION=BYTES with REGION in {', '.join(size.REGIONS)}, got '{value}'")
+        budgets[region] = int(amount)
+    return budgets
+
+
+@report.command('size')
+@click.argument(
+    'build-dir',
+    required=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+)
+@click.option(
+    '--map', 'map_file',
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help='The linker map file. Defaults to <build-dir>/<project name>.map.',
+)
+@click.option(
+    '--budget', 'budgets',
+    multiple=True,
+    metavar='REGION=BYTES',
+    callback=_parse_budget,
+    help='Allowed growth of a region over the baseline, overriding the esp-idf configuration.',
+)
+@click.option('--update-baseline', is_flag=True, help='Store this report as the new baseline.')
+@click.option('--json', 'as_json', is_flag=True, help='Output the report as JSON.')
+@click.pass_context
+def size_cmd(ctx: click.Context, build_dir: Path, map_file: Path | None, budgets: dict[str, int],
+             update_baseline: bool, as_json: bool):
+    module = _get_package(ctx)
+    result = size.analyse(module, map_file or build_dir / f'{module.meta.name}.map')
+    history = History(module)
+    stored = history.baseline('size')
+    baseline = size.SizeReport.from_dict(stored) if stored is not None else None
+
+    if as_json:
+        click.echo(json.dumps(result.to_dict(), indent=2))
+    else:
+        click.echo(size.format_report(result, baseline))
+
+    if update_baseline:
+        history.set_baseline('size', result.to_dict())
+    elif baseline is not None:
+        config = esp_idf.Exporter(module).config
+        violations = size.check_budgets(result, baseline, {**(config.size_budgets or {}), **budgets})
+        for violation in violations:
+            click.echo(f'Size budget exceeded: {violation}', err=True)
+        if violations:
+            ctx.exit(1)
+
+
+if __name__ == "__main__":
+    main()
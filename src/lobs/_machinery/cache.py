@@ -0,0 +1,58 @@
+"""On-disk storage helpers shared by the features that persist data between `lobs` runs."""
+import json
+import os
+import tempfile
+import typing as t
+from pathlib import Path
+
+
+def user_cache_dir(*parts: str) -> Path:
+    """The per-user cache directory of `lobs`, optionally joined with `parts`.
+
+    The location can be overridden with the `LOBS_CACHE_DIR` environment variable,
+    otherwise it follows the XDG base directory specification.
+    """
+    if override := os.environ.get('LOBS_CACHE_DIR'):
+        base = Path(override)
+    else:
+        base = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'lobs'
+    return base.joinpath(*parts)
+
+
+def read_json(path: Path) -> t.Any | None:
+    """Read a JSON document, returning None if it is missing or corrupted."""
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_json(path: Path, data: t.Any) -> None:
+    """Atomically write a JSON document, so concurrent readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_if_changed(path: Path, content: str | bytes) -> bool:
+    """Write a text (or binary) file unless it already has `content`, returning whether it was written.
+
+    Leaving unchanged files untouched keeps their modification time, so that build systems do not redo
+    work (e.g. re-run CMake) because of a regenerated but identical file.
+    """
+    data = content.encode() if isinstance(content, str) else content
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
@@ -2,9 +2,13 @@
 
 See: https://stackoverflow.com/questions/67631/how-can-i-import-a-module-dynamically-given-the-full-path
 """
+import contextlib
 from pathlib import Path
 from types import ModuleType
 import importlib.util
+import sys
+import sysconfig
+import typing as t
 
 
 def import_module(module_name: str, file: Path) -> ModuleType:
@@ -18,3 +22,31 @@ def import_module(module_name: str, file: Path) -> ModuleType:
     assert spec.loader is not None, f"Spec loader is None for module {module_name} at {file}"
     spec.loader.exec_module(module)
     return module
+
+
+def _installed_dirs() -> list[Path]:
+    paths = sysconfig.get_paths()
+    return [Path(paths[x]).resolve() for x in ('stdlib', 'platstdlib', 'purelib', 'platlib')]
+
+
+@contextlib.contextmanager
+def track_imports() -> t.Iterator[list[Path]]:
+    """Collect the files of the modules imported within the context, except installed (and lobs) ones.
+
+    The collected modules are then removed from `sys.modules`, so that they are imported (and reported) again
+    by the next evaluation instead of reusing possibly outdated code.
+    """
+    before = set(sys.modules)
+    imported: list[Path] = []
+    try:
+        yield imported
+    finally:
+        excluded = [*_installed_dirs(), Path(__file__).parents[1].resolve()]
+        for name in [x for x in sys.modules if x not in before]:
+            file = getattr(sys.modules[name], '__file__', None)
+            if file is None:
+                continue
+            path = Path(file).resolve()
+            if not any(path.is_relative_to(x) for x in excluded):
+                imported.append(path)
+                del sys.modules[name]
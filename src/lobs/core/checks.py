@@ -0,0 +1,205 @@
+"""Structural checks of a package graph, reporting every problem at once instead of failing an export on the first.
+
+The checks of the packages run concurrently. File existence is checked with a single listing of each directory
+holding declared files, rather than one `stat` per file, so that the whole graph of a large workspace can be
+checked (e.g. by a pre-commit hook) in about the time of reading its directories.
+"""
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import os
+import typing as t
+from pathlib import Path
+
+from lobs.core import exporter
+from lobs.core import package as pm
+from lobs.core.language.base import SOURCES, Glob, declared_paths, providers
+from lobs.core.variants import VariantMatrix
+
+
+@dataclasses.dataclass(frozen=True)
+class Problem:
+    package: str
+    """The name of the package the problem was found in."""
+    check: str
+    """The check that found the problem (e.g. `files`, or the tag of an exporter)."""
+    message: str
+
+    def to_dict(self) -> dict[str, str]:
+        return dataclasses.asdict(self)
+
+    def __str__(self) -> str:
+        return f"{self.package}: [{self.check}] {self.message}"
+
+
+@dataclasses.dataclass(frozen=True)
+class _Expected:
+    path: Path
+    directory: bool
+    what: str
+
+
+def _expected_files(package: pm.IPackage) -> list[_Expected]:
+    """The files and folders the project of `package` declares, without running generators or providers."""
+    prj = package.project
+    expected: list[_Expected] = []
+    for field in ('source_files', 'module_interfaces'):
+        entries: SOURCES = getattr(prj, field, [])
+        expected.extend(_Expected(x, False, field) for x in declared_paths(entries))
+        for provider in providers(entries):
+            if isinstance(provider, Glob):
+                expected.append(_Expected(provider.root, True, f"{field} glob root"))
+            inputs = getattr(provider, 'inputs', ())
+            expected.extend(_Expected(Path(x), False, f"{field} generator input") for x in inputs)
+    expected.extend(_Expected(x, True, 'include_dirs') for x in declared_paths(getattr(prj, 'include_dirs', [])))
+    expected.extend(
+        _Expected(x.source, False, 'placements') for x in getattr(prj, 'placements', []) if x.source is not None
+    )
+    return expected
+
+
+def _list_directory(directory: Path) -> dict[str, bool] | None:
+    """Whether each entry of `directory` is a folder, or None if it cannot be listed."""
+    try:
+        with os.scandir(directory) as entries:
+            return {x.name: x.is_dir() for x in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def check_files(packages: Sequence[pm.IPackage], pool: ThreadPoolExecutor) -> list[Problem]:
+    """Check that the files and folders declared by `packages` exist, listing each directory once."""
+    expected = {id(pkg): _expected_files(pkg) for pkg in packages}
+    directories = sorted({x.path.absolute().parent for items in expected.values() for x in items})
+    listings = dict(zip(directories, pool.map(_list_directory, directories)))
+    problems: list[Problem] = []
+    for pkg in packages:
+        for item in expected[id(pkg)]:
+            path = item.path.absolute()
+            is_dir = (listings[path.parent] or {}).get(path.name)
+            if is_dir is None:
+                problems.append(Problem(pkg.meta.name, 'files', f"{item.what}: {item.path} does not exist."))
+            elif is_dir != item.directory:
+                kind = 'a folder' if item.directory else 'a file'
+                problems.append(Problem(pkg.meta.name, 'files', f"{item.what}: {item.path} is not {kind}."))
+    return problems
+
+
+def _error(e: Exception) -> str:
+    # Errors raised by the evaluation of a project file (e.g. a SyntaxError) are not explicit without their type
+    if isinstance(e, (FileNotFoundError, ValueError)):
+        return str(e)
+    return f"{type(e).__name__}: {e}"
+
+
+def _walk(package: pm.IPackage) -> tuple[list[pm.IPackage], list[Problem]]:
+    """All packages of the graph of `package`, and the problems found walking it (cycles, unresolved references).
+
+    Unlike `graph.walk`, cycles do not stop the traversal, so that the other checks still run.
+    """
+    ordered: list[pm.IPackage] = []
+    problems: list[Problem] = []
+    done: set[int] = set()
+    active: list[pm.IPackage] = []
+    cycles: set[frozenset[int]] = set()
+
+    def visit(pkg: pm.IPackage) -> None:
+        if id(pkg) in done:
+            return
+        if any(x is pkg for x in active):
+            cycle = active[next(i for i, x in enumerate(active) if x is pkg):]
+            if (key := frozenset(id(x) for x in cycle)) not in cycles:
+                cycles.add(key)
+                path = ' -> '.join(x.meta.name for x in [*cycle, pkg])
+                problems.append(Problem(pkg.meta.name, 'cycles', f"Dependency cycle detected: {path}"))
+            return
+        active.append(pkg)
+        # Each reference is resolved on its own, so that a broken one does not hide the other dependencies
+        for index, declared in enumerate(list(pkg.declared_dependencies)):
+            try:
+                dep = pkg.resolve_dependency(index)
+            except Exception as e:
+                what = declared.path if isinstance(declared, pm.PackageRef) else declared.meta.name
+                problems.append(Problem(pkg.meta.name, 'dependencies', f"Cannot resolve {what}: {_error(e)}"))
+                continue
+            visit(dep)
+        active.pop()
+        done.add(id(pkg))
+        ordered.append(pkg)
+
+    visit(package)
+    return ordered, problems
+
+
+def check_names(packages: Sequence[pm.IPackage]) -> list[Problem]:
+    """Check that distinct packages of the graph have distinct names."""
+    paths: dict[str, list[Path]] = {}
+    for pkg in packages:
+        paths.setdefault(pkg.meta.name, []).append(pkg.package_path)
+    return [
+        Problem(name, 'names', f"Package name used by several packages: {', '.join(str(x) for x in found)}")
+        for name, found in paths.items()
+        if len(found) > 1
+    ]
+
+
+def check_flags(package: pm.IPackage) -> list[Problem]:
+    """Check that the flags set on the compilation flags of the project are known ones.
+
+    Flags set as attributes rather than items (e.g. `flags.w_shadow = True`) are not declared, and would be
+    silently left out of the compiler arguments.
+    """
+    flags = getattr(package.project, 'compilation_flags', None)
+    if flags is None:
+        return []
+    return [
+        Problem(
+            package.meta.name,
+            'flags',
+            f"Unknown compilation flag '{name}', add it with `compilation_flags['{name}'] = {value!r}`.",
+        )
+        for name, value in vars(flags).items()
+        if name not in flags.__dataclass_fields__
+    ]
+
+
+PackageCheck: t.TypeAlias = Callable[[pm.IPackage], Iterable[Problem]]
+"""A check of a single package, run concurrently with the checks of the other packages."""
+
+
+def exporter_check(tag: str) -> PackageCheck:
+    """The check of the exporter registered as `tag`, with the configuration of each package."""
+    klass = exporter.IExporter.KNOWN[tag]
+    return lambda pkg: [Problem(pkg.meta.name, tag, x) for x in klass(pkg, recursive=False).check()]
+
+
+def configured_exporters(package: pm.IPackage) -> list[str]:
+    """The tags of the exporters configured by `package`, directly or by its variants."""
+    configuration = [*package.meta.exporter_configuration]
+    if (matrix := VariantMatrix.of(configuration)) is not None:
+        configuration += [x for variant in matrix.variants for x in variant.configuration]
+    return [
+        tag
+        for tag, klass in exporter.IExporter.KNOWN.items()
+        if any(type(x) is klass.config_cls for x in configuration)
+    ]
+
+
+def run_checks(
+    package: pm.IPackage,
+    package_checks: Sequence[PackageCheck] = (),
+    jobs: int | None = None,
+) -> list[Problem]:
+    """Run every structural check on the graph of `package`, and the `package_checks` on each of its packages.
+
+    The problems are returned in a stable order: by check, then by package in dependency order.
+    """
+    packages, problems = _walk(package)
+    problems += check_names(packages)
+    checks: list[PackageCheck] = [check_flags, *package_checks]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        problems += check_files(packages, pool)
+        for found in pool.map(lambda x: [p for check in checks for p in check(x)], packages):
+            problems += found
+    order = {x.meta.name: i for i, x in enumerate(packages)}
+    return sorted(problems, key=lambda x: (x.check, order.get(x.package, -1)))
@@ -1,45 +1,143 @@
 import abc
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import typing as t
 
+from lobs.core import graph
 from lobs.core import package as pm
+from lobs.core import sharding
 from .configuration import ExporterConfiguration
+from .variants import SharedWork, Variant, VariantMatrix
 
 
 T = t.TypeVar('T', bound=ExporterConfiguration)
 
 
 class BaseExporter(abc.ABC, t.Generic[T]):
-    def __init__(self, package: pm.IPackage) -> None:
+    def __init__(
+        self,
+        package: pm.IPackage,
+        recursive: bool = True,
+        variant: Variant | None = None,
+        shared: SharedWork | None = None,
+        cwd: Path | None = None,
+    ) -> None:
         self.package = package
         """The project top-level module to export."""
+        self.recursive = recursive
+        """Whether exporters that generate files for the package dependencies shall do so."""
+        self.variant = variant
+        """The variant being exported, if any."""
+        self.shared = shared or SharedWork()
+        """The variant-independent results, shared with the exporters of the other variants."""
+        self.cwd = cwd or Path.cwd()
+        """The folder relative paths of the configuration are relative to, the working directory by default."""
+        self.package_config = self._find_config(package.meta.exporter_configuration) or t.cast(T, self.config_cls())
+        """The configuration of the package for the exporter, regardless of the variant."""
+        self.config = self._find_config(variant.configuration if variant else []) or self.package_config
+        """The configuration for the exporter."""
+
+    def _find_config(self, configuration: Sequence[ExporterConfiguration]) -> T | None:
         # We explicitly look for the exact type here, to avoid issues with subclasses
         # that is, if an exporter "reuses" the configuration of another exporter,
         # we don't want to pick that up here.
-        provided_config = next(
-            (c for c in package.meta.exporter_configuration if type(c) is self.config_cls),
-            None,
-        )
-        self.config = t.cast(T, provided_config) or self.config_cls()
-        """The configuration for the exporter."""
+        return t.cast(T | None, next((c for c in configuration if type(c) is self.config_cls), None))
 
     @property
     def project_folder(self) -> Path:
         """The folder where the project is located (the parent of the module file)."""
         return self.package.package_path.parent
 
+    @property
+    def output_folder(self) -> Path:
+        """The folder the project files are written to: the project folder, or the one of the variant."""
+        if self.variant is None:
+            return self.project_folder
+        return self.project_folder / self.variant.relative_folder
+
+    @property
+    def workspace_folder(self) -> Path:
+        """The folder of the tree of the packages of the graph, under which paths are written relative."""
+        return graph.common_folder(self.shared.get(('walk', id(self.package)), lambda: graph.walk(self.package)))
+
     @abc.abstractmethod
     def export(self) -> None:
         """Export the project to the desired format."""
 
-    KNOWN: dict[str, type[t.Self]] = {}
+    def check(self) -> list[str]:
+        """The problems that would make the export of the package fail, found without writing anything.
+
+        Only the package itself is checked, `lobs check` running the check of each package of the graph.
+        """
+        return []
+
+    KNOWN: t.ClassVar[dict[str, type['IExporter']]] = {}
     """A mapping of known exporter tags to their corresponding classes."""
+    tag: t.ClassVar[str]
+    """The tag the exporter is registered as."""
+    config_cls: t.ClassVar[type[ExporterConfiguration]]
+    """The configuration class of the exporter."""
+    SHARDABLE: t.ClassVar[bool] = True
+    """Whether the packages of a graph can be exported separately, each without its dependencies (see `--shard`)."""
 
     def __init_subclass__(cls, tag: str, config_cls: type[T]) -> None:
         cls.tag = tag
         cls.config_cls = config_cls
-        cls.KNOWN[tag] = cls
+        cls.KNOWN[tag] = t.cast(type[IExporter], cls)
         return super().__init_subclass__()
 
 
 IExporter: t.TypeAlias = BaseExporter[ExporterConfiguration]
+
+
+def run_export(
+    package: pm.IPackage,
+    tag: str,
+    shard: tuple[int, int] | None = None,
+    cost_model: sharding.CostModel = 'size',
+    cwd: Path | None = None,
+) -> list[sharding.Assignment]:
+    """Export `package` with the exporter registered as `tag`, returning what was exported.
+
+    If `shard` (a zero-based index and the shard count) is given, only the packages assigned to that shard
+    are exported, in stage order and without recursing into their dependencies. Otherwise, the variants of the
+    package are exported if it declares a `VariantMatrix`.
+    """
+    klass = IExporter.KNOWN[tag]
+    if shard is None:
+        if (matrix := VariantMatrix.of(package.meta.exporter_configuration)) is not None:
+            run_variants(package, tag, matrix.variants, cwd=cwd)
+        else:
+            klass(package, cwd=cwd).export()
+        return [sharding.Assignment(package, 0, 0)]
+
+    if not klass.SHARDABLE:
+        raise ValueError(f"The {tag} exporter renders the whole package graph at once, it cannot be sharded.")
+    index, count = shard
+    assignments = sharding.partition(package, count, sharding.estimate_costs(package, cost_model))
+    exported = sharding.shard_packages(assignments, index)
+    for a in exported:
+        klass(a.package, recursive=False, cwd=cwd).export()
+    return exported
+
+
+def run_variants(
+    package: pm.IPackage,
+    tag: str,
+    variants: Sequence[Variant],
+    jobs: int | None = None,
+    cwd: Path | None = None,
+) -> list[Path]:
+    """Export `package` once for each of the `variants` concurrently, returning their output folders.
+
+    The package graph is evaluated once, and the variant-independent work is shared between the variants.
+    """
+    klass = IExporter.KNOWN[tag]
+    shared = SharedWork()
+    graph.provide_sources(graph.walk(package))
+    exporters = [klass(package, variant=x, shared=shared, cwd=cwd) for x in variants]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for _ in pool.map(lambda x: x.export(), exporters):
+            pass
+    return [x.output_folder for x in exporters]
@@ -0,0 +1,90 @@
+"""Traversal helpers for the package dependency graph."""
+from collections.abc import Iterable
+import os
+from pathlib import Path
+
+from lobs.core import package as pm
+from lobs.core.language.base import expand_paths, expand_sources, providers, run_providers
+
+
+def walk(package: pm.IPackage) -> list[pm.IPackage]:
+    """All packages reachable from `package` (itself included), dependencies before their dependents.
+
+    The order only depends on the declaration order of the dependencies, so it is stable between runs.
+    """
+    ordered: list[pm.IPackage] = []
+    done: set[int] = set()
+    active: list[pm.IPackage] = []
+
+    def visit(pkg: pm.IPackage) -> None:
+        if id(pkg) in done:
+            return
+        if any(x is pkg for x in active):
+            cycle = active[next(i for i, x in enumerate(active) if x is pkg):] + [pkg]
+            raise ValueError(f"Dependency cycle detected: {' -> '.join(x.meta.name for x in cycle)}")
+        active.append(pkg)
+        for dep in pkg.dependencies:
+            visit(dep)
+        active.pop()
+        done.add(id(pkg))
+        ordered.append(pkg)
+
+    visit(package)
+    return ordered
+
+
+def common_folder(packages: Iterable[pm.IPackage]) -> Path:
+    """The deepest folder containing the folders of all `packages`, e.g. the root of a workspace."""
+    return Path(os.path.commonpath([x.package_path.parent for x in packages]))
+
+
+def find(package: pm.IPackage, name: str) -> pm.IPackage:
+    """The package named `name` in the graph of `package`, searched breadth-first.
+
+    Only the packages on the way are evaluated: dependencies declared by a `PackageRef` of another name are
+    not resolved until a level of the graph without a match has to be searched through.
+    """
+    level = [package]
+    seen: set[int] = set()
+    while level:
+        for pkg in level:
+            if pkg.meta.name == name:
+                return pkg
+        for pkg in level:
+            if (found := pkg.dependency(name)) is not None:
+                return found
+        seen.update(id(x) for x in level)
+        level = list({id(d): d for pkg in level for d in pkg.dependencies if id(d) not in seen}.values())
+    raise ValueError(f"No package named '{name}' in the graph of '{package.meta.name}'.")
+
+
+def package_sources(package: pm.IPackage) -> list[Path]:
+    """The expanded source files of the package's project, or an empty list if it has none."""
+    return expand_sources(getattr(package.project, 'source_files', []))
+
+
+def package_module_interfaces(package: pm.IPackage) -> list[Path]:
+    """The expanded C++ module interface units of the package's project, or an empty list if it has none."""
+    return expand_sources(getattr(package.project, 'module_interfaces', []))
+
+
+def package_include_dirs(package: pm.IPackage) -> list[Path]:
+    """The expanded include directories of the package's project, or an empty list if it has none."""
+    return expand_paths(getattr(package.project, 'include_dirs', []))
+
+
+def provide_sources(packages: Iterable[pm.IPackage], jobs: int | None = None) -> None:
+    """Run the source providers (e.g. code generation steps) of all `packages` concurrently.
+
+    Exporters call it before expanding the sources of a graph, so that the providers of different
+    packages do not run one package after the other.
+    """
+    run_providers(
+        (
+            x
+            for pkg in packages
+            for field in ('source_files', 'module_interfaces', 'include_dirs')
+            for x in providers(getattr(pkg.project, field, []))
+        ),
+        jobs,
+    )
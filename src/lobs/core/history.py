@@ -0,0 +1,45 @@
+"""Measurements recorded from previous builds, for features that benefit from knowing real costs."""
+from collections.abc import Mapping
+import statistics
+import time
+import typing as t
+from pathlib import Path
+
+from lobs._machinery.cache import read_json, write_json
+from lobs.core import package as pm
+
+
+class History:
+    """The measurement history of a package tree, stored in a `.lobs` folder next to the package file.
+
+    Each kind of measurement (e.g. `build-times.sources`) is a mapping of keys to their most recent samples.
+    """
+    MAX_SAMPLES = 10
+    """The number of samples kept for each key; older ones are discarded."""
+
+    def __init__(self, package: pm.IPackage) -> None:
+        self.folder = package.package_path.parent / '.lobs'
+        """The folder where the history files are stored."""
+
+    def _file(self, kind: str) -> Path:
+        return self.folder / f'{kind}.json'
+
+    def record(self, kind: str, samples: Mapping[str, float]) -> None:
+        """Append one sample for each key of `samples`."""
+        data: dict[str, list[float]] = (read_json(self._file(kind)) or {}).get('samples', {})
+        for key, value in samples.items():
+            data[key] = (data.get(key, []) + [value])[-self.MAX_SAMPLES:]
+        write_json(self._file(kind), {'updated': int(time.time()), 'samples': data})
+
+    def estimates(self, kind: str) -> dict[str, float]:
+        """The median of the recorded samples of each key; empty if nothing was recorded."""
+        data: dict[str, list[float]] = (read_json(self._file(kind)) or {}).get('samples', {})
+        return {key: statistics.median(values) for key, values in data.items() if values}
+
+    def baseline(self, kind: str) -> t.Any | None:
+        """The baseline stored for `kind`, or None if there is none."""
+        return read_json(self.folder / f'{kind}.baseline.json')
+
+    def set_baseline(self, kind: str, data: t.Any) -> None:
+        """Store `data` as the baseline that later measurements of `kind` are compared against."""
+        write_json(self.folder / f'{kind}.baseline.json', data)
@@ -0,0 +1,79 @@
+"""The files an export was derived from, so that it is only redone when one of them actually changed.
+
+The inputs are the Python files read when evaluating the package graph, the matches of its source globs and
+the files read by its source providers. They are recorded with their content hash in a manifest next to the
+package file after each export; `lobs export --if-changed` compares them without evaluating the package.
+"""
+import dataclasses
+import hashlib
+import typing as t
+from pathlib import Path
+
+from lobs._machinery.cache import read_json, write_json
+from lobs.core import graph
+from lobs.core import package as pm
+from lobs.core.language.base import Glob, providers
+from lobs.version import __version__
+
+
+def manifest_path(package_path: Path, tag: str, variant: str | None = None) -> Path:
+    """The manifest of the inputs of the `tag` export (of `variant`) of the package file at `package_path`."""
+    suffix = f'{tag}.{variant}' if variant is not None else tag
+    return package_path.parent / '.lobs' / f'export-inputs.{suffix}.json'
+
+
+def _digest(path: Path) -> str | None:
+    try:
+        with path.open('rb') as f:
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+@dataclasses.dataclass
+class ExportInputs:
+    files: dict[str, str | None]
+    """The content hash of each input file, by path; None for files that did not exist."""
+    globs: list[tuple[str, str, list[str]]] = dataclasses.field(default_factory=list)
+    """The root, pattern and matching files of each glob."""
+    variants: list[str] = dataclasses.field(default_factory=list)
+    """The variants declared by the package, exported in its place; their inputs are also recorded on their own."""
+    version: str = __version__
+    """The version of `lobs` that exported, as its output may change between versions."""
+
+    @classmethod
+    def collect(cls, package: pm.IPackage) -> t.Self:
+        files: dict[Path, None] = dict.fromkeys(package.evaluated_files)
+        globs: dict[tuple[str, str], list[str]] = {}
+        for pkg in graph.walk(package):
+            files[pkg.package_path] = None
+            # Packages of references are evaluated separately, with their own imports
+            files.update(dict.fromkeys(pkg.evaluated_files))
+            sources = providers(getattr(pkg.project, 'source_files', []))
+            for provider in sources + providers(getattr(pkg.project, 'module_interfaces', [])):
+                if isinstance(provider, Glob):
+                    globs[(provider.root.as_posix(), provider.pattern)] = [x.as_posix() for x in provider.provide()]
+                files.update(dict.fromkeys(getattr(provider, 'inputs', ())))
+        return cls({x.as_posix(): _digest(x) for x in sorted(files)}, [(*k, v) for k, v in sorted(globs.items())])
+
+    @classmethod
+    def load(cls, path: Path) -> t.Self | None:
+        """The recorded inputs, or None if they are missing or unreadable (e.g. of another lobs version)."""
+        data = read_json(path)
+        try:
+            return cls(**data) if isinstance(data, dict) else None
+        except TypeError:
+            return None
+
+    def save(self, path: Path) -> None:
+        write_json(path, dataclasses.asdict(self))
+
+    def changed(self) -> list[str]:
+        """The inputs whose content (or matches, for globs) differ from the recorded ones."""
+        if self.version != __version__:
+            return [f'lobs {self.version} -> {__version__}']
+        changed = [x for x, digest in self.files.items() if _digest(Path(x)) != digest]
+        for root, pattern, matches in self.globs:
+            if [x.as_posix() for x in Glob(Path(root), pattern).provide()] != matches:
+                changed.append(f'{root}/{pattern}')
+        return changed
@@ -1,25 +1,81 @@
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import typing as t
 from pathlib import Path
 
 
+@t.runtime_checkable
+class SourceProvider(t.Protocol):
+    """An entry of `SOURCES` producing its files on demand (e.g. a code generation step).
+
+    `provide` shall be idempotent and thread-safe, as providers are run concurrently. Providers reading
+    files other than their results may list them as `inputs`, so that exports are redone when they change.
+    """
+
+    def provide(self) -> list[Path]:
+        ...
+
+
+@dataclass(frozen=True)
+class Glob:
+    """The files under `root` matching `pattern` (e.g. `src/**/*.cpp`), in sorted order.
+
+    Unlike `root.glob(pattern)`, the pattern is known to `lobs`, which re-exports the project when the set of
+    matching files changes.
+    """
+    root: Path
+    pattern: str
+
+    def provide(self) -> list[Path]:
+        return sorted(x for x in self.root.glob(self.pattern) if x.is_file())
+
+
 SOURCE_GEN: t.TypeAlias = t.Generator[Path, None, None]
-SOURCES: t.TypeAlias = Sequence[Path | SOURCE_GEN] | SOURCE_GEN
+SOURCES: t.TypeAlias = Sequence[Path | SOURCE_GEN | SourceProvider] | SOURCE_GEN
+
+
+def providers(files: SOURCES) -> list[SourceProvider]:
+    """The source providers among `files`, without consuming generators."""
+    if not isinstance(files, Sequence):
+        return []
+    return [x for x in files if isinstance(x, SourceProvider)]
+
+
+def declared_paths(files: SOURCES) -> list[Path]:
+    """The paths listed as such in `files`, without running generators or providers."""
+    return [x for x in files if isinstance(x, Path)] if isinstance(files, Sequence) else []
+
+
+def run_providers(items: Iterable[SourceProvider], jobs: int | None = None) -> dict[int, list[Path]]:
+    """Run the distinct providers concurrently, returning their files by provider id."""
+    distinct = list({id(x): x for x in items}.values())
+    if len(distinct) <= 1:
+        return {id(x): x.provide() for x in distinct}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return dict(zip((id(x) for x in distinct), pool.map(lambda x: x.provide(), distinct)))
+
 
+def expand_paths(values: SOURCES) -> list[Path]:
+    """Flatten `values` into paths, running the source providers among them concurrently.
 
-def _flatten_list(values: SOURCES) -> list[Path]:
+    Unlike `expand_sources`, the paths may be folders (e.g. include directories).
+    """
+    provided = run_providers(providers(values))
     ret: list[Path] = []
     for item in values:
         if isinstance(item, Path):
             ret.append(item)
+        elif isinstance(item, SourceProvider):
+            ret.extend(provided[id(item)])
         else:
             ret.extend(list(item))
     return ret
 
 
 def expand_sources(files: SOURCES) -> list[Path]:
-    all_files = _flatten_list(files)
+    """Flatten `files` into paths, running the source providers among them concurrently."""
+    all_files = expand_paths(files)
     if any(not pp.is_file() for pp in all_files):
         raise ValueError("Some source paths are not files.")
     return all_files
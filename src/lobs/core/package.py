@@ -1,21 +1,131 @@
+from collections.abc import Sequence
+import dataclasses
 import inspect
+import sys
+import threading
 import typing as t
 from pathlib import Path
 from types import ModuleType
 
+from lobs._machinery.modules import import_module, track_imports
 from lobs.core import project as p
 
 
+_resolve_lock = threading.RLock()
+
+
+@dataclasses.dataclass(frozen=True)
+class PackageRef:
+    """A dependency declared by the path of its project file, only evaluated when first accessed.
+
+    Unlike importing the package of another project file, which evaluates it (and its own dependencies) along
+    with the dependent one, references are resolved on demand: exports of a part of the graph (e.g.
+    `lobs export --only`) do not evaluate the rest of it.
+    """
+    path: Path | str
+    """The project file, or the folder `<name>` of a `<name>/<name>.py` project file. Relative paths are
+    relative to the folder of the declaring project file."""
+    name: str | None = None
+    """The name of the package, if known; it is then checked on resolution, and can be used without it."""
+
+    def project_file(self, base: Path) -> Path:
+        """The referenced project file, relative paths being relative to the `base` folder."""
+        path = base / self.path
+        if path.is_dir():
+            path = path / f"{path.name}.py"
+        return path.resolve()
+
+
+@dataclasses.dataclass
+class _Graph:
+    """The packages of a graph resolved so far, shared by the packages that joined it."""
+    packages: 'dict[tuple[Path, str], IPackage]' = dataclasses.field(default_factory=dict)
+    """The packages by project file and name. A file evaluated again (e.g. imported by the project file of a
+    reference) defines new objects for known packages, which are replaced by the known ones."""
+    references: 'dict[Path, IPackage]' = dataclasses.field(default_factory=dict)
+    """The package of each project file evaluated from a reference."""
+
+    def join(self, other: '_Graph') -> None:
+        for key, package in other.packages.items():
+            self.packages.setdefault(key, package)
+        for path, package in other.references.items():
+            self.references.setdefault(path, package)
+
+
 class Package(t.Generic[p.TP]):
-    def __init__(self, meta: p.ProjectMeta, project: p.TP, dependencies: 'list[IPackage] | None' = None) -> None:
+    def __init__(
+        self,
+        meta: p.ProjectMeta,
+        project: p.TP,
+        dependencies: 'Sequence[IPackage | PackageRef] | None' = None,
+    ) -> None:
         self.meta = meta
         """The metadata of the package."""
         self.project = project
         """The project instance contained in the package."""
-        self.dependencies = dependencies or []
-        """The list of project dependencies."""
+        self.declared_dependencies = list(dependencies or [])
+        """The dependencies as declared, references being replaced by their package once resolved."""
         self.package_path = self._get_caller_path()
         """The path to the package file."""
+        self.evaluated_files: list[Path] = []
+        """The Python files read to evaluate the package, if it was evaluated with `from_file`."""
+        self._graph = _Graph()
+        """The packages of the graph resolved so far, shared with the dependencies once they are resolved."""
+
+    @property
+    def dependencies(self) -> 'list[IPackage]':
+        """The list of project dependencies, resolving the references among them."""
+        return [self.resolve_dependency(i) for i in range(len(self.declared_dependencies))]
+
+    @dependencies.setter
+    def dependencies(self, value: 'Sequence[IPackage | PackageRef]') -> None:
+        self.declared_dependencies = list(value)
+
+    @property
+    def dependency_names(self) -> list[str]:
+        """The names of the direct dependencies, without resolving the references declaring their name."""
+        return [
+            x.name if isinstance(x, PackageRef) and x.name is not None else self.resolve_dependency(i).meta.name
+            for i, x in enumerate(self.declared_dependencies)
+        ]
+
+    def dependency(self, name: str) -> 'IPackage | None':
+        """The direct dependency named `name`, if any; references declaring another name are not resolved."""
+        for i, x in enumerate(self.declared_dependencies):
+            if isinstance(x, PackageRef) and x.name is not None and x.name != name:
+                continue
+            if (dep := self.resolve_dependency(i)).meta.name == name:
+                return dep
+        return None
+
+    def resolve_dependency(self, index: int) -> 'IPackage':
+        """The dependency declared at `index`, evaluating it if it is a reference."""
+        with _resolve_lock:
+            declared = self.declared_dependencies[index]
+            path = None
+            if isinstance(declared, PackageRef):
+                path = declared.project_file(self.package_path.parent)
+                dep = self._graph.references.get(path)
+                if dep is None:
+                    dep = Package.from_file(path)
+                if declared.name is not None and dep.meta.name != declared.name:
+                    raise ValueError(f"{path} defines package '{dep.meta.name}', but '{declared.name}' was expected.")
+            else:
+                dep = declared
+            if dep._graph is not self._graph:
+                # Join the graph, so that the same package is only known by a single object
+                self._graph.join(dep._graph)
+                dep._graph = self._graph
+            self._graph.packages.setdefault((self.package_path, self.meta.name), self)
+            dep = self._graph.packages.setdefault((dep.package_path, dep.meta.name), dep)
+            if path is not None:
+                self._graph.references.setdefault(path, dep)
+            self.declared_dependencies[index] = dep
+            return dep
+
+    def resolved_packages(self) -> 'list[IPackage]':
+        """The packages of the graph resolved so far, without resolving the others."""
+        return list(self._graph.packages.values())
 
     def collect_dependencies_paths(self) -> set[Path]:
         """Collect the paths of all dependencies recursively; excluding the package's own path."""
@@ -34,21 +144,31 @@ class Package(t.Generic[p.TP]):
 
     @classmethod
     def _get_caller_path(cls) -> Path:
-        # See: https://stackoverflow.com/a/60297932/3474172
-        stack = inspect.stack()
-        if len(stack) < 3:
-            raise RuntimeError("Could not determine caller path.")
-        frame_info = stack[2]
-        if frame_info.filename == "<stdin>":
+        # Unlike `inspect.stack()`, looking up the frame does not read the source context of the whole stack
+        try:
+            filename = sys._getframe(2).f_code.co_filename
+        except ValueError as e:
+            raise RuntimeError("Could not determine caller path.") from e
+        if filename == "<stdin>":
             raise RuntimeError("Could not determine caller path from stdin.")
-        return Path(frame_info.filename).resolve()
+        return Path(filename).resolve()
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'IPackage':
+        """Evaluate a project file and return the package it defines, recording the files it imported."""
+        with track_imports() as imported:
+            package = cls.from_module(import_module('project_module', path))
+        package.evaluated_files = [path.resolve(), *imported]
+        return package
 
     @classmethod
     def from_module(cls, m: ModuleType) -> 'IPackage':
-        pkg = next((x for _, x in inspect.getmembers(m) if isinstance(x, Package)), None)  # pyright: ignore
-        if pkg is None:
+        """The package defined by the module `m`, rather than one it imported from another project file."""
+        packages: list[IPackage] = [x for _, x in inspect.getmembers(m) if isinstance(x, Package)]
+        if not packages:
             raise ValueError(f"No 'lobs' package found in module {m.__name__}.")
-        return pkg  # pyright: ignore
+        file = Path(m.__file__).resolve() if m.__file__ is not None else None
+        return next((x for x in packages if x.package_path == file), packages[0])
 
 
 IPackage: t.TypeAlias = Package[p.Project]
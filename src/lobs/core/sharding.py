@@ -0,0 +1,108 @@
+"""Deterministic partitioning of a package graph into cost-balanced shards.
+
+Every CI worker evaluates the same project files, so computing the partition from the graph alone
+(with ties broken by declaration order) yields the same split on every worker without coordination.
+Costs estimated from a local history would break this, so they are estimated from the sources by default.
+"""
+import dataclasses
+import typing as t
+
+from lobs.core import graph
+from lobs.core import package as pm
+from lobs.core.history import History
+
+
+CostModel: t.TypeAlias = t.Literal['sources', 'size', 'timings']
+COST_MODELS: tuple[CostModel, ...] = t.get_args(CostModel)
+
+
+@dataclasses.dataclass(frozen=True)
+class Assignment:
+    package: pm.IPackage
+    shard: int
+    """The zero-based index of the shard the package is assigned to."""
+    stage: int
+    """The stage in which the package can be processed: all its dependencies are
+    either on the same shard, or on any shard in an earlier stage."""
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse a one-based `i/n` shard specification into a zero-based index and the shard count."""
+    try:
+        index, count = (int(x) for x in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard specification '{spec}', expected 'i/n'.") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard specification '{spec}', expected 1 <= i <= n.")
+    return index - 1, count
+
+
+def estimate_costs(root: pm.IPackage, model: CostModel = 'size') -> dict[str, float]:
+    """Estimate the build cost of each package in the graph of `root`, keyed by package name.
+
+    The `sources` and `size` models only depend on the checkout. The `timings` model uses the build times
+    recorded in the history of `root`; packages without recorded timings are estimated from their source
+    sizes, scaled to the recorded ones. As workers only agree on the split if they estimate the same costs,
+    it requires the same history on every worker (e.g. committed to the repository).
+    """
+    packages = graph.walk(root)
+    if model == 'sources':
+        return {pkg.meta.name: float(max(1, len(graph.package_sources(pkg)))) for pkg in packages}
+
+    sizes = {pkg.meta.name: float(max(1, sum(x.stat().st_size for x in graph.package_sources(pkg))))
+             for pkg in packages}
+    if model == 'size':
+        return sizes
+
+    recorded = History(root).estimates('build-times.packages')
+    known = [name for name in sizes if name in recorded]
+    scale = sum(recorded[x] for x in known) / sum(sizes[x] for x in known) if known else 1.0
+    return {name: recorded[name] if name in recorded else size * scale for name, size in sizes.items()}
+
+
+def partition(root: pm.IPackage, shards: int, costs: dict[str, float]) -> list[Assignment]:
+    """Assign every package in the graph of `root` to one of `shards`, dependencies first.
+
+    Packages are placed from the most to the least expensive, preferring the shard already holding
+    most of their direct neighbours while it stays within the balanced load; otherwise they go to the
+    least loaded shard. Ties are always broken by declaration order and shard index.
+    """
+    if shards < 1:
+        raise ValueError("The number of shards must be at least 1.")
+    packages = graph.walk(root)
+    order = {id(pkg): i for i, pkg in enumerate(packages)}
+    dependents: dict[int, list[pm.IPackage]] = {id(pkg): [] for pkg in packages}
+    for pkg in packages:
+        for dep in pkg.dependencies:
+            dependents[id(dep)].append(pkg)
+
+    target = sum(costs[pkg.meta.name] for pkg in packages) / shards
+    loads = [0.0] * shards
+    placed: dict[int, int] = {}
+    for pkg in sorted(packages, key=lambda x: (-costs[x.meta.name], order[id(x)])):
+        cost = costs[pkg.meta.name]
+        affinity = [0.0] * shards
+        for other in [*pkg.dependencies, *dependents[id(pkg)]]:
+            if id(other) in placed:
+                affinity[placed[id(other)]] += costs[other.meta.name]
+        preferred = max(range(shards), key=lambda i: (affinity[i], -i))
+        if affinity[preferred] > 0 and loads[preferred] + cost <= target:
+            shard = preferred
+        else:
+            shard = min(range(shards), key=lambda i: (loads[i], i))
+        placed[id(pkg)] = shard
+        loads[shard] += cost
+
+    stages: dict[int, int] = {}
+    for pkg in packages:
+        stages[id(pkg)] = max(
+            (stages[id(d)] + (placed[id(d)] != placed[id(pkg)]) for d in pkg.dependencies),
+            default=0,
+        )
+    return [Assignment(pkg, placed[id(pkg)], stages[id(pkg)]) for pkg in packages]
+
+
+def shard_packages(assignments: list[Assignment], index: int) -> list[Assignment]:
+    """The assignments of shard `index`, in processing order."""
+    ordered = sorted(enumerate(assignments), key=lambda x: (x[1].stage, x[0]))
+    return [a for _, a in ordered if a.shard == index]
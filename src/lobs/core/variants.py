@@ -0,0 +1,101 @@
+"""Variants of an export (e.g. Debug/Release builds, chip targets), rendered from a single evaluation.
+
+A variant replaces exporter configurations of the package; each one is rendered into its own folder. The
+exporters of the variants of a package run concurrently and share the variant-independent results (graph
+walk, source expansion, flag rendering, ...) through a `SharedWork`.
+"""
+from collections.abc import Callable, Hashable, Sequence
+import dataclasses
+import threading
+import typing as t
+from pathlib import Path
+
+from .configuration import ExporterConfiguration
+
+
+R = t.TypeVar('R')
+
+
+@dataclasses.dataclass
+class Variant:
+    name: str
+    """The name of the variant, unique within the matrix."""
+    configuration: Sequence[ExporterConfiguration] = ()
+    """Exporter configurations used instead of those of the package, matched by exact type."""
+    folder: Path | None = None
+    """Where the variant is rendered, relative to the package folder. Defaults to `variants/<name>`."""
+
+    @property
+    def relative_folder(self) -> Path:
+        return self.folder if self.folder is not None else Path('variants') / self.name
+
+    @classmethod
+    def parse(cls, spec: str, config: ExporterConfiguration) -> t.Self:
+        """Parse a `NAME:FIELD=VALUE,...` command line declaration, overriding the fields of `config`."""
+        name, _, assignments = spec.partition(':')
+        if not name:
+            raise ValueError(f"Missing variant name in '{spec}'.")
+        hints = t.get_type_hints(type(config))
+        fields = {x.name for x in dataclasses.fields(t.cast(t.Any, config)) if x.init}
+        overrides: dict[str, t.Any] = {}
+        for assignment in filter(None, assignments.split(',')):
+            field, sep, value = assignment.partition('=')
+            if not sep or field not in fields:
+                raise ValueError(f"Unknown field '{field}' of {type(config).__name__} in variant '{name}'.")
+            overrides[field] = _parse_value(hints[field], value)
+        return cls(name, [dataclasses.replace(t.cast(t.Any, config), **overrides)])
+
+
+def _parse_value(hint: t.Any, value: str) -> t.Any:
+    types = [x for x in t.get_args(hint) if x is not type(None)] or [hint]
+    if value == '' and type(None) in t.get_args(hint):
+        return None
+    if bool in types:
+        return value.lower() in ('1', 'true', 'on', 'yes')
+    for kind in (int, float, Path, str):
+        if kind in types:
+            return kind(value)
+    raise ValueError(f"Fields of type {hint} cannot be set from the command line.")
+
+
+@dataclasses.dataclass
+class VariantMatrix(ExporterConfiguration):
+    """The variants exported by default, declared in `ProjectMeta.exporter_configuration`."""
+    variants: Sequence[Variant]
+
+    def __post_init__(self) -> None:
+        names = [x.name for x in self.variants]
+        if duplicated := sorted({x for x in names if names.count(x) > 1}):
+            raise ValueError(f"Duplicated variant names: {', '.join(duplicated)}")
+
+    @classmethod
+    def of(cls, configuration: Sequence[ExporterConfiguration]) -> t.Self | None:
+        """The matrix declared among the exporter `configuration` of a package, if any."""
+        return next((x for x in configuration if isinstance(x, cls)), None)
+
+    def select(self, names: Sequence[str]) -> list[Variant]:
+        """The variants named `names`, in that order."""
+        known = {x.name: x for x in self.variants}
+        if unknown := [x for x in names if x not in known]:
+            raise ValueError(f"Unknown variants: {', '.join(unknown)}")
+        return [known[x] for x in names]
+
+
+class SharedWork:
+    """Results of computations that do not depend on the variant, computed once for all of them.
+
+    Safe to use from concurrent exporters: a key being computed by one of them is waited for by the others.
+    """
+
+    def __init__(self) -> None:
+        self._results: dict[Hashable, t.Any] = {}
+        self._locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], R]) -> R:
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._results:
+                self._results[key] = compute()
+            return t.cast(R, self._results[key])
@@ -4,10 +4,25 @@
 # flake8: noqa: F401
 # pyright: reportUnusedImport = false
 from .project import ManagedApplication, Library
+from .build_profile import BuildProfile, ProfileGuidedOptimization
 from .compiler_options import CompilationFlags
+from .flag_probe import FlagProbe
+from .generated import GeneratorStep
+from .link_options import LinkConfig
+from .placement import MemoryRegion, Placement
+from .testing import ResourceGroup, Test
 
 __all__ = [
     "ManagedApplication",
     "Library",
+    "BuildProfile",
+    "ProfileGuidedOptimization",
     "CompilationFlags",
+    "FlagProbe",
+    "GeneratorStep",
+    "LinkConfig",
+    "MemoryRegion",
+    "Placement",
+    "ResourceGroup",
+    "Test",
 ]
@@ -0,0 +1,79 @@
+import dataclasses
+import typing as t
+from pathlib import Path
+
+
+OptimizationLevel: t.TypeAlias = t.Literal[0, 1, 2, 3, 's', 'z', 'g', 'fast']
+
+
+@dataclasses.dataclass
+class ProfileGuidedOptimization:
+    """The settings of a two-phase profile-guided optimization workflow.
+
+    First build with the `instrument` phase and run the representative workloads,
+    which write the profile data into `profile_dir`. Then rebuild with the `use` phase.
+    """
+    phase: t.Literal['instrument', 'use']
+    """The current phase of the workflow."""
+    profile_dir: Path
+    """The directory where profile data is written to (instrument) and read from (use)."""
+
+    def arguments(self) -> list[str]:
+        """The arguments required by both the compiler and the linker for the current phase."""
+        match self.phase:
+            case 'instrument':
+                return [f'-fprofile-generate={self.profile_dir}']
+            case 'use':
+                return [f'-fprofile-use={self.profile_dir}']
+
+
+@dataclasses.dataclass
+class BuildProfile:
+    """This class represents the code generation settings of a C++ project.
+
+    Attributes left as None are not rendered, leaving the choice to the toolchain defaults.
+    """
+    optimization: OptimizationLevel | None = None
+    """The optimization level, rendered as `-O<level>`."""
+    debug_info: bool | None = None
+    """Whether to generate debug information (`-g`)."""
+    arch: str | None = None
+    """The target architecture, rendered as `-march=<arch>` (e.g. `native`, `x86-64-v3`)."""
+    tune: str | None = None
+    """The architecture to tune for, rendered as `-mtune=<tune>`."""
+    interprocedural: bool | None = None
+    """Whether to enable interprocedural (link-time) optimization. It is only enabled if the compiler supports it,
+    as checked when the exported project is configured."""
+    pgo: ProfileGuidedOptimization | None = None
+    """The profile-guided optimization phase, if any."""
+
+    def compile_arguments(self) -> list[str]:
+        """Render the compiler arguments of the profile. Interprocedural optimization is left to the exporters."""
+        args: list[str] = []
+        if self.optimization is not None:
+            args.append(f'-O{self.optimization}')
+        if self.debug_info:
+            args.append('-g')
+        if self.arch is not None:
+            args.append(f'-march={self.arch}')
+        if self.tune is not None:
+            args.append(f'-mtune={self.tune}')
+        if self.pgo is not None:
+            args.extend(self.pgo.arguments())
+        return args
+
+    def link_arguments(self) -> list[str]:
+        """Render the linker arguments of the profile."""
+        return self.pgo.arguments() if self.pgo is not None else []
+
+    @classmethod
+    def debug(cls, **kwargs: t.Any) -> t.Self:
+        return dataclasses.replace(cls(optimization='g', debug_info=True), **kwargs)
+
+    @classmethod
+    def release(cls, **kwargs: t.Any) -> t.Self:
+        return dataclasses.replace(cls(optimization=2, interprocedural=True), **kwargs)
+
+    @classmethod
+    def min_size(cls, **kwargs: t.Any) -> t.Self:
+        return dataclasses.replace(cls(optimization='s', interprocedural=True), **kwargs)
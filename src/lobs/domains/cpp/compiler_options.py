@@ -1,3 +1,4 @@
+import re
 import typing as t
 import dataclasses
 
@@ -58,3 +59,12 @@ class CompilationFlags:
         # although it would be very nice and clean to use `dataclasses.fields(self)`
         # it does not easily allow us to dynamically add fields to the dataclass
         return list(self.__dataclass_fields__.values())
+
+    def to_arguments(self) -> list[str]:
+        """Render the enabled flags as compiler arguments, in declaration order."""
+        # Dynamically added fields are registered on the class, so other instances may not have them set.
+        return [
+            re.sub(r'^w_', '-W', field.name).replace('_', '-')
+            for field in self.get_all()
+            if getattr(self, field.name, None)
+        ]
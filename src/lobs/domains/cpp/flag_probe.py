@@ -0,0 +1,87 @@
+"""Support probing of rendered compilation flags against the selected compiler.
+
+Probing is opt-in: exporters only probe when their configuration carries a `FlagProbe`.
+The results are cached on disk, keyed by the compiler fingerprint, so that only flags never
+seen before with a given compiler cost a compiler invocation.
+"""
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import os
+import subprocess
+import typing as t
+import warnings
+from pathlib import Path
+
+from lobs._machinery.cache import read_json, user_cache_dir, write_json
+from . import toolchain
+
+
+def _probe_argument(flag: str) -> str:
+    # GCC silently accepts any `-Wno-<unknown>` switch, so the positive form is probed instead.
+    if flag.startswith('-Wno-'):
+        return '-W' + flag.removeprefix('-Wno-')
+    return flag
+
+
+@dataclasses.dataclass
+class FlagProbe:
+    """Checks rendered flags against a compiler and filters out the unsupported ones."""
+    compiler: str | Path = dataclasses.field(default_factory=toolchain.default_compiler)
+    """The compiler to probe, by name or path. Defaults to `$CXX` or `c++`."""
+    on_unsupported: t.Literal['drop', 'error'] = 'drop'
+    """Whether unsupported flags are dropped with a warning, or raise an error at export time."""
+    jobs: int | None = None
+    """Maximum number of parallel probes. Defaults to the number of CPUs."""
+    cache_dir: Path | None = None
+    """Where probe results are stored. Defaults to the `lobs` user cache directory."""
+    _results: dict[str, bool] = dataclasses.field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def cache_file(self) -> Path:
+        compiler = toolchain.resolve_compiler(self.compiler)
+        return (self.cache_dir or user_cache_dir('flags')) / f'{toolchain.compiler_fingerprint(compiler)}.json'
+
+    def supported(self, flags: Iterable[str]) -> dict[str, bool]:
+        """Return whether each of the distinct `flags` is supported, probing only unknown ones."""
+        wanted = list(dict.fromkeys(flags))
+        if missing := [f for f in wanted if f not in self._results]:
+            cache_file = self.cache_file
+            cached: dict[str, bool] = (read_json(cache_file) or {}).get('flags', {})
+            self._results.update({f: cached[f] for f in missing if f in cached})
+            if unknown := [f for f in missing if f not in cached]:
+                probed = self._probe(unknown)
+                self._results.update(probed)
+                # Re-read right before writing, other processes may have probed in the meantime.
+                cached = (read_json(cache_file) or {}).get('flags', {})
+                compiler = toolchain.resolve_compiler(self.compiler)
+                write_json(cache_file, {
+                    'compiler': str(compiler),
+                    'version': toolchain.compiler_version(compiler),
+                    'flags': cached | probed,
+                })
+        return {f: self._results[f] for f in wanted}
+
+    def filter(self, flags: Sequence[str]) -> list[str]:
+        """Return the supported `flags`, dropping or rejecting the others as configured."""
+        results = self.supported(flags)
+        if unsupported := [f for f in flags if not results[f]]:
+            message = f"Flags not supported by compiler '{self.compiler}': {', '.join(unsupported)}"
+            if self.on_unsupported == 'error':
+                raise ValueError(message)
+            warnings.warn(message, stacklevel=2)
+        return [f for f in flags if results[f]]
+
+    def _probe(self, flags: Sequence[str]) -> dict[str, bool]:
+        compiler = toolchain.resolve_compiler(self.compiler)
+
+        def probe_one(flag: str) -> bool:
+            result = subprocess.run(
+                [compiler, '-x', 'c++', '-fsyntax-only', '-Werror', _probe_argument(flag), '-'],
+                input=b'',
+                capture_output=True,
+            )
+            return result.returncode == 0
+
+        with ThreadPoolExecutor(max_workers=self.jobs or os.cpu_count()) as pool:
+            return dict(zip(flags, pool.map(probe_one, flags)))
@@ -0,0 +1,147 @@
+"""Sources produced by code generators (e.g. protobuf, flatbuffers, embedded asset packers).
+
+A `GeneratorStep` is a source provider: it can be listed among the `source_files` of a project, where it
+expands to its outputs. The step only runs when the hash of its command, generator binary and inputs has
+no entry in the cache; the outputs are stored content-addressed in the `lobs` user cache and copied to the
+output directory, leaving the files whose content did not change untouched.
+"""
+from collections.abc import Sequence
+import dataclasses
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+from lobs._machinery.cache import read_json, user_cache_dir, write_if_changed, write_json
+
+
+INPUTS = '{inputs}'
+"""A command argument replaced by the paths of all the inputs."""
+OUT_DIR = '{out_dir}'
+"""Replaced, within any command argument, by the directory the outputs shall be written to."""
+
+
+def _file_digest(path: Path) -> str:
+    with path.open('rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+_executable_digests: dict[Path, tuple[int, int, str]] = {}
+"""The digest of each generator binary, with the modification time and size it was computed at."""
+
+
+def _executable_digest(executable: str) -> str:
+    found = shutil.which(executable)
+    if found is None:
+        raise FileNotFoundError(f"Generator '{executable}' was not found.")
+    path = Path(found).resolve()
+    # A generator rebuilt while `lobs serve` is running is hashed again
+    stat = path.stat()
+    cached = _executable_digests.get(path)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        cached = _executable_digests[path] = (stat.st_mtime_ns, stat.st_size, _file_digest(path))
+    return cached[2]
+
+
+def _relative(argument: str, base: Path) -> str:
+    """`argument`, with the absolute paths under `base` made relative to it."""
+    if argument == str(base):
+        return '.'
+    return argument.replace(f'{base}{os.sep}', f'.{os.sep}')
+
+
+@dataclasses.dataclass(eq=False)
+class GeneratorStep:
+    """A command generating source files from input files.
+
+    For example, `GeneratorStep(['protoc', '--cpp_out={out_dir}', '-I', str(here), INPUTS], [here / 'msg.proto'],
+    ['msg.pb.cc', 'msg.pb.h'], here / 'generated')`.
+    """
+    command: Sequence[str]
+    """The command line. `{out_dir}` is replaced by a scratch directory and the `{inputs}` argument by the inputs."""
+    inputs: Sequence[Path]
+    """The files the outputs are generated from. Changing any of them re-runs the step."""
+    outputs: Sequence[str]
+    """The paths of the generated files, relative to `{out_dir}`."""
+    output_dir: Path
+    """Where the outputs are copied to, and where the exporters reference them from."""
+    cwd: Path | None = None
+    """The working directory of the command. If None, the current one."""
+    cache_dir: Path | None = None
+    """Where the outputs are cached. Defaults to the `lobs` user cache directory."""
+    _provided_key: str | None = dataclasses.field(default=None, init=False, repr=False)
+    _lock: threading.Lock = dataclasses.field(default_factory=threading.Lock, init=False, repr=False)
+
+    @property
+    def cache_root(self) -> Path:
+        return self.cache_dir or user_cache_dir('generated')
+
+    def input_hash(self) -> str:
+        """The cache key of the step: its command, generator binary, inputs (names and contents) and outputs.
+
+        Paths are hashed relative to the working directory of the command, so that checkouts at different
+        locations share the cache.
+        """
+        base = (self.cwd or Path.cwd()).absolute()
+        digest = hashlib.sha256()
+        for part in [
+            *(_relative(x, base) for x in self.command),
+            _executable_digest(self.command[0]),
+            *(f'{_relative(str(x.absolute()), base)}:{_file_digest(x)}' for x in self.inputs),
+            *self.outputs,
+        ]:
+            digest.update(part.encode() + b'\0')
+        return digest.hexdigest()
+
+    def provide(self) -> list[Path]:
+        """Generate the outputs if needed, returning their paths under `output_dir`.
+
+        The inputs are hashed on every call (e.g. of a long-lived `lobs serve`), the rest only when they changed.
+        """
+        provided = [self.output_dir / name for name in self.outputs]
+        key = self.input_hash()
+        with self._lock:
+            if self._provided_key != key:
+                for path, digest in zip(provided, self._cached_outputs(key)):
+                    write_if_changed(path, self._object(digest).read_bytes())
+                self._provided_key = key
+        return provided
+
+    def run(self, out_dir: Path) -> None:
+        """Run the command, writing the outputs to `out_dir`."""
+        inputs = [str(x) for x in self.inputs]
+        command = [y for x in self.command for y in (inputs if x == INPUTS else [x.replace(OUT_DIR, str(out_dir))])]
+        result = subprocess.run(command, cwd=self.cwd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise ValueError(f"Generator '{self.command[0]}' failed ({result.returncode}): {result.stderr.strip()}")
+
+    def _object(self, digest: str) -> Path:
+        return self.cache_root / 'objects' / digest[:2] / digest
+
+    def _cached_outputs(self, key: str) -> list[str]:
+        """The content digests of the outputs for the input hash `key`, running the step on a cache miss."""
+        index = self.cache_root / 'steps' / f'{key}.json'
+        cached = read_json(index)
+        if cached is not None and all(self._object(x).is_file() for x in cached):
+            return cached
+
+        with tempfile.TemporaryDirectory(prefix='lobs-gen-') as scratch:
+            out_dir = Path(scratch)
+            self.run(out_dir)
+            if missing := [x for x in self.outputs if not (out_dir / x).is_file()]:
+                raise ValueError(f"Generator '{self.command[0]}' did not produce: {', '.join(missing)}")
+            digests = []
+            for name in self.outputs:
+                digest = _file_digest(out_dir / name)
+                # Objects are immutable and named after their content: concurrent writers store the same bytes
+                if not (obj := self._object(digest)).is_file():
+                    obj.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = obj.with_name(f'.{digest}.{os.getpid()}.{threading.get_ident()}.tmp')
+                    shutil.copyfile(out_dir / name, tmp)
+                    tmp.replace(obj)
+                digests.append(digest)
+        write_json(index, digests)
+        return digests
@@ -0,0 +1,42 @@
+from collections.abc import Sequence
+import dataclasses
+import typing as t
+
+
+LINK_POOL = 'lobs_link'
+"""The name of the Ninja job pool used for link steps."""
+
+GDB_INDEX_LINKERS = ('mold', 'lld', 'gold')
+"""The linkers able to generate a `.gdb_index` section."""
+
+
+@dataclasses.dataclass
+class LinkConfig:
+    """This class represents the link settings of a C++ executable.
+
+    The defaults keep the toolchain behaviour, see `LinkConfig.fast()` for settings tuned for
+    short incremental rebuilds of large executables. The linker and the link pool size depend on the build
+    machine, so they are decided when the exported project is configured, not when it is exported.
+    """
+    linkers: Sequence[str] = ()
+    """Preferred linkers (e.g. `mold`, `lld`), by order of preference.
+    The first one usable by the compiler at configure time is selected; if none is, the toolchain default is kept."""
+    split_dwarf: bool = False
+    """Whether to keep debug information out of the objects (`-gsplit-dwarf`), reducing link inputs."""
+    gdb_index: bool = False
+    """Whether to have the linker generate a `.gdb_index`. Only applied with a linker that supports it."""
+    link_jobs: int | t.Literal['auto'] | None = None
+    """The maximum number of concurrent link steps. With 'auto', it is sized at configure time from the
+    physical memory and cores of the build machine. None leaves link steps unconstrained."""
+    memory_per_link: int = 4 << 30
+    """The expected peak memory of one link step in bytes, used to size the link pool with 'auto'."""
+
+    def compile_arguments(self) -> list[str]:
+        return ['-gsplit-dwarf'] if self.split_dwarf else []
+
+    @classmethod
+    def fast(cls, **kwargs: t.Any) -> t.Self:
+        return dataclasses.replace(
+            cls(linkers=('mold', 'lld'), split_dwarf=True, gdb_index=True, link_jobs='auto'),
+            **kwargs,
+        )
@@ -0,0 +1,156 @@
+"""Pre-scan of the C++20 module declarations of the sources, validating the module graph at export time.
+
+The scan only looks for `module`/`import` declarations (comments and string literals excluded) and ignores
+the preprocessor, so that it is fast enough to run on every export; the compiler's dependency scanning remains
+authoritative. It catches the errors that would otherwise only show mid-build: unknown or undeclared modules,
+modules provided twice, imports of modules of packages that are not dependencies, and import cycles.
+"""
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import re
+from pathlib import Path
+
+
+MIN_CMAKE_VERSION = "3.28"
+"""The first CMake version supporting `FILE_SET CXX_MODULES`."""
+MIN_CXX_STANDARD = 20
+STANDARD_MODULES = frozenset({'std', 'std.compat'})
+"""Modules provided by the standard library, which are not declared by any package."""
+
+_COMMENTS_AND_STRINGS = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.DOTALL)
+_MODULE_NAME = r'[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*'
+_DECLARATION = re.compile(
+    rf'^[ \t]*(?P<export>export[ \t]+)?(?P<kind>module|import)[ \t]+'
+    rf'(?P<name>{_MODULE_NAME}(?::{_MODULE_NAME})?|:{_MODULE_NAME})[ \t]*(?:\[\[.*?\]\][ \t]*)?;',
+    re.MULTILINE,
+)
+
+
+@dataclasses.dataclass
+class ModuleUnit:
+    """The module declarations of a source file."""
+    path: Path
+    module: str | None = None
+    """The module (or `module:partition`) the unit belongs to, if it is a module unit."""
+    interface: bool = False
+    """Whether the unit is an interface unit (`export module`), rather than an implementation unit."""
+    imports: list[str] = dataclasses.field(default_factory=list)
+    """The imported modules, partitions being qualified with their module name. Header units are ignored."""
+
+    @property
+    def provides(self) -> str | None:
+        """The module (or partition) the unit provides to importers, if it is an interface or a partition."""
+        if self.module is not None and (self.interface or ':' in self.module):
+            return self.module
+        return None
+
+
+def scan(path: Path) -> ModuleUnit:
+    """Scan the module declarations of the source file at `path`."""
+    text = path.read_text(errors='replace')
+    text = _COMMENTS_AND_STRINGS.sub(lambda m: ' ' if m.group().startswith('/') else '""', text)
+    unit = ModuleUnit(path)
+    for match in _DECLARATION.finditer(text):
+        name = match['name']
+        if match['kind'] == 'module':
+            if unit.module is not None:
+                raise ValueError(f"{path}: more than one module declaration.")
+            unit.module, unit.interface = name, bool(match['export'])
+        else:
+            if name.startswith(':'):
+                if unit.module is None:
+                    raise ValueError(f"{path}: imports partition '{name}' outside of a module.")
+                name = unit.module.split(':')[0] + name
+            unit.imports.append(name)
+    if unit.module is not None and not unit.interface and ':' not in unit.module:
+        # Implementation units implicitly import the interface of their module
+        unit.imports.insert(0, unit.module)
+    return unit
+
+
+def scan_all(paths: Iterable[Path], jobs: int | None = None) -> dict[Path, ModuleUnit]:
+    """Scan the distinct `paths` concurrently."""
+    distinct = list(dict.fromkeys(paths))
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return dict(zip(distinct, pool.map(scan, distinct)))
+
+
+@dataclasses.dataclass
+class ModuleTarget:
+    """The module units of a target, as input of the validation."""
+    interfaces: Sequence[ModuleUnit]
+    """The units declared as module interfaces."""
+    sources: Sequence[ModuleUnit]
+    """The other source units."""
+    dependencies: Sequence[str]
+    """The names of the targets whose modules the target may import (directly or not)."""
+
+
+def check_module_graph(targets: Mapping[str, ModuleTarget]) -> dict[str, str]:
+    """Validate the modules of `targets`, returning the target providing each module.
+
+    Raises a ValueError describing every problem found, or the first import cycle.
+    """
+    errors: list[str] = []
+    providers: dict[str, str] = {}
+    units: dict[str, ModuleUnit] = {}
+    for name, target in targets.items():
+        for unit in target.interfaces:
+            if unit.provides is None:
+                errors.append(f"{unit.path}: declared as a module interface of '{name}', but exports no module.")
+            elif unit.provides in providers:
+                errors.append(
+                    f"{unit.path}: module '{unit.provides}' is already provided by '{providers[unit.provides]}'."
+                )
+            else:
+                providers[unit.provides] = name
+                units[unit.provides] = unit
+        for unit in target.sources:
+            if unit.provides is not None:
+                errors.append(
+                    f"{unit.path}: provides module '{unit.provides}', but is not a module interface of '{name}'."
+                )
+
+    for name, target in targets.items():
+        visible = {name, *target.dependencies}
+        for unit in [*target.interfaces, *target.sources]:
+            for imported in unit.imports:
+                if imported in STANDARD_MODULES:
+                    continue
+                if imported not in providers:
+                    errors.append(f"{unit.path}: imports unknown module '{imported}'.")
+                elif providers[imported] not in visible:
+                    errors.append(
+                        f"{unit.path}: imports module '{imported}' of '{providers[imported]}', "
+                        f"which is not a dependency of '{name}'."
+                    )
+    if errors:
+        raise ValueError("Invalid C++ modules:\n" + '\n'.join(errors))
+
+    if cycle := _find_cycle({k: [x for x in v.imports if x in units] for k, v in units.items()}):
+        raise ValueError(f"C++ module import cycle: {' -> '.join(cycle)}")
+    return providers
+
+
+def _find_cycle(edges: Mapping[str, Sequence[str]]) -> list[str] | None:
+    done: set[str] = set()
+    active: list[str] = []
+
+    def visit(node: str) -> list[str] | None:
+        if node in active:
+            return active[active.index(node):] + [node]
+        if node in done:
+            return None
+        active.append(node)
+        for next_node in edges.get(node, []):
+            if (cycle := visit(next_node)) is not None:
+                return cycle
+        active.pop()
+        done.add(node)
+        return None
+
+    for node in edges:
+        if (cycle := visit(node)) is not None:
+            return cycle
+    return None
@@ -0,0 +1,58 @@
+import collections
+from collections.abc import Iterable, Sequence
+import dataclasses
+import enum
+from pathlib import Path
+
+
+class MemoryRegion(enum.Enum):
+    """The memory regions code and data can be placed in, on targets that distinguish them."""
+    IRAM = 'iram'
+    """Internal instruction RAM, for hot code (e.g. ISRs, tight loops). Read-only data goes to DRAM."""
+    DRAM = 'dram'
+    """Internal data RAM, for hot read-only data; code is left in flash."""
+    FLASH = 'flash'
+    """Flash (cached) memory, for cold code and data. This is the default placement."""
+
+
+@dataclasses.dataclass
+class Placement:
+    """This class represents the placement of (part of) an object file in a memory region.
+
+    Exactly one of `source` and `object_name` shall be set. Placements are rendered by exporters whose
+    targets distinguish memory regions (e.g. `esp-idf` linker fragments), and ignored by the others.
+    """
+    region: MemoryRegion
+    """The memory region to place the code or data in."""
+    source: Path | None = None
+    """A source file of the project; its object file is placed."""
+    object_name: str | None = None
+    """The name of an object file, without extension, for objects not built from the project sources."""
+    symbols: Sequence[str] = ()
+    """If not empty, only these functions or variables of the object are placed."""
+
+    def __post_init__(self) -> None:
+        if (self.source is None) == (self.object_name is None):
+            raise ValueError("A placement requires exactly one of 'source' and 'object_name'.")
+
+    @property
+    def object(self) -> str:
+        """The name of the placed object file, without extension.
+
+        Objects are matched by name within the archive of the component, so the object of a source is only
+        identified by its stem: placed sources must not share it with another source (see `ambiguous_sources`).
+        """
+        if self.source is not None:
+            return self.source.stem
+        assert self.object_name is not None
+        return self.object_name
+
+
+def ambiguous_sources(placements: Iterable[Placement], sources: Iterable[Path]) -> list[Path]:
+    """The placed sources whose object cannot be told apart from the object of another of the (distinct) `sources`.
+
+    Archives only keep the file name of their objects (e.g. `a/util.cpp` and `b/util.cpp` are both `util.cpp.obj`),
+    and placements match them without extension (e.g. `util.c` is also matched by `util`).
+    """
+    stems = collections.Counter(x.stem for x in sources)
+    return [x.source for x in placements if x.source is not None and stems[x.source.stem] > 1]
@@ -3,7 +3,11 @@ import typing as t
 
 from lobs.core.language.base import SOURCES
 from lobs.core.project import Project
+from lobs.domains.cpp.build_profile import BuildProfile
 from lobs.domains.cpp.compiler_options import CompilationFlags
+from lobs.domains.cpp.link_options import LinkConfig
+from lobs.domains.cpp.placement import Placement
+from lobs.domains.cpp.testing import Test
 
 
 @dataclasses.dataclass
@@ -19,6 +23,17 @@ class ManagedApplication(Project):
     """The compilation flags to use for compiling the application."""
     executable_name: str | None = None
     """The name of the output executable. If None, defaults to the project name."""
+    module_interfaces: SOURCES = t.cast(SOURCES, dataclasses.field(default_factory=list))
+    """C++20 module interface units (`export module`), including partitions. Module implementation units
+    (`module name;`) are listed in `source_files`."""
+    build_profile: BuildProfile = dataclasses.field(default_factory=BuildProfile)
+    """The code generation settings (optimization, architecture, LTO, PGO) of the application."""
+    link_config: LinkConfig = dataclasses.field(default_factory=LinkConfig)
+    """The link settings (linker selection, split DWARF, link job pool) of the application."""
+    placements: list[Placement] = dataclasses.field(default_factory=list)
+    """Memory region placements of hot or cold code and data of the application."""
+    tests: list[Test] = dataclasses.field(default_factory=list)
+    """Runs of the application registered as tests, by exporters supporting a test driver (e.g. CTest)."""
 
 
 @dataclasses.dataclass
@@ -32,3 +47,10 @@ class Library(Project):
     """The C++ standard version to use for compiling the library."""
     compilation_flags: CompilationFlags = dataclasses.field(default_factory=CompilationFlags)
     """The compilation flags to use for compiling the application."""
+    module_interfaces: SOURCES = t.cast(SOURCES, dataclasses.field(default_factory=list))
+    """C++20 module interface units (`export module`), including partitions. Module implementation units
+    (`module name;`) are listed in `source_files`."""
+    build_profile: BuildProfile = dataclasses.field(default_factory=BuildProfile)
+    """The code generation settings (optimization, architecture, LTO, PGO) of the library."""
+    placements: list[Placement] = dataclasses.field(default_factory=list)
+    """Memory region placements of hot or cold code and data of the library."""
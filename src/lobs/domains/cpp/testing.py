@@ -0,0 +1,65 @@
+from collections.abc import Mapping, Sequence
+import dataclasses
+from pathlib import Path
+
+
+@dataclasses.dataclass
+class ResourceGroup:
+    """A set of resources a test needs from the CTest resource specification file.
+
+    For example, `ResourceGroup({'gpus': 2, 'mem_gb': 4})` asks for 2 slots of one GPU and 4 slots of one
+    memory resource; with `count=2`, for two such sets.
+    """
+    slots: Mapping[str, int]
+    """The number of slots needed, by resource type."""
+    count: int = 1
+    """How many times the group is needed."""
+
+    def render(self) -> str:
+        requirements = ','.join(f'{name}:{slots}' for name, slots in self.slots.items())
+        return requirements if self.count == 1 else f'{self.count},{requirements}'
+
+
+@dataclasses.dataclass
+class Test:
+    """This class represents a run of an application registered as a CTest test.
+
+    The scheduling metadata lets `ctest -j` run tests concurrently: tests sharing a resource lock never run
+    at the same time, resource groups are allocated from the resource specification file, and tests with a
+    higher cost are started first.
+    """
+    name: str
+    """The test name, unique within the exported CMake project."""
+    arguments: Sequence[str] = ()
+    """The command line arguments passed to the application."""
+    labels: Sequence[str] = ()
+    """Labels to select tests with (`ctest -L`)."""
+    timeout: float | None = None
+    """The maximum run time in seconds, after which the test is killed and fails."""
+    resource_locks: Sequence[str] = ()
+    """Names of resources the test needs exclusive access to (e.g. a serial port, a database)."""
+    resource_groups: Sequence[ResourceGroup] = ()
+    """Resources allocated to the test from the CTest resource specification file."""
+    cost: float | None = None
+    """The scheduling cost of the test. If None, it is estimated from the recorded durations of the test."""
+    working_directory: Path | None = None
+    """The directory the test is run from. If None, the build directory of the application."""
+
+    def properties(self, cost: float | None = None) -> dict[str, str]:
+        """The CTest properties of the test, as CMake arguments; `cost` is used if none is set explicitly."""
+        properties: dict[str, str] = {}
+        if self.labels:
+            properties['LABELS'] = _quote(self.labels)
+        if self.timeout is not None:
+            properties['TIMEOUT'] = f'{self.timeout:g}'
+        if self.resource_locks:
+            properties['RESOURCE_LOCK'] = _quote(self.resource_locks)
+        if self.resource_groups:
+            properties['RESOURCE_GROUPS'] = _quote([x.render() for x in self.resource_groups])
+        if (cost := self.cost if self.cost is not None else cost) is not None:
+            properties['COST'] = f'{cost:g}'
+        return properties
+
+
+def _quote(values: Sequence[str]) -> str:
+    return '"' + ';'.join(values) + '"'
@@ -0,0 +1,42 @@
+"""Identification of the C++ compiler selected for a build."""
+import functools
+import hashlib
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+
+def default_compiler() -> str:
+    """The compiler CMake would pick by default: `$CXX`, falling back to `c++`."""
+    return os.environ.get('CXX') or 'c++'
+
+
+def resolve_compiler(compiler: str | Path) -> Path:
+    """Resolve a compiler name or path to the real binary on disk."""
+    found = shutil.which(str(compiler))
+    if found is None:
+        raise FileNotFoundError(f"Compiler '{compiler}' was not found.")
+    return Path(found).resolve()
+
+
+@functools.cache
+def compiler_version(compiler: Path) -> str:
+    """The first line of `<compiler> --version`."""
+    result = subprocess.run([compiler, '--version'], capture_output=True, text=True, check=True)
+    return next(iter(result.stdout.splitlines()), '')
+
+
+@functools.cache
+def compiler_fingerprint(compiler: Path) -> str:
+    """A stable key for the compiler: the hash of its binary and of its reported version.
+
+    The version is included because compiler drivers (e.g. `g++`) are thin wrappers
+    whose binaries may be identical between releases.
+    """
+    digest = hashlib.sha256()
+    with compiler.open('rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(compiler_version(compiler).encode())
+    return digest.hexdigest()
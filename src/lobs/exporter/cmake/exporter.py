@@ -1,76 +1,392 @@
+from collections.abc import Mapping
 import dataclasses
-import re
+import os
 import typing as t
+from pathlib import Path
 
 import lobs.core.project as p
+from lobs.core import graph
+from lobs.core import package as pm
 from lobs.core.exporter import BaseExporter
+from lobs.core.history import History
+from lobs.core.language.base import declared_paths
+from lobs.domains.cpp import modules
 from lobs.domains.cpp import project as cpp
+from lobs.domains.cpp.flag_probe import FlagProbe
+from lobs.domains.cpp.link_options import LINK_POOL
+from lobs.domains.cpp.testing import Test
 
 from lobs.core.configuration import ExporterConfiguration as _BaseConfig
 from . import syntax
 from . writer import CmakeFileWriter
+from .link import write_interprocedural, write_ipo_check, write_link_pool, write_linker_selection
+from .regenerate import include_hook, write_hook
+from .shared_objects import factor_shared_sources
+from .toolchain_seed import SEED_MODULE, ToolchainSeed
 
 
 @dataclasses.dataclass
 class CmakeConfig(_BaseConfig):
     minimum_cmake_version: str = "3.22"
+    flag_probe: FlagProbe | None = None
+    """If set, compilation flags are checked against the compiler and unsupported ones are filtered out."""
+    seed_toolchain: bool = False
+    """Whether to emit `CMakePresets.json` and an initial cache script (`cmake -C`) that reuse the toolchain
+    detection results captured on the first configure with the same compiler and CMake version."""
+    compiler: str | None = None
+    """The C++ compiler set by the presets when seeding the toolchain. If None, `$CXX` or `c++`."""
+    generator: str = "Ninja"
+    """The CMake generator set by the presets."""
+    shared_objects: bool = True
+    """Whether sources compiled identically by several targets of the graph are factored into `OBJECT`
+    libraries, so that they are compiled once and linked into each of them."""
+    build_type: str | None = None
+    """The default `CMAKE_BUILD_TYPE` (e.g. `Release`) of single-configuration generators, if not given."""
+    regenerate: bool = False
+    """Whether the build re-exports the project when the content of a file `lobs` read to export it changed
+    (see `lobs export --if-changed`). The `lobs` command is searched when configuring, first in the active
+    virtual environment, and can be set with the `LOBS_EXECUTABLE` CMake variable."""
+
+
+@dataclasses.dataclass
+class _Target:
+    """A package of the graph, as a CMake target."""
+    package: pm.IPackage
+    sources: list[Path]
+    compile_options: list[str]
+    module_interfaces: list[Path] = dataclasses.field(default_factory=list)
+    include_dirs: list[Path] = dataclasses.field(default_factory=list)
+    uses_modules: bool = False
+    """Whether any unit of the target declares or imports a C++ module, which requires dependency scanning."""
+
+    @property
+    def name(self) -> str:
+        return self.package.meta.name
+
+    @property
+    def project(self) -> cpp.ManagedApplication | cpp.Library:
+        return t.cast(cpp.ManagedApplication | cpp.Library, self.package.project)
+
+    @property
+    def dependencies(self) -> list[str]:
+        """The libraries the target links to."""
+        return [d.meta.name for d in self.package.dependencies if isinstance(d.project, cpp.Library)]
+
+    @property
+    def built_after(self) -> list[str]:
+        """The applications the target depends on, which are built first but not linked."""
+        return [d.meta.name for d in self.package.dependencies if isinstance(d.project, cpp.ManagedApplication)]
+
+    def compile_key(self) -> t.Hashable:
+        """Targets with equal keys compile a given source to the same object."""
+        if self.uses_modules:
+            # Module units depend on the modules visible to their target: never shared
+            return self.name
+        return (
+            self.project.cxx_standard,
+            tuple(self.compile_options),
+            tuple(self.include_dirs),
+            tuple(self.dependencies),
+            self.project.build_profile.interprocedural,
+        )
 
 
 class Exporter(BaseExporter[CmakeConfig], tag="cmake", config_cls=CmakeConfig):
+    """Export the package and its whole dependency graph as the targets of a single CMake project.
+
+    Applications become executables, libraries static libraries (or interface ones, without sources),
+    linked along the dependency edges.
+    """
+    SHARED_TARGET_PREFIX = "lobs_shared_"
+    """The prefix of the names of the `OBJECT` libraries holding shared sources."""
+    SHARDABLE = False
+
     def export(self) -> None:
         meta = self.package.meta
         prj = self.package.project
         match prj:
             case cpp.ManagedApplication():
-                writer = self._export_application(meta, prj, self.config)
+                writer = self._export_application(meta, prj)
             case cpp.Library():
                 writer = self._export_library(meta, prj)
             case _:
                 raise ValueError("The CMake exporter only supports C++ projects.")
 
-        writer.write_to_dir(self.project_folder)
+        writer.write_to_dir(self.output_folder)
+        if self.config.seed_toolchain and isinstance(prj, cpp.ManagedApplication):
+            seed = ToolchainSeed.for_compiler(self.config.compiler)
+            seed.write_to_dir(self.output_folder, meta.name, self.config.generator)
+        if self.config.regenerate:
+            write_hook(self.output_folder, self.package, self.tag, self.variant, self.workspace_folder)
 
-    @classmethod
-    def _export_application(
-        cls,
-        meta: p.ProjectMeta,
-        app: cpp.ManagedApplication,
-        config: CmakeConfig,
-    ) -> CmakeFileWriter:
-        writer = CmakeFileWriter(min_version=config.minimum_cmake_version)
+    def check(self) -> list[str]:
+        prj = self.package.project
+        if not isinstance(prj, (cpp.ManagedApplication, cpp.Library)):
+            return ["The CMake exporter only supports C++ projects."]
+        if declared_paths(prj.module_interfaces) and prj.cxx_standard < modules.MIN_CXX_STANDARD:
+            return [f"C++ modules require C++{modules.MIN_CXX_STANDARD}, but the standard is C++{prj.cxx_standard}."]
+        return []
+
+    def _make_project(self, meta: p.ProjectMeta, cxx_standard: int) -> CmakeFileWriter:
+        min_version = self.config.minimum_cmake_version
+        uses_modules = any(self._module_interfaces(x) for x in self._packages())
+        if uses_modules and _version(min_version) < _version(modules.MIN_CMAKE_VERSION):
+            min_version = modules.MIN_CMAKE_VERSION
+        writer = CmakeFileWriter(min_version=min_version, base_dir=self.output_folder, root=self.workspace_folder)
         opt_args: dict[str, t.Any] = {}
 
+        if self.config.regenerate:
+            include_hook(writer)
+
+        if self.config.seed_toolchain:
+            writer.include(f"${{CMAKE_CURRENT_LIST_DIR}}/{SEED_MODULE}")
+
         if meta.short_description:
             opt_args["DESCRIPTION"] = meta.short_description
 
-        prj = writer.make_project(
+        writer.make_project(
             name=meta.name,
             version=str(meta.version),
             languages=["CXX"],
             **opt_args,
         )
 
+        if self.config.build_type is not None:
+            with writer.block("if", "NOT", "CMAKE_BUILD_TYPE", "AND", "NOT", "CMAKE_CONFIGURATION_TYPES"):
+                writer.set(syntax.Variable("CMAKE_BUILD_TYPE"), self.config.build_type)
+
         with writer.group():
-            writer.set(syntax.Variable("CMAKE_CXX_STANDARD"), app.cxx_standard)
+            writer.set(syntax.Variable("CMAKE_CXX_STANDARD"), cxx_standard)
             writer.set(syntax.Variable("CMAKE_CXX_STANDARD_REQUIRED"), True)
+            if uses_modules:
+                # Only the targets using modules are scanned, see `_target_settings`
+                writer.set(syntax.Variable("CMAKE_CXX_SCAN_FOR_MODULES"), False)
+        return writer
 
-        writer.call("add_executable", prj.name, *(str(x) for x in app.source_files))
+    def _export_application(self, meta: p.ProjectMeta, app: cpp.ManagedApplication) -> CmakeFileWriter:
+        writer = self._make_project(meta, app.cxx_standard)
 
-        enabled_flags = [
-            field.name
-            for field in app.compilation_flags.get_all()
-            if app.compilation_flags[field.name]
-        ]
+        link_pool = write_link_pool(writer, app.link_config)
 
-        if enabled_flags:
-            writer.call(
-                "target_compile_options",
-                prj.name,
-                'PRIVATE',
-                *(re.sub(r'^w_', '-W', x).replace('_', '-') for x in enabled_flags),
-            )
+        self._export_graph(writer, app.cxx_standard)
+
+        if link_options := app.build_profile.link_arguments():
+            writer.call("target_link_options", meta.name, 'PRIVATE', *link_options)
+        write_linker_selection(writer, meta.name, app.link_config)
+
+        if link_pool:
+            writer.call("set_target_properties", meta.name, "PROPERTIES", "JOB_POOL_LINK", LINK_POOL)
 
         return writer
 
     def _export_library(self, meta: p.ProjectMeta, module: cpp.Library) -> CmakeFileWriter:
-        raise NotImplementedError()
+        writer = self._make_project(meta, module.cxx_standard)
+        self._export_graph(writer, module.cxx_standard)
+        return writer
+
+    def _flags(self, prj: cpp.ManagedApplication | cpp.Library) -> list[str]:
+        return self.shared.get(('flags', id(prj)), prj.compilation_flags.to_arguments)
+
+    def compile_options(self, prj: cpp.ManagedApplication | cpp.Library) -> list[str]:
+        """The compiler arguments of the target of `prj`: its supported flags, and those of its build profile and
+        link configuration."""
+        enabled_flags = self._flags(prj)
+        if self.config.flag_probe is not None:
+            enabled_flags = self.config.flag_probe.filter(enabled_flags)
+        options = enabled_flags + prj.build_profile.compile_arguments()
+        if isinstance(prj, cpp.ManagedApplication):
+            options += prj.link_config.compile_arguments()
+        return options
+
+    def _packages(self) -> list[pm.IPackage]:
+        return self.shared.get(('walk', id(self.package)), lambda: graph.walk(self.package))
+
+    def _sources(self, pkg: pm.IPackage) -> list[Path]:
+        return self.shared.get(('sources', id(pkg)), lambda: graph.package_sources(pkg))
+
+    def _module_interfaces(self, pkg: pm.IPackage) -> list[Path]:
+        return self.shared.get(('module_interfaces', id(pkg)), lambda: graph.package_module_interfaces(pkg))
+
+    def _include_dirs(self, pkg: pm.IPackage) -> list[Path]:
+        return self.shared.get(('include_dirs', id(pkg)), lambda: graph.package_include_dirs(pkg))
+
+    def _check_modules(self, targets: Mapping[str, _Target]) -> None:
+        """Scan the module declarations of the graph and validate them, marking the targets using modules.
+
+        Graphs declaring no module interfaces are not scanned.
+        """
+        if not any(x.module_interfaces for x in targets.values()):
+            return
+
+        def check() -> set[str]:
+            units = modules.scan_all(p for x in targets.values() for p in [*x.module_interfaces, *x.sources])
+            modules.check_module_graph({
+                name: modules.ModuleTarget(
+                    [units[x] for x in target.module_interfaces],
+                    [units[x] for x in target.sources],
+                    [x.meta.name for x in graph.walk(target.package)[:-1]],
+                )
+                for name, target in targets.items()
+            })
+            return {
+                name
+                for name, target in targets.items()
+                if any(units[x].module or units[x].imports for x in [*target.module_interfaces, *target.sources])
+            }
+
+        using = self.shared.get(('modules', id(self.package)), check)
+        for name in using:
+            target = targets[name]
+            if target.project.cxx_standard < modules.MIN_CXX_STANDARD:
+                raise ValueError(
+                    f"'{name}' uses C++ modules, which require C++{modules.MIN_CXX_STANDARD}, "
+                    f"but its standard is C++{target.project.cxx_standard}."
+                )
+            target.uses_modules = True
+
+    def _export_graph(self, writer: CmakeFileWriter, cxx_standard: int) -> None:
+        packages = self._packages()
+        if any(not isinstance(x.project, (cpp.ManagedApplication, cpp.Library)) for x in packages):
+            raise ValueError("The CMake exporter only supports C++ projects.")
+        if self.config.flag_probe is not None:
+            # Probe the flags of the whole graph in one batch
+            self.config.flag_probe.supported(
+                f for pkg in packages for f in self._flags(t.cast(cpp.Library, pkg.project))
+            )
+        graph.provide_sources(packages)
+
+        targets = {
+            pkg.meta.name: _Target(
+                pkg,
+                self._sources(pkg),
+                self.compile_options(t.cast(cpp.Library, pkg.project)),
+                self._module_interfaces(pkg),
+                self._include_dirs(pkg),
+            )
+            for pkg in packages
+        }
+        self._check_modules(targets)
+        if self.config.shared_objects:
+            groups, sources = factor_shared_sources({k: (x.compile_key(), x.sources) for k, x in targets.items()})
+        else:
+            groups, sources = [], {k: x.sources for k, x in targets.items()}
+
+        if any(x.project.build_profile.interprocedural for x in targets.values()):
+            write_ipo_check(writer)
+
+        objects: dict[str, list[str]] = {name: [] for name in targets}
+        for i, group in enumerate(groups, 1):
+            name = f"{self.SHARED_TARGET_PREFIX}{i}"
+            writer.call("add_library", name, "OBJECT", *group.sources)
+            self._target_settings(writer, name, targets[group.consumers[0]], cxx_standard, 'PRIVATE')
+            for consumer in group.consumers:
+                objects[consumer].append(name)
+
+        for target in targets.values():
+            self._export_target(writer, target, sources[target.name], objects[target.name], cxx_standard)
+
+        # The tests of every application of the graph, e.g. of an umbrella package of test executables
+        if tested := [x for x in targets.values() if isinstance(x.project, cpp.ManagedApplication) and x.project.tests]:
+            writer.call("enable_testing")
+            for target in tested:
+                costs = History(target.package).estimates('test-times')
+                self._export_tests(writer, target.name, t.cast(cpp.ManagedApplication, target.project).tests, costs)
+
+    def _export_target(
+        self,
+        writer: CmakeFileWriter,
+        target: _Target,
+        sources: list[Path],
+        objects: list[str],
+        cxx_standard: int,
+    ) -> None:
+        if isinstance(target.project, cpp.ManagedApplication):
+            writer.call("add_executable", target.name, *sources)
+            self._target_settings(writer, target.name, target, cxx_standard, 'PRIVATE', objects)
+        elif sources or objects or target.module_interfaces:
+            writer.call("add_library", target.name, "STATIC", *sources)
+            self._target_settings(writer, target.name, target, cxx_standard, 'PUBLIC', objects)
+        else:
+            writer.call("add_library", target.name, "INTERFACE")
+            if target.include_dirs:
+                writer.call("target_include_directories", target.name, "INTERFACE", *target.include_dirs)
+            if target.dependencies:
+                writer.call("target_link_libraries", target.name, "INTERFACE", *target.dependencies)
+        if target.built_after:
+            writer.call("add_dependencies", target.name, *target.built_after)
+
+    def _target_settings(
+        self,
+        writer: CmakeFileWriter,
+        name: str,
+        target: _Target,
+        cxx_standard: int,
+        scope: str,
+        objects: list[str] | None = None,
+    ) -> None:
+        """Emit the compilation settings of `target` for the CMake target `name`.
+
+        `scope` is the visibility of the include directories, dependencies and modules (PUBLIC for libraries).
+        """
+        if target.module_interfaces and name == target.name:
+            # The files of a set must be under its base directories, which default to the folder of the
+            # CMakeLists.txt: not the one of the interfaces of a dependency
+            base_dir = Path(os.path.commonpath([x.parent for x in target.module_interfaces]))
+            writer.call(
+                "target_sources",
+                name,
+                scope,
+                "FILE_SET",
+                "CXX_MODULES",
+                "BASE_DIRS",
+                base_dir,
+                "FILES",
+                *target.module_interfaces,
+            )
+
+        if target.include_dirs:
+            writer.call("target_include_directories", name, scope, *target.include_dirs)
+
+        if target.compile_options:
+            writer.call("target_compile_options", name, 'PRIVATE', *target.compile_options)
+
+        link_args = [scope, *target.dependencies] if target.dependencies else []
+        if objects:
+            link_args += [*([] if link_args and scope == 'PRIVATE' else ['PRIVATE']), *objects]
+        if link_args:
+            writer.call("target_link_libraries", name, *link_args)
+
+        if target.project.cxx_standard != cxx_standard:
+            writer.call("set_target_properties", name, "PROPERTIES", "CXX_STANDARD", target.project.cxx_standard)
+
+        if target.uses_modules and name == target.name:
+            writer.call("set_target_properties", name, "PROPERTIES", "CXX_SCAN_FOR_MODULES", True)
+
+        if target.project.build_profile.interprocedural is not None:
+            write_interprocedural(writer, name, target.project.build_profile.interprocedural)
+
+    @classmethod
+    def _export_tests(
+        cls,
+        writer: CmakeFileWriter,
+        target: str,
+        tests: list[Test],
+        costs: Mapping[str, float],
+    ) -> None:
+        for test in tests:
+            args: list[t.Any] = ["NAME", test.name, "COMMAND", target, *test.arguments]
+            if test.working_directory is not None:
+                args += ["WORKING_DIRECTORY", test.working_directory]
+            writer.call("add_test", *args)
+            if properties := test.properties(costs.get(test.name)):
+                writer.call(
+                    "set_tests_properties",
+                    test.name,
+                    "PROPERTIES",
+                    *(x for item in properties.items() for x in item),
+                )
+
+
+def _version(version: str) -> tuple[int, ...]:
+    # Ignores the `...<max>` part of version ranges
+    return tuple(int(x) for x in version.split('...')[0].split('.') if x.isdigit())
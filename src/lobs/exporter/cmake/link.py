@@ -0,0 +1,73 @@
+"""Rendering of the link settings (see `cpp.LinkConfig`, and `cpp.BuildProfile.interprocedural`) as configure-time
+CMake logic.
+
+The linkers installed, the memory of the build machine and the compiler support of link-time optimization are only
+known when the project is configured, and may differ from those of the machine exporting it, so the generated code
+probes them instead of `lobs`.
+"""
+from lobs.domains.cpp.link_options import GDB_INDEX_LINKERS, LINK_POOL, LinkConfig
+
+from . import syntax
+from .writer import CmakeFileWriter
+
+
+IPO_SUPPORTED = 'LOBS_IPO_SUPPORTED'
+"""The variable set by `write_ipo_check`."""
+
+
+def write_ipo_check(writer: CmakeFileWriter) -> None:
+    """Check whether the C++ compiler supports interprocedural optimization, see `write_interprocedural`."""
+    writer.include("CheckIPOSupported")
+    writer.call("check_ipo_supported", "RESULT", IPO_SUPPORTED, "LANGUAGES", "CXX")
+
+
+def write_interprocedural(writer: CmakeFileWriter, target: str | syntax.Variable, enabled: bool) -> None:
+    """Set the interprocedural optimization of `target`, only enabled if `write_ipo_check` found it supported."""
+    if not enabled:
+        writer.call("set_target_properties", target, "PROPERTIES", "INTERPROCEDURAL_OPTIMIZATION", False)
+        return
+    with writer.block("if", IPO_SUPPORTED):
+        writer.call("set_target_properties", target, "PROPERTIES", "INTERPROCEDURAL_OPTIMIZATION", True)
+
+
+def write_link_pool(writer: CmakeFileWriter, config: LinkConfig) -> bool:
+    """Declare the link job pool of `config`, returning whether one was declared.
+
+    With `link_jobs='auto'`, the pool is sized from the physical memory and cores of the build machine.
+    """
+    if config.link_jobs is None:
+        return False
+    if config.link_jobs != 'auto':
+        writer.call("set_property", "GLOBAL", "APPEND", "PROPERTY", "JOB_POOLS", f"{LINK_POOL}={config.link_jobs}")
+        return True
+    jobs = syntax.Variable("_lobs_link_jobs")
+    with writer.group():
+        writer.call("cmake_host_system_information", "RESULT", "_lobs_memory", "QUERY", "TOTAL_PHYSICAL_MEMORY")
+        writer.call("cmake_host_system_information", "RESULT", "_lobs_cores", "QUERY", "NUMBER_OF_PHYSICAL_CORES")
+        # The memory is queried in MiB
+        writer.call("math", "EXPR", jobs.name, f"${{_lobs_memory}} / {max(1, config.memory_per_link >> 20)}")
+        with writer.block("if", jobs.name, "GREATER", "_lobs_cores"):
+            writer.set(jobs, "${_lobs_cores}")
+        with writer.block("if", jobs.name, "LESS", 1):
+            writer.set(jobs, 1)
+    writer.call("set_property", "GLOBAL", "APPEND", "PROPERTY", "JOB_POOLS", f"{LINK_POOL}={jobs.to_reference()}")
+    return True
+
+
+def write_linker_selection(writer: CmakeFileWriter, target: str, config: LinkConfig) -> None:
+    """Link `target` with the first of the preferred linkers of `config` that the compiler accepts."""
+    if not config.linkers:
+        return
+    linker = syntax.Variable("_lobs_linker")
+    flag = f"-fuse-ld={linker.to_reference()}"
+    supported = f"LOBS_LINKER_{linker.to_reference()}"
+    writer.include("CheckLinkerFlag")
+    with writer.block("foreach", linker.name, "IN", "ITEMS", *config.linkers):
+        with writer.group():
+            writer.call("check_linker_flag", "CXX", flag, supported)
+            with writer.block("if", supported):
+                writer.call("target_link_options", target, "PRIVATE", flag)
+                if config.gdb_index:
+                    with writer.block("if", linker.name, "MATCHES", f"^({'|'.join(GDB_INDEX_LINKERS)})$"):
+                        writer.call("target_link_options", target, "PRIVATE", "-Wl,--gdb-index")
+                writer.call("break")
@@ -0,0 +1,120 @@
+"""Re-export of generated CMake projects from the build, when one of the files `lobs` read changed.
+
+The hook module lists the inputs of the export (see `lobs.core.inputs`) as configure dependencies, so that the
+build re-runs CMake when any of them is touched. Included before `project()`, it then runs
+`lobs export --if-changed`, which only re-exports if the content of an input changed; if the including
+`CMakeLists.txt` was rewritten, it is processed again in place of the stale one.
+"""
+import itertools
+import warnings
+from pathlib import Path
+
+from lobs._machinery.cache import write_if_changed
+from lobs.core import inputs
+from lobs.core import package as pm
+from lobs.core.variants import Variant, VariantMatrix
+
+from .writer import CmakeFileWriter, resolve_path
+
+
+HOOK_MODULE = 'lobs-regenerate.cmake'
+"""The CMake module re-exporting the project, included by the generated `CMakeLists.txt`."""
+
+_MODULE = '''\
+# Generated by lobs, do not edit.
+set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS
+@FILES@
+)
+@GLOBS@
+if(NOT LOBS_REGENERATING)
+    # The lobs found by a previous configuration may have moved (e.g. with its virtual environment)
+    if(LOBS_EXECUTABLE AND NOT EXISTS "${LOBS_EXECUTABLE}")
+        unset(LOBS_EXECUTABLE CACHE)
+    endif()
+    find_program(
+        LOBS_EXECUTABLE lobs
+        HINTS "$ENV{VIRTUAL_ENV}/bin" "$ENV{VIRTUAL_ENV}/Scripts"
+        DOC "The lobs command re-exporting the project."
+    )
+    if(NOT LOBS_EXECUTABLE)
+        message(FATAL_ERROR "lobs was not found to re-export the project, set LOBS_EXECUTABLE to its path.")
+    endif()
+    file(READ "${CMAKE_CURRENT_LIST_DIR}/CMakeLists.txt" _lobs_before)
+    execute_process(
+        COMMAND "${LOBS_EXECUTABLE}" --no-server "@PROJECT@" export @TAG@ --if-changed@VARIANT@
+        WORKING_DIRECTORY "@PROJECT_DIR@"
+        RESULT_VARIABLE _lobs_result
+        ERROR_VARIABLE _lobs_output
+    )
+    if(_lobs_result)
+        message(FATAL_ERROR "lobs failed to re-export the project:\\n${_lobs_output}")
+    endif()
+    file(READ "${CMAKE_CURRENT_LIST_DIR}/CMakeLists.txt" _lobs_after)
+    if(NOT _lobs_before STREQUAL _lobs_after)
+        # Process the re-exported file, the including one returns when LOBS_REGENERATED is set
+        set(LOBS_REGENERATING ON)
+        include("${CMAKE_CURRENT_LIST_DIR}/CMakeLists.txt")
+        unset(LOBS_REGENERATING)
+        set(LOBS_REGENERATED ON)
+    endif()
+endif()
+'''
+
+
+def _glob(root: str, pattern: str) -> str:
+    parts = pattern.split('/')
+    if '**' not in parts:
+        return f'file(GLOB _lobs_matches CONFIGURE_DEPENDS "{root}/{pattern}")'
+    # CMake globs have no `**`: recursive patterns are watched by a recursive glob of their file part, from their
+    # leading folders without wildcards. Its matches are a superset of those of the pattern, and changes to them
+    # run `--if-changed`, which compares the exact ones.
+    folders = list(itertools.takewhile(lambda x: not any(c in x for c in '*?['), parts[:-1]))
+    name = '*' if parts[-1] == '**' else parts[-1]
+    return f'file(GLOB_RECURSE _lobs_matches CONFIGURE_DEPENDS "{"/".join([root, *folders, name])}")'
+
+
+def include_hook(writer: CmakeFileWriter) -> None:
+    """Include the hook module (if written), returning early if it processed a re-exported `CMakeLists.txt`."""
+    with writer.group():
+        writer.call("include", f"${{CMAKE_CURRENT_LIST_DIR}}/{HOOK_MODULE}", "OPTIONAL")
+        with writer.block("if", "LOBS_REGENERATED"):
+            writer.call("return")
+    writer.cnt.append("")
+
+
+def write_hook(
+    outdir: Path,
+    package: pm.IPackage,
+    tag: str,
+    variant: Variant | None = None,
+    root: Path | None = None,
+) -> None:
+    """Record the inputs of the `tag` export of `package` (or of its `variant`), and write the hook module.
+
+    The exports of declared variants are also recorded as the export of the package, listing the variants, since
+    the package is exported as its variants. Like the exported files, the hook refers to the paths under `root`
+    relative to its folder, and searches `lobs` when configuring, so that it does not depend on the checkout.
+    """
+    matrix = VariantMatrix.of(package.meta.exporter_configuration)
+    if variant is not None and (matrix is None or variant not in matrix.variants):
+        warnings.warn(f"Variant '{variant.name}' is not declared by the package, it cannot be regenerated.")
+        return
+    recorded = inputs.ExportInputs.collect(package)
+    recorded.save(inputs.manifest_path(package.package_path, tag, variant.name if variant else None))
+    if variant is not None and matrix is not None:
+        # Written identically by each variant
+        recorded.variants = [x.name for x in matrix.variants]
+        recorded.save(inputs.manifest_path(package.package_path, tag))
+    root = root or package.package_path.parent
+    files = [resolve_path(Path(x), outdir, root) for x, digest in recorded.files.items() if digest is not None]
+    globs = [_glob(resolve_path(Path(x), outdir, root), pattern) for x, pattern, _ in recorded.globs]
+    module = (
+        _MODULE
+        .replace('@FILES@', '\n'.join(f'    "{x}"' for x in files))
+        .replace('@GLOBS@', ''.join(x + '\n' for x in globs))
+        .replace('@PROJECT@', package.package_path.name)
+        .replace('@PROJECT_DIR@', resolve_path(package.package_path.parent, outdir, root))
+        .replace('@TAG@', tag)
+        .replace('@VARIANT@', f' --variant {variant.name}' if variant else '')
+    )
+    write_if_changed(outdir / HOOK_MODULE, module)
@@ -0,0 +1,44 @@
+"""Factoring of the sources shared between targets into object libraries, so that they compile once.
+
+A source can only be shared by targets that compile it the same way: the targets are therefore
+grouped by a compilation key (standard, options, include directories, ...) chosen by the exporter.
+"""
+from collections.abc import Hashable, Mapping, Sequence
+import dataclasses
+from pathlib import Path
+
+
+@dataclasses.dataclass
+class SharedSources:
+    """Sources compiled identically by several targets."""
+    consumers: tuple[str, ...]
+    """The names of the targets using the sources, in declaration order."""
+    sources: list[Path]
+
+
+def factor_shared_sources(
+    targets: Mapping[str, tuple[Hashable, Sequence[Path]]],
+) -> tuple[list[SharedSources], dict[str, list[Path]]]:
+    """Find the sources used by several targets with the same compilation key.
+
+    `targets` maps each target name to its compilation key and sources. Returns the shared groups, one per
+    distinct set of consumers, and the sources left to each target. The result only depends on the
+    declaration order of the targets and of their sources.
+    """
+    users: dict[tuple[Hashable, Path], list[str]] = {}
+    for name, (key, sources) in targets.items():
+        for src in dict.fromkeys(sources):
+            users.setdefault((key, src), []).append(name)
+
+    groups: dict[tuple[str, ...], SharedSources] = {}
+    for (_, src), consumers in users.items():
+        if len(consumers) > 1:
+            group = groups.setdefault(tuple(consumers), SharedSources(tuple(consumers), []))
+            group.sources.append(src)
+
+    shared = {(name, src) for group in groups.values() for name in group.consumers for src in group.sources}
+    remaining = {
+        name: [src for src in dict.fromkeys(sources) if (name, src) not in shared]
+        for name, (_, sources) in targets.items()
+    }
+    return list(groups.values()), remaining
@@ -0,0 +1,113 @@
+"""Reuse of the toolchain detection results of CMake between fresh build directories.
+
+On the first configure with a given compiler (identified by its fingerprint) and CMake version, the
+platform files CMake wrote after identifying the compiler and the results of the `check_*` tests are
+captured in the user cache. Later configures of any build directory with the same toolchain copy them
+in before `project()`, which then skips compiler identification, ABI detection and the checks.
+"""
+import dataclasses
+import json
+import typing as t
+from pathlib import Path
+
+from lobs._machinery.cache import user_cache_dir, write_if_changed
+from lobs.domains.cpp.toolchain import compiler_fingerprint, default_compiler, resolve_compiler
+
+
+SEED_MODULE = 'lobs-toolchain.cmake'
+"""The CMake module seeding (or capturing) the toolchain results, included before `project()`."""
+INITIAL_CACHE = 'lobs-initial-cache.cmake'
+"""The initial cache script, for `cmake -C` when presets are not used."""
+PRESETS = 'CMakePresets.json'
+
+CAPTURED_PREFIXES = ('HAVE_', 'CMAKE_HAVE_', 'COMPILER_SUPPORTS_')
+"""The prefixes of the cache entries of checks results that are captured."""
+
+_MODULE = '''\
+# Generated by lobs, do not edit.
+include_guard(GLOBAL)
+
+if(DEFINED LOBS_TOOLCHAIN_SEED)
+    set(_lobs_seed "${LOBS_TOOLCHAIN_SEED}/${CMAKE_VERSION}")
+    set(_lobs_platform "${CMAKE_BINARY_DIR}/CMakeFiles/${CMAKE_VERSION}")
+    if(EXISTS "${_lobs_seed}/CMakeCXXCompiler.cmake")
+        if(NOT EXISTS "${_lobs_platform}/CMakeCXXCompiler.cmake")
+            file(COPY "${_lobs_seed}/CMakeCXXCompiler.cmake" "${_lobs_seed}/CMakeSystem.cmake"
+                DESTINATION "${_lobs_platform}")
+            # Makes project() load the platform files instead of detecting the toolchain
+            set(CMAKE_PLATFORM_INFO_INITIALIZED 1 CACHE INTERNAL "")
+        endif()
+        include("${_lobs_seed}/cache.cmake")
+    else()
+        function(_lobs_capture_toolchain)
+            string(RANDOM LENGTH 8 suffix)
+            set(staging "${_lobs_seed}.${suffix}.tmp")
+            file(COPY "${_lobs_platform}/CMakeCXXCompiler.cmake" "${_lobs_platform}/CMakeSystem.cmake"
+                DESTINATION "${staging}")
+            set(entries "")
+            get_cmake_property(variables CACHE_VARIABLES)
+            foreach(variable IN LISTS variables)
+                if(variable MATCHES "^(@PREFIXES@)")
+                    get_property(type CACHE "${variable}" PROPERTY TYPE)
+                    string(APPEND entries "set(${variable} \\"${${variable}}\\" CACHE ${type} \\"\\")\\n")
+                endif()
+            endforeach()
+            file(WRITE "${staging}/cache.cmake" "${entries}")
+            # Another configure may have captured the same toolchain concurrently, keep the first one
+            file(RENAME "${staging}" "${_lobs_seed}" RESULT result)
+            if(result)
+                file(REMOVE_RECURSE "${staging}")
+            endif()
+        endfunction()
+        # Deferred to the end of the configure, so that the checks results are captured as well
+        cmake_language(DEFER DIRECTORY "${CMAKE_SOURCE_DIR}" CALL _lobs_capture_toolchain)
+    endif()
+endif()
+'''
+
+
+@dataclasses.dataclass
+class ToolchainSeed:
+    compiler: Path
+    """The resolved path of the C++ compiler."""
+    folder: Path
+    """The folder the toolchain results are captured in, one sub-folder per CMake version."""
+
+    @classmethod
+    def for_compiler(cls, compiler: str | Path | None = None) -> t.Self:
+        """The seed of `compiler` (by default, the one CMake would pick), keyed by its fingerprint."""
+        resolved = resolve_compiler(compiler or default_compiler())
+        return cls(resolved, user_cache_dir('toolchains', compiler_fingerprint(resolved)))
+
+    def cache_variables(self) -> dict[str, dict[str, str]]:
+        return {
+            'CMAKE_CXX_COMPILER': {'type': 'FILEPATH', 'value': str(self.compiler)},
+            'LOBS_TOOLCHAIN_SEED': {'type': 'PATH', 'value': str(self.folder)},
+        }
+
+    def initial_cache(self) -> str:
+        lines = ['# Generated by lobs, do not edit.']
+        for name, entry in self.cache_variables().items():
+            lines.append(f'set({name} "{entry["value"]}" CACHE {entry["type"]} "")')
+        return '\n'.join(lines) + '\n'
+
+    def presets(self, name: str, generator: str) -> dict[str, t.Any]:
+        """A `CMakePresets.json` document with a configure and a build preset named `name`."""
+        return {
+            'version': 3,
+            'cmakeMinimumRequired': {'major': 3, 'minor': 21, 'patch': 0},
+            'configurePresets': [{
+                'name': name,
+                'displayName': f'{name} (lobs)',
+                'generator': generator,
+                'binaryDir': '${sourceDir}/build',
+                'cacheVariables': self.cache_variables(),
+            }],
+            'buildPresets': [{'name': name, 'configurePreset': name}],
+        }
+
+    def write_to_dir(self, outdir: Path, name: str, generator: str) -> None:
+        """Write the seeding module, the initial cache script and the presets to `outdir`."""
+        write_if_changed(outdir / SEED_MODULE, _MODULE.replace('@PREFIXES@', '|'.join(CAPTURED_PREFIXES)))
+        write_if_changed(outdir / INITIAL_CACHE, self.initial_cache())
+        write_if_changed(outdir / PRESETS, json.dumps(self.presets(name, generator), indent=2) + '\n')
@@ -1,29 +1,54 @@
 import contextlib
 from dataclasses import dataclass
+import os
 import typing as t
 from pathlib import Path
 
+from lobs._machinery.cache import write_if_changed
+
 from . import syntax
 
 
+BASE_DIR_REFERENCE = "${CMAKE_CURRENT_LIST_DIR}"
+
+
+def resolve_path(path: Path, base_dir: Path | None, root: Path | None) -> str:
+    """Render `path` relative to the CMake file written to `base_dir`, if it is absolute and under `root`."""
+    if base_dir is None or root is None or not path.is_absolute() or not path.is_relative_to(root):
+        return path.as_posix()
+    relative = Path(os.path.relpath(path, base_dir)).as_posix()
+    return BASE_DIR_REFERENCE if relative == '.' else f"{BASE_DIR_REFERENCE}/{relative}"
+
+
 class CmakeFileWriter:
+    """A builder of `CMakeLists.txt` files whose output only depends on the values given to it.
+
+    Unordered collections (sets) are sorted, and absolute paths under the `root` folder of the project tree
+    are rendered relative to the written file, so that the output is the same between runs and checkouts.
+    """
     INDENT = '    '
     MAX_ARG_LEN = 20
+    BASE_DIR_REFERENCE = BASE_DIR_REFERENCE
 
     def _should_export_single_line(self, args: list[str]) -> bool:
         return len(args) <= 3 and not any(len(x) > self.MAX_ARG_LEN for x in args)
 
-    def __init__(self, min_version: str):
+    def __init__(self, min_version: str, base_dir: Path | None = None, root: Path | None = None):
+        self.base_dir = base_dir
+        """The folder the file is written to, which paths are made relative to. If None, paths are kept as is."""
+        self.root = root or base_dir
+        """The folder of the project tree (e.g. the workspace): only the paths under it are made relative, the
+        others (e.g. toolchains) do not move with the tree. Defaults to `base_dir`."""
         self.cnt: list[str] = []
         self._write_newline = True
         self.call("cmake_minimum_required", VERSION=min_version)
 
     def write_to_dir(self, outdir: Path) -> Path:
+        """Write the file to `outdir`, leaving it untouched if its content is unchanged."""
         outfile = outdir / "CMakeLists.txt"
-        outfile.parent.mkdir(parents=True, exist_ok=True)
         if self.cnt[-1] != '':
             self.cnt.append('')
-        outfile.write_text('\n'.join(self.cnt))
+        write_if_changed(outfile, '\n'.join(self.cnt))
         return outfile
 
     @contextlib.contextmanager
@@ -33,17 +58,32 @@ class CmakeFileWriter:
         yield
         self._write_newline = True
 
+    @contextlib.contextmanager
+    def block(self, command: str, *args: syntax.V_T | syntax.Variable):
+        """Indent the statements written within the context in a `command(args)`/`endcommand()` block."""
+        self.cnt.append(f"{command}(" + ' '.join(self.resolve_value(x) for x in args) + ")")
+        start = len(self.cnt)
+        yield
+        body = self.cnt[start:]
+        while body and body[-1] == '':
+            body.pop()
+        self.cnt[start:] = [self.INDENT + x if x else x for x in body]
+        self.cnt.append(f"end{command}()")
+        if self._write_newline:
+            self.cnt.append("")
+
     def set(self, var: syntax.Variable, value: syntax.V_T | syntax.LV_T | None) -> syntax.Variable:
         if value is None:
             self.cnt.append(f"unset({var.name})")
         elif isinstance(value, (bool, int, str, float, Path)):
             self.cnt.append(f"set({var.name} {self.resolve_value(value)})")
         else:
-            values = list(self.resolve_value(v) for v in value)
+            values = list(self.resolve_value(v) for v in _ordered(value))
             if not values:
-                self.set(var, None)
-            elif self._should_export_single_line(values):
-                self.set(var, ' '.join(values))
+                return self.set(var, None)
+            if self._should_export_single_line(values):
+                # Each item is an argument of its own: joined into one, they would form a single-item list
+                self.cnt.append(f"set({var.name} {' '.join(values)})")
             else:
                 self.cnt.append(f"set({var.name}")
                 self.cnt.extend(f"{self.INDENT}{v}" for v in values)
@@ -52,19 +92,24 @@ class CmakeFileWriter:
             self.cnt.append("")
         return var
 
-    @classmethod
-    def resolve_value(cls, v: syntax.V_T | syntax.LV_T | None | syntax.Variable) -> str:
+    def resolve_value(self, v: syntax.V_T | syntax.LV_T | None | syntax.Variable) -> str:
         if isinstance(v, syntax.Variable):
             return v.to_reference()
         if v is None:
             return ""
         if isinstance(v, bool):
             return "ON" if v else "OFF"
-        if isinstance(v, (int, str, float)):
+        if isinstance(v, str):
+            return _argument(v)
+        if isinstance(v, (int, float)):
             return str(v)
         if isinstance(v, Path):
-            return str(v)
-        return ' '.join(str(x) for x in v)
+            return _argument(self.resolve_path(v))
+        return ' '.join(self.resolve_value(x) for x in _ordered(v))
+
+    def resolve_path(self, path: Path) -> str:
+        """Render `path` relative to the written file if it is absolute and under the `root` folder."""
+        return resolve_path(path, self.base_dir, self.root)
 
     def make_project(
         self,
@@ -77,7 +122,7 @@ class CmakeFileWriter:
         if version is not None:
             opt_args["VERSION"] = version
         if languages is not None:
-            opt_args["LANGUAGES"] = ' '.join(languages)
+            opt_args["LANGUAGES"] = languages
         opt_args.update(kwargs)
         self.call("project", name, **opt_args)
         return syntax.Project(name=name)
@@ -107,9 +152,23 @@ class CmakeFileWriter:
         return _List(_writer=self, _var=syntax.Variable(name=name))
 
     def include(self, filepath: Path | str) -> None:
-        self.call("include", str(filepath))
-        if self._write_newline:
-            self.cnt.append("")
+        self.call("include", filepath)
+
+
+def _argument(value: str) -> str:
+    """Quote a single argument if needed, so that CMake does not split it or end the command early."""
+    if value.startswith('"') and value.endswith('"') and len(value) > 1:
+        return value
+    if value and not any(c.isspace() or c in '()#"\\' for c in value):
+        return value
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _ordered(values: t.Iterable[t.Any]) -> t.Iterable[t.Any]:
+    """Sort unordered collections, whose iteration order may change between runs."""
+    if isinstance(values, (set, frozenset)):
+        return sorted(values, key=str)
+    return values
 
 
 @dataclass
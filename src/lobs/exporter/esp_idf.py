@@ -3,18 +3,25 @@
 Issues to watch out for:
     - https://github.com/espressif/esp-idf/issues/7024
 """
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from pathlib import Path
-import re
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 import lobs.core.project as p
+from lobs._machinery.cache import write_if_changed
+from lobs.core import graph
+from lobs.core import package as pm
 from lobs.core.configuration import ExporterConfiguration as _BaseConfig
 from lobs.core.exporter import BaseExporter
-from lobs.core.language.base import expand_sources
+from lobs.core.language.base import declared_paths, expand_paths, expand_sources
 from lobs.domains.cpp import project as cpp
+from lobs.domains.cpp.flag_probe import FlagProbe
+from lobs.domains.cpp.link_options import LINK_POOL
+from lobs.domains.cpp.placement import MemoryRegion, ambiguous_sources
 
 from .cmake import syntax as syntax
+from .cmake.link import write_interprocedural, write_ipo_check, write_link_pool
+from .cmake.regenerate import include_hook, write_hook
 from .cmake.writer import CmakeFileWriter
 
 
@@ -25,27 +32,106 @@ class EspIdfConfig(_BaseConfig):
     sdk_config_default: Path | None = None
     """Path to a sdkconfig.default file to use as the default configuration for the project.
     If not specified, no default configuration will be used."""
+    flag_probe: FlagProbe | None = None
+    """If set, compilation flags are checked against the compiler and unsupported ones are filtered out.
+    The compiler must be set to the IDF toolchain one (e.g. `xtensa-esp32-elf-g++`)."""
+    size_budgets: Mapping[str, int] | None = None
+    """The allowed growth in bytes of each memory region (`iram`, `dram`, `flash`, `rtc`) over the stored
+    baseline, checked by `lobs report size`. Regions without a budget may not grow."""
+    target: str | None = None
+    """The chip the project is built for (e.g. `esp32s3`), set as `IDF_TARGET`. If None, the one selected
+    with `idf.py set-target` (or the `IDF_TARGET` environment variable) is used."""
+    regenerate: bool = False
+    """Whether the build re-exports the project when the content of a file `lobs` read to export it changed
+    (see `lobs export --if-changed`). The `lobs` command is searched when configuring, first in the active
+    virtual environment, and can be set with the `LOBS_EXECUTABLE` CMake variable."""
 
 
 class Exporter(BaseExporter[EspIdfConfig], tag="esp-idf", config_cls=EspIdfConfig):
     CMAKE_MIN_VERSION = "3.22"
+    LINKER_FRAGMENT = "lobs_placement.lf"
+    """The name of the linker fragment file generated for the component placements."""
+    PLACEMENT_SCHEMES = {
+        MemoryRegion.IRAM: "noflash",
+        MemoryRegion.DRAM: "noflash_data",
+        MemoryRegion.FLASH: "default",
+    }
+    """The linker fragment scheme used for each memory region.
+    See: https://docs.espressif.com/projects/esp-idf/en/stable/esp32/api-guides/linker-script-generation.html"""
 
     def export(self) -> None:
         meta = self.package.meta
         prj = self.package.project
         match prj:
             case cpp.ManagedApplication():
-                # Resolve this package and all its dependencies
+                # Components are written next to their sources, so they do not depend on the variant
+                self.shared.get(('components', id(self.package)), lambda: self._export_components(prj))
                 self._generate_application(meta, prj)
-                for d in self.package.dependencies:
-                    Exporter(d).export()
+                if self.config.regenerate:
+                    write_hook(self.output_folder, self.package, self.tag, self.variant, self.workspace_folder)
             case cpp.Library():
-                writer = self._generate_component(prj, [d.meta.name for d in self.package.dependencies])
-                writer.write_to_dir(self.project_folder)
+                self._export_component(
+                    prj,
+                    self.package.dependency_names,
+                    self.project_folder,
+                )
             case _:
                 raise ValueError(f"The ESP-IDF exporter does not support the selected target {prj}.")
 
-    def _generate_application(self, meta: p.ProjectMeta, app: cpp.ManagedApplication) -> None:
+    def check(self) -> list[str]:
+        prj = self.package.project
+        if not isinstance(prj, (cpp.ManagedApplication, cpp.Library)):
+            return [f"The ESP-IDF exporter does not support the selected target {prj}."]
+        problems: list[str] = []
+        if isinstance(prj, cpp.ManagedApplication):
+            main_dir = self.project_folder / "main"
+            if not main_dir.is_dir():
+                problems.append(f"The expected 'main' directory does not exist at {main_dir}.")
+            elif outside := [
+                str(x) for x in declared_paths(prj.source_files) if not x.absolute().is_relative_to(main_dir)
+            ]:
+                problems.append(f"Source files outside of the 'main' directory at {main_dir}: {', '.join(outside)}")
+            if (sdkconfig_path := self._sdkconfig_path()) is not None and not sdkconfig_path.is_file():
+                problems.append(f"The specified sdkconfig.default file does not exist at {sdkconfig_path}.")
+        if declared_paths(prj.module_interfaces):
+            problems.append("C++ modules are not supported by the ESP-IDF exporter.")
+        files = prj.source_files
+        # The sources of generators and providers are only known once run
+        if isinstance(files, Sequence) and all(isinstance(x, Path) for x in files):
+            sources = {x.absolute() for x in declared_paths(files)}
+            if foreign := [str(x.source) for x in prj.placements if x.source and x.source.absolute() not in sources]:
+                problems.append(f"Placed sources are not sources of the component: {', '.join(foreign)}")
+            if ambiguous := ambiguous_sources(prj.placements, sources):
+                problems.append(f"Placed sources share their object name: {', '.join(str(x) for x in ambiguous)}")
+        return problems
+
+    def _sdkconfig_path(self) -> Path | None:
+        if self.config.sdk_config_default is None:
+            return None
+        sdkconfig_path = Path(self.config.sdk_config_default)
+        if not sdkconfig_path.is_absolute():
+            sdkconfig_path = self.cwd / sdkconfig_path
+        return sdkconfig_path
+
+    def _export_components(self, app: cpp.ManagedApplication) -> None:
+        """Export the `main` component of the application, and the components of its dependencies.
+
+        The components of the dependencies are built by the IDF toolchain of the application, so their flags are
+        filtered with the flag probe of the application rather than their own.
+        """
+        packages = self._packages() if self.recursive else [self.package]
+        if self.package_config.flag_probe is not None:
+            # Probe the flags of the whole component set in one batch
+            self.package_config.flag_probe.supported(
+                f
+                for pkg in packages
+                if isinstance(pkg.project, (cpp.ManagedApplication, cpp.Library))
+                for f in pkg.project.compilation_flags.to_arguments()
+            )
+        # Resolve this package and all its dependencies
+        if self.recursive:
+            graph.provide_sources(packages)
+
         # In case of esp-idf applications, there is an expected project tree structure.
         # Namely, there are no source files in the same directory as the root CMakeLists.txt
         # Instead, all source files are delegated into components, taking special note of the `main` component.
@@ -61,80 +147,163 @@ class Exporter(BaseExporter[EspIdfConfig], tag="esp-idf", config_cls=EspIdfConfi
         if not all(x.is_relative_to(main_dir) for x in sources):
             raise ValueError(f"All source files must be located in the 'main' directory at {main_dir}.")
 
-        main_writer = self._generate_component(
+        self._export_component(
             cpp.Library(
                 source_files=sources,
+                module_interfaces=app.module_interfaces,
                 include_dirs=app.include_dirs,
                 cxx_standard=app.cxx_standard,
                 compilation_flags=app.compilation_flags,
+                build_profile=app.build_profile,
+                placements=app.placements,
             ),
-            [d.meta.name for d in self.package.dependencies] + list(self.config.required_components or []),
+            self.package.dependency_names + list(self.package_config.required_components or []),
+            main_dir,
         )
-        main_writer.write_to_dir(main_dir)
 
-        # Now we generate the root CMakeLists.txt
-        writer = CmakeFileWriter(min_version=self.CMAKE_MIN_VERSION)
+        for pkg in packages:
+            if pkg is self.package:
+                continue
+            if not isinstance(pkg.project, cpp.Library):
+                raise ValueError(f"The ESP-IDF exporter does not support the selected target {pkg.project}.")
+            self._export_component(pkg.project, pkg.dependency_names, pkg.package_path.parent)
+
+    def _packages(self) -> list[pm.IPackage]:
+        return self.shared.get(('walk', id(self.package)), lambda: graph.walk(self.package))
+
+    def _generate_application(self, meta: p.ProjectMeta, app: cpp.ManagedApplication) -> None:
+        """Generate the root CMakeLists.txt, in the output folder of the variant."""
+        writer = CmakeFileWriter(
+            min_version=self.CMAKE_MIN_VERSION, base_dir=self.output_folder, root=self.workspace_folder
+        )
+        if self.config.regenerate:
+            include_hook(writer)
         writer.set(syntax.Variable("CMAKE_CXX_STANDARD"), app.cxx_standard)
 
-        if all_deps_paths := self.package.collect_dependencies_paths():
+        if self.config.target is not None:
+            writer.variable("IDF_TARGET").set(self.config.target)
+
+        all_deps_paths = self.package.collect_dependencies_paths()
+        if all_deps_paths:
             all_deps_paths.discard(self.package.package_path)
             if missing := [str(p) for p in all_deps_paths if not p.exists()]:
                 raise FileNotFoundError(f"The following dependency paths do not exist: {', '.join(missing)}")
-            writer.list("EXTRA_COMPONENT_DIRS").append(*all_deps_paths)
+        if self.output_folder != self.project_folder:
+            # The `main` component is only found implicitly in the project folder
+            all_deps_paths.add(self.project_folder / "main")
+        if all_deps_paths:
+            writer.list("EXTRA_COMPONENT_DIRS").append(*sorted(all_deps_paths))
 
-        if self.config.sdk_config_default is not None:
-            sdkconfig_path = Path(self.config.sdk_config_default)
-            if not sdkconfig_path.is_absolute():
-                sdkconfig_path = Path.cwd() / sdkconfig_path
+        if (sdkconfig_path := self._sdkconfig_path()) is not None:
             if not sdkconfig_path.exists():
                 raise FileNotFoundError(f"The specified sdkconfig.default file does not exist at {sdkconfig_path}.")
-            writer.list("SDKCONFIG_DEFAULTS").append(
-                "${CMAKE_CURRENT_LIST_DIR}/"
-                + str(sdkconfig_path.relative_to(self.project_folder))
-            )
+            writer.list("SDKCONFIG_DEFAULTS").append(sdkconfig_path)
 
         writer.variable("COMPONENTS").set(["main"])
 
+        # The IDF toolchain comes with its own linker, so only the link job pool applies here.
+        if write_link_pool(writer, app.link_config):
+            writer.variable("CMAKE_JOB_POOL_LINK").set(LINK_POOL)
+
         with writer.group():
             writer.include("$ENV{IDF_PATH}/tools/cmake/project.cmake")
             writer.call("project", meta.name)
 
-        writer.write_to_dir(self.project_folder)
+        writer.write_to_dir(self.output_folder)
+
+    def _export_component(self, lib: cpp.Library, dependencies: Sequence[str], component_dir: Path) -> None:
+        if expand_sources(lib.module_interfaces):
+            raise ValueError(f"C++ modules are not supported by the ESP-IDF exporter (component at {component_dir}).")
+        # The IDF names components after their directory
+        fragment = self._generate_linker_fragment(lib, component_dir.name)
+        fragment_file = component_dir / self.LINKER_FRAGMENT
+        if fragment is not None:
+            write_if_changed(fragment_file, fragment)
+        else:
+            fragment_file.unlink(missing_ok=True)
+
+        writer = self._generate_component(
+            lib,
+            dependencies,
+            self.package_config.flag_probe,
+            [self.LINKER_FRAGMENT] if fragment is not None else [],
+            component_dir,
+            self.workspace_folder,
+        )
+        writer.write_to_dir(component_dir)
 
     @classmethod
-    def _generate_component(cls, lib: cpp.Library, dependencies: Sequence[str]) -> CmakeFileWriter:
+    def _generate_linker_fragment(cls, lib: cpp.Library, component: str) -> str | None:
+        if not lib.placements:
+            return None
+        sources = {x.resolve() for x in expand_sources(lib.source_files)}
+        if foreign := [str(x.source) for x in lib.placements if x.source and x.source.resolve() not in sources]:
+            raise ValueError(
+                f"Placed sources do not belong to component '{component}': {', '.join(foreign)}"
+            )
+        if ambiguous := ambiguous_sources(lib.placements, sources):
+            raise ValueError(
+                f"Placed sources share their object name with another source of component '{component}': "
+                f"{', '.join(str(x) for x in ambiguous)}"
+            )
+
+        lines = [f"[mapping:{component}]", f"archive: lib{component}.a", "entries:"]
+        for placement in lib.placements:
+            scheme = cls.PLACEMENT_SCHEMES[placement.region]
+            if placement.symbols:
+                lines.extend(f"    {placement.object}:{x} ({scheme})" for x in placement.symbols)
+            else:
+                lines.append(f"    {placement.object} ({scheme})")
+        return '\n'.join(lines) + '\n'
+
+    @classmethod
+    def _generate_component(
+        cls,
+        lib: cpp.Library,
+        dependencies: Sequence[str],
+        flag_probe: FlagProbe | None = None,
+        linker_fragments: Sequence[str] = (),
+        component_dir: Path | None = None,
+        root: Path | None = None,
+    ) -> CmakeFileWriter:
         all_files = expand_sources(lib.source_files)
-        writer = CmakeFileWriter(min_version=cls.CMAKE_MIN_VERSION)
+        writer = CmakeFileWriter(min_version=cls.CMAKE_MIN_VERSION, base_dir=component_dir, root=root)
 
         # We expect a list of cpp files, but the IDF framework expects a list of directories
         # So we extract the least common directories from the source files
-        src_dirs = writer.set(syntax.Variable("src_dirs"), {str(src.parent) for src in all_files})
-        inc_dirs = writer.set(syntax.Variable("inc_dirs"), (str(x) for x in lib.include_dirs))
+        src_dirs = writer.set(syntax.Variable("src_dirs"), sorted({src.parent for src in all_files}))
+        inc_dirs = writer.set(syntax.Variable("inc_dirs"), expand_paths(lib.include_dirs))
         deps = writer.set(syntax.Variable("deps"), dependencies)
 
-        writer.call(
-            "idf_component_register",
-            SRC_DIRS=src_dirs,
-            INCLUDE_DIRS=inc_dirs,
-            REQUIRES=deps,
-        )
+        register_args: dict[str, syntax.Variable | syntax.LV_T] = {
+            "SRC_DIRS": src_dirs,
+            "INCLUDE_DIRS": inc_dirs,
+            "REQUIRES": deps,
+        }
+        if linker_fragments:
+            register_args["LDFRAGMENTS"] = linker_fragments
+        writer.call("idf_component_register", **register_args)
 
         with writer.group():
             writer.set(syntax.Variable("CMAKE_CXX_STANDARD"), lib.cxx_standard)
             writer.set(syntax.Variable("CMAKE_CXX_STANDARD_REQUIRED"), True)
 
-        enabled_flags = [
-            field.name
-            for field in lib.compilation_flags.get_all()
-            if lib.compilation_flags[field.name]
-        ]
-
-        if enabled_flags:
-            writer.call(
-                "target_compile_options",
-                syntax.Variable("COMPONENT_LIB"),
-                'PRIVATE',
-                *(re.sub(r'^w_', '-W', x).replace('_', '-') for x in enabled_flags),
-            )
+        enabled_flags = lib.compilation_flags.to_arguments()
+        if flag_probe is not None:
+            enabled_flags = flag_probe.filter(enabled_flags)
+
+        # The target architecture is set by the IDF toolchain for the selected IDF_TARGET,
+        # so the profile architecture settings do not apply here.
+        profile = replace(lib.build_profile, arch=None, tune=None)
+        if profile.pgo is not None:
+            raise ValueError("Profile-guided optimization is not supported by the ESP-IDF exporter.")
+
+        if compile_options := enabled_flags + profile.compile_arguments():
+            writer.call("target_compile_options", syntax.Variable("COMPONENT_LIB"), 'PRIVATE', *compile_options)
+
+        if profile.interprocedural:
+            write_ipo_check(writer)
+        if profile.interprocedural is not None:
+            write_interprocedural(writer, syntax.Variable("COMPONENT_LIB"), profile.interprocedural)
 
         return writer
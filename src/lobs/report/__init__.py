@@ -0,0 +1,12 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+# flake8: noqa: F401
+# pyright: reportUnusedImport = false
+from . import build_times, ctest_times, size
+
+__all__ = [
+    "build_times",
+    "ctest_times",
+    "size",
+]
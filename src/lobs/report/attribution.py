@@ -0,0 +1,18 @@
+"""Mapping of the names generated by the exporters back to the packages they come from."""
+from lobs.core import graph
+from lobs.core import package as pm
+
+
+def package_index(root: pm.IPackage) -> dict[str, pm.IPackage]:
+    """Index the packages of the graph of `root` by the target and component names the exporters give them.
+
+    The `cmake` exporter names targets after the package, while the `esp-idf` one names components
+    after their folder, with the application itself being the `main` component. The `OBJECT` libraries of
+    the sources shared between `cmake` targets belong to no package: their objects are attributed by source.
+    """
+    index: dict[str, pm.IPackage] = {}
+    for pkg in graph.walk(root):
+        index.setdefault(pkg.package_path.parent.name, pkg)
+        index[pkg.meta.name] = pkg
+    index.setdefault('main', root)
+    return index
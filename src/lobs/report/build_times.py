@@ -0,0 +1,197 @@
+"""Build timing ingestion from `.ninja_log` and Clang `-ftime-trace` files.
+
+The time of each build step is attributed back to the lobs package (and source file) it was generated from,
+using the target names chosen by the exporters: the package name for the `cmake` exporter,
+and `__idf_<component>` for the `esp-idf` one. The objects of the sources the `cmake` exporter shares
+between targets (`lobs_shared_<n>`) are charged to the first package of the graph listing them.
+"""
+import dataclasses
+import json
+import re
+from pathlib import Path
+
+from lobs.core import graph
+from lobs.core import package as pm
+from lobs.exporter import cmake
+
+from .attribution import package_index
+
+
+NINJA_LOG_HEADER = re.compile(r'^# ninja log v(?P<version>\d+)$')
+OBJECT_OUTPUT = re.compile(r'(?:^|/)CMakeFiles/(?P<target>[^/]+)\.dir/(?P<object>.+)\.(?:o|obj)$')
+LINK_OUTPUT = re.compile(r'^(?:lib)?(?P<target>.+?)(?:\.a|\.so|\.elf|\.exe)?$')
+
+
+@dataclasses.dataclass(frozen=True)
+class Step:
+    """A single build step recorded by Ninja."""
+    output: str
+    """The output path, relative to the build directory."""
+    start: float
+    """Start time in seconds, relative to the beginning of the build."""
+    end: float
+    """End time in seconds, relative to the beginning of the build."""
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def parse_ninja_log(path: Path) -> list[Step]:
+    """Parse a `.ninja_log` file, keeping only the most recent entry of each output."""
+    steps: dict[str, Step] = {}
+    with path.open() as f:
+        header = NINJA_LOG_HEADER.match(f.readline().strip())
+        if header is None or int(header.group('version')) < 5:
+            raise ValueError(f"Unsupported ninja log format in {path}.")
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 4:
+                continue
+            start, end, _, output = fields[:4]
+            steps[output] = Step(output, int(start) / 1000, int(end) / 1000)
+    return list(steps.values())
+
+
+def parse_time_trace(path: Path) -> dict[str, float]:
+    """Read the frontend/backend totals (in seconds) from a Clang `-ftime-trace` file."""
+    events = json.loads(path.read_text()).get('traceEvents', [])
+    totals = {'frontend': 0.0, 'backend': 0.0}
+    for event in events:
+        match event.get('name'):
+            case 'Total Frontend':
+                totals['frontend'] += event.get('dur', 0) / 1e6
+            case 'Total Backend':
+                totals['backend'] += event.get('dur', 0) / 1e6
+            case _:
+                pass
+    return totals
+
+
+@dataclasses.dataclass
+class TranslationUnit:
+    package: str | None
+    """The name of the package the unit belongs to, if it could be attributed."""
+    source: str
+    """The source file, relative to the package folder when known."""
+    seconds: float
+    frontend: float | None = None
+    """Time spent in the compiler frontend, from `-ftime-trace` data."""
+    backend: float | None = None
+    """Time spent in the compiler backend, from `-ftime-trace` data."""
+
+
+@dataclasses.dataclass
+class PackageTimes:
+    name: str
+    compile: float = 0.0
+    """The sum of the compile times of all translation units of the package."""
+    longest: float = 0.0
+    """The compile time of the slowest translation unit of the package."""
+    link: float = 0.0
+    """The time spent linking or archiving the package target."""
+    critical_path: float = 0.0
+    """The estimated time to build the package and its dependencies with unlimited parallelism."""
+
+
+@dataclasses.dataclass
+class BuildTimesReport:
+    units: list[TranslationUnit]
+    """All translation units, slowest first."""
+    packages: list[PackageTimes]
+    """Per-package totals, dependencies before their dependents."""
+    unattributed: float
+    """Time spent in steps that could not be attributed to any package."""
+
+    @property
+    def critical_path(self) -> float:
+        return max((x.critical_path for x in self.packages), default=0.0)
+
+    def to_dict(self) -> dict[str, object]:
+        return dataclasses.asdict(self) | {'critical_path': self.critical_path}
+
+
+def _is_source(src: Path, obj: str) -> bool:
+    return src.as_posix() == obj or src.as_posix().endswith('/' + obj)
+
+
+def _find_source(sources: list[Path], folder: Path, obj: str) -> str:
+    for src in sources:
+        if _is_source(src, obj):
+            return src.relative_to(folder).as_posix() if src.is_relative_to(folder) else str(src)
+    return obj
+
+
+def analyse(root: pm.IPackage, build_dir: Path, time_trace: bool = False) -> BuildTimesReport:
+    """Attribute the steps of the last build in `build_dir` to the packages of `root`."""
+    packages = graph.walk(root)
+    index = package_index(root)
+    sources = {id(pkg): graph.package_sources(pkg) for pkg in packages}
+    totals = {pkg.meta.name: PackageTimes(pkg.meta.name) for pkg in packages}
+    units: list[TranslationUnit] = []
+    unattributed = 0.0
+
+    for step in parse_ninja_log(build_dir / '.ninja_log'):
+        if match := OBJECT_OUTPUT.search(step.output):
+            target, obj = match.group('target'), match.group('object')
+            if target.startswith(cmake.Exporter.SHARED_TARGET_PREFIX):
+                # Compiled once for all the targets using the source, with the settings of the first one
+                pkg = next((x for x in packages if any(_is_source(s, obj) for s in sources[id(x)])), None)
+            else:
+                pkg = index.get(target.removeprefix('__idf_'))
+            unit = TranslationUnit(
+                package=pkg.meta.name if pkg else None,
+                source=_find_source(sources[id(pkg)], pkg.package_path.parent, obj) if pkg else obj,
+                seconds=step.duration,
+            )
+            trace = (build_dir / step.output).with_suffix('.json')
+            if time_trace and trace.is_file():
+                breakdown = parse_time_trace(trace)
+                unit.frontend, unit.backend = breakdown['frontend'], breakdown['backend']
+            units.append(unit)
+            if pkg is None:
+                unattributed += step.duration
+            else:
+                totals[pkg.meta.name].compile += step.duration
+                totals[pkg.meta.name].longest = max(totals[pkg.meta.name].longest, step.duration)
+        elif (match := LINK_OUTPUT.match(Path(step.output).name)) and (pkg := index.get(match.group('target'))):
+            totals[pkg.meta.name].link += step.duration
+        else:
+            unattributed += step.duration
+
+    # With Ninja, the objects of a target only wait on its dependencies for linking.
+    for pkg in packages:
+        t = totals[pkg.meta.name]
+        deps = max((totals[d.meta.name].critical_path for d in pkg.dependencies), default=0.0)
+        t.critical_path = max(t.longest, deps) + t.link
+
+    units.sort(key=lambda x: (-x.seconds, x.package or '', x.source))
+    return BuildTimesReport(units, [totals[pkg.meta.name] for pkg in packages], unattributed)
+
+
+def history_samples(report: BuildTimesReport) -> dict[str, dict[str, float]]:
+    """The report measurements in the form stored in the package `History`."""
+    return {
+        'build-times.sources': {f'{x.package}:{x.source}': x.seconds for x in report.units if x.package},
+        'build-times.packages': {x.name: x.compile + x.link for x in report.packages},
+    }
+
+
+def format_report(report: BuildTimesReport, top: int) -> str:
+    lines = [f"Slowest translation units (top {top}):"]
+    for unit in report.units[:top]:
+        extra = ''
+        if unit.frontend is not None and unit.backend is not None:
+            extra = f"  (frontend {unit.frontend:.2f}s, backend {unit.backend:.2f}s)"
+        lines.append(f"  {unit.seconds:8.2f}s  {unit.package or '?'}  {unit.source}{extra}")
+    lines.append("")
+    lines.append("Per-package totals:")
+    lines.append(f"  {'package':<30} {'compile':>10} {'link':>10} {'critical':>10}")
+    for pkg in report.packages:
+        lines.append(
+            f"  {pkg.name:<30} {pkg.compile:>9.2f}s {pkg.link:>9.2f}s {pkg.critical_path:>9.2f}s"
+        )
+    lines.append("")
+    lines.append(f"Unattributed: {report.unattributed:.2f}s")
+    lines.append(f"Critical path estimate: {report.critical_path:.2f}s")
+    return '\n'.join(lines)
@@ -0,0 +1,70 @@
+"""Test duration ingestion from the CTest cost data of a build directory.
+
+CTest keeps the average duration of each test in `Testing/Temporary/CTestCostData.txt`, and uses it to
+start the longest tests first. That file is lost with the build directory; recording it in the package
+history lets the `cmake` exporter emit the costs as `COST` properties, so fresh build directories
+(e.g. on CI) are scheduled as well.
+"""
+import dataclasses
+from pathlib import Path
+
+
+COST_DATA = Path('Testing') / 'Temporary' / 'CTestCostData.txt'
+"""The location of the cost data file, relative to the build directory."""
+
+
+@dataclasses.dataclass
+class TestTimesReport:
+    durations: dict[str, float]
+    """The average duration in seconds of each test, longest first."""
+    failed: list[str]
+    """The tests that failed on their last run."""
+
+    def to_dict(self) -> dict[str, object]:
+        return dataclasses.asdict(self)
+
+
+def parse_cost_data(path: Path) -> TestTimesReport:
+    """Parse a CTest cost data file.
+
+    Each line holds a test name, its number of runs and its average duration, up to a `---` separator
+    which is followed by the names of the tests that failed on their last run.
+    """
+    durations: dict[str, float] = {}
+    failed: list[str] = []
+    with path.open() as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line == '---':
+                failed = [x.rstrip('\n') for x in f if x.strip()]
+                break
+            fields = line.rsplit(' ', 2)
+            if len(fields) != 3:
+                continue
+            try:
+                durations[fields[0]] = float(fields[2])
+            except ValueError:
+                continue
+    return TestTimesReport(dict(sorted(durations.items(), key=lambda x: (-x[1], x[0]))), failed)
+
+
+def analyse(build_dir: Path) -> TestTimesReport:
+    """Read the test durations recorded by CTest in `build_dir`."""
+    path = build_dir / COST_DATA
+    if not path.is_file():
+        raise FileNotFoundError(f"No CTest cost data in {build_dir}, run the tests with ctest first.")
+    return parse_cost_data(path)
+
+
+def history_samples(report: TestTimesReport) -> dict[str, dict[str, float]]:
+    """The report measurements in the form stored in the package `History`."""
+    return {'test-times': dict(report.durations)}
+
+
+def format_report(report: TestTimesReport, top: int) -> str:
+    lines = [f"Slowest tests (top {top}):"]
+    for name, seconds in list(report.durations.items())[:top]:
+        lines.append(f"  {seconds:8.2f}s  {name}{'  (failed)' if name in report.failed else ''}")
+    lines.append("")
+    lines.append(f"Total: {sum(report.durations.values()):.2f}s in {len(report.durations)} tests")
+    return '\n'.join(lines)
@@ -0,0 +1,136 @@
+"""Firmware size attribution from the linker map file of ESP-IDF builds.
+
+The map file is parsed in a single streaming pass, so that maps of hundreds of MB are handled
+with constant memory. Input sections are attributed to lobs packages through the archive
+(`lib<component>.a`) they come from, and to memory regions through their output section.
+"""
+from collections.abc import Mapping
+import dataclasses
+import re
+import typing as t
+from pathlib import Path
+
+from lobs.core import package as pm
+
+from .attribution import package_index
+
+
+REGIONS = ('iram', 'dram', 'flash', 'rtc')
+"""The memory regions sizes are reported for."""
+OTHER = '(other)'
+"""The name under which sizes that do not belong to any lobs package are reported."""
+
+_REGION_PREFIXES = (('.iram0', 'iram'), ('.dram0', 'dram'), ('.flash', 'flash'), ('.rtc', 'rtc'))
+_MAP_START = 'Linker script and memory map'
+_OUTPUT_SECTION = re.compile(r'^(?P<name>\.\S+)')
+_INPUT_SECTION = re.compile(
+    r'^ (?P<name>\.\S+|COMMON|\*fill\*)'
+    r'(?:\s+0x(?P<address>[0-9a-fA-F]+)\s+0x(?P<size>[0-9a-fA-F]+)(?:\s+(?P<file>.+))?)?$'
+)
+_CONTINUATION = re.compile(r'^\s+0x(?P<address>[0-9a-fA-F]+)\s+0x(?P<size>[0-9a-fA-F]+)\s+(?P<file>.+)$')
+_ARCHIVE_MEMBER = re.compile(r'(?:^|/)lib(?P<archive>[^/()]+)\.a\([^)]+\)$')
+
+
+def region_of(output_section: str) -> str | None:
+    """The memory region an output section is placed in, or None if it does not occupy target memory."""
+    return next((region for prefix, region in _REGION_PREFIXES if output_section.startswith(prefix)), None)
+
+
+def parse_map(path: Path) -> dict[tuple[str | None, str], int]:
+    """Sum the sizes of the input sections of a GNU ld map file, by archive name and memory region.
+
+    Input sections not coming from an archive (and fill) are reported with a None archive.
+    """
+    sizes: dict[tuple[str | None, str], int] = {}
+    region: str | None = None
+    pending = False
+
+    def add(size: str, file: str | None) -> None:
+        if region is None:
+            return
+        member = _ARCHIVE_MEMBER.search(file.strip()) if file else None
+        key = (member.group('archive') if member else None, region)
+        sizes[key] = sizes.get(key, 0) + int(size, 16)
+
+    with path.open(errors='replace') as f:
+        for line in f:
+            if line.startswith(_MAP_START):
+                break
+        for line in f:
+            line = line.rstrip()
+            if pending:
+                pending = False
+                if match := _CONTINUATION.match(line):
+                    add(match.group('size'), match.group('file'))
+                    continue
+            if line.startswith('.'):
+                if match := _OUTPUT_SECTION.match(line):
+                    region = region_of(match.group('name'))
+            elif line.startswith(' .') or line.startswith(' COMMON') or line.startswith(' *fill*'):
+                if (match := _INPUT_SECTION.match(line)) is None:
+                    continue
+                if match.group('size') is None:
+                    # The name was too long, address, size and file follow on the next line
+                    pending = True
+                else:
+                    add(match.group('size'), match.group('file'))
+    return sizes
+
+
+@dataclasses.dataclass
+class SizeReport:
+    packages: dict[str, dict[str, int]]
+    """The size in bytes of each memory region, by package name."""
+
+    @property
+    def totals(self) -> dict[str, int]:
+        return {r: sum(x.get(r, 0) for x in self.packages.values()) for r in REGIONS}
+
+    def to_dict(self) -> dict[str, object]:
+        return {'packages': self.packages, 'totals': self.totals}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, t.Any]) -> t.Self:
+        return cls({name: dict(regions) for name, regions in data.get('packages', {}).items()})
+
+
+def analyse(root: pm.IPackage, map_file: Path) -> SizeReport:
+    """Attribute the section sizes of `map_file` to the packages of `root`."""
+    index = package_index(root)
+    packages: dict[str, dict[str, int]] = {}
+    for (archive, region), size in parse_map(map_file).items():
+        pkg = index.get(archive) if archive is not None else None
+        name = pkg.meta.name if pkg is not None else OTHER
+        regions = packages.setdefault(name, dict.fromkeys(REGIONS, 0))
+        regions[region] += size
+    return SizeReport(dict(sorted(packages.items())))
+
+
+def check_budgets(report: SizeReport, baseline: SizeReport, budgets: Mapping[str, int]) -> list[str]:
+    """Compare the region totals against a baseline, returning the budget violations.
+
+    `budgets` is the allowed growth in bytes of each region; regions without a budget may not grow at all.
+    """
+    violations: list[str] = []
+    previous = baseline.totals
+    for region, size in report.totals.items():
+        growth = size - previous[region]
+        if growth > budgets.get(region, 0):
+            violations.append(
+                f"{region}: grew by {growth} bytes (budget {budgets.get(region, 0)}), {size} bytes in total"
+            )
+    return violations
+
+
+def format_report(report: SizeReport, baseline: SizeReport | None = None) -> str:
+    """Format the report as a table, with the differences to the baseline if given."""
+    lines = [f"  {'package':<30}" + ''.join(f" {r:>10}" + ' ' * 6 for r in REGIONS)]
+    rows = [*report.packages.items(), ('total', report.totals)]
+    before = {**baseline.packages, 'total': baseline.totals} if baseline is not None else {}
+    for name, regions in rows:
+        cells = ''
+        for r in REGIONS:
+            delta = regions.get(r, 0) - before.get(name, {}).get(r, 0) if baseline is not None else 0
+            cells += f" {regions.get(r, 0):>10}" + (f" {delta:+5}" if delta else ' ' * 6)
+        lines.append(f"  {name:<30}{cells}")
+    return '\n'.join(x.rstrip() for x in lines)
@@ -0,0 +1,16 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+# flake8: noqa: F401
+# pyright: reportUnusedImport = false
+from .client import Client, RemoteError
+from .protocol import client_environment, default_socket_path
+from .server import Server
+
+__all__ = [
+    "Client",
+    "RemoteError",
+    "Server",
+    "client_environment",
+    "default_socket_path",
+]
@@ -0,0 +1,58 @@
+"""A blocking client for `lobs serve`, used by the CLI to forward commands to a running server."""
+import itertools
+import json
+import socket
+import typing as t
+from pathlib import Path
+
+from . import protocol
+
+
+class RemoteError(Exception):
+    """An error returned by the server."""
+
+    def __init__(self, code: int, message: str, data: t.Any = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class Client:
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+        self._file = sock.makefile('rb')
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def connect(cls, path: Path | None = None, timeout: float | None = None) -> t.Self | None:
+        """Connect to the server listening on `path`, returning None if there is none."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(path or protocol.default_socket_path()))
+        except OSError:
+            sock.close()
+            return None
+        return cls(sock)
+
+    def call(self, method: str, **params: t.Any) -> t.Any:
+        """Call a server method and return its result, raising `RemoteError` if it failed."""
+        self._sock.sendall(protocol.encode(protocol.request(next(self._ids), method, params)))
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The lobs server closed the connection.")
+        response = json.loads(line)
+        if 'error' in response:
+            err = response['error']
+            raise RemoteError(err['code'], err['message'], err.get('data'))
+        return response['result']
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> t.Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
@@ -0,0 +1,51 @@
+"""The wire protocol between `lobs serve` and its clients: JSON-RPC 2.0, one message per line."""
+import json
+import os
+import tempfile
+import typing as t
+from pathlib import Path
+
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+"""Raised by the method itself; the exception type is reported in the error data."""
+
+ENVIRONMENT = ('CXX', 'PATH', 'LOBS_CACHE_DIR', 'XDG_CACHE_HOME')
+"""The environment variables read to evaluate and export projects (e.g. `$CXX`, the default compiler of a
+`FlagProbe` or of the seeded toolchain), whose values clients send with their requests."""
+
+
+def client_environment() -> dict[str, str]:
+    """The values of the `ENVIRONMENT` variables set in this process."""
+    return {k: os.environ[k] for k in ENVIRONMENT if k in os.environ}
+
+
+def default_socket_path() -> Path:
+    """The socket of the user's server: `$LOBS_SOCKET`, else in `$XDG_RUNTIME_DIR` or the temporary directory."""
+    if override := os.environ.get('LOBS_SOCKET'):
+        return Path(override)
+    if runtime_dir := os.environ.get('XDG_RUNTIME_DIR'):
+        return Path(runtime_dir) / 'lobs.sock'
+    return Path(tempfile.gettempdir()) / f'lobs-{os.getuid()}.sock'
+
+
+def encode(message: dict[str, t.Any]) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+def request(id: int, method: str, params: dict[str, t.Any]) -> dict[str, t.Any]:
+    return {'jsonrpc': '2.0', 'id': id, 'method': method, 'params': params}
+
+
+def result(id: t.Any, value: t.Any) -> dict[str, t.Any]:
+    return {'jsonrpc': '2.0', 'id': id, 'result': value}
+
+
+def error(id: t.Any, code: int, message: str, data: t.Any = None) -> dict[str, t.Any]:
+    err: dict[str, t.Any] = {'code': code, 'message': message}
+    if data is not None:
+        err['data'] = data
+    return {'jsonrpc': '2.0', 'id': id, 'error': err}
@@ -0,0 +1,289 @@
+"""A persistent `lobs` process answering JSON-RPC requests over a Unix socket.
+
+Evaluated packages are kept in memory, and only re-evaluated when one of the package files of their
+graph changed on disk, or when explicitly invalidated. Requests from concurrent clients are served
+by a single asyncio loop; evaluations and exports run in worker threads, one at a time since evaluations
+import user code and exports share the evaluated packages. The working directory of the server is never
+changed: the one of the client is passed to the exporters. The environment variables `lobs` reads (e.g. `$CXX`)
+are the ones of the client while serving its requests, packages evaluated with other values being evaluated again.
+"""
+import asyncio
+from collections.abc import Iterator, Mapping
+import contextlib
+import dataclasses
+import inspect
+import json
+import os
+import types
+import typing as t
+from pathlib import Path
+
+from lobs.core import exporter
+from lobs.core import graph
+from lobs.core import package as pm
+from lobs.core import sharding
+from lobs.domains.cpp import project as cpp
+from lobs.exporter import cmake
+
+from . import protocol
+from .client import Client
+
+
+R = t.TypeVar('R')
+
+
+@dataclasses.dataclass
+class _Entry:
+    package: pm.IPackage
+    environment: dict[str, str]
+    """The values of the `protocol.ENVIRONMENT` variables the package was evaluated with."""
+    mtimes: dict[Path, int] = dataclasses.field(default_factory=dict)
+    """The modification time of the files the package graph was evaluated from, as resolved so far."""
+
+    @classmethod
+    def evaluate(cls, project: Path, environment: dict[str, str]) -> t.Self:
+        """Evaluate the project file only: the references of the graph are resolved by the requests needing them."""
+        entry = cls(pm.Package.from_file(project), environment)
+        entry.record()
+        return entry
+
+    def record(self) -> None:
+        """Record the files of the packages resolved since the last call, which the entry then depends on."""
+        packages = [self.package, *self.package.resolved_packages()]
+        for path in {f for x in packages for f in [x.package_path, *x.evaluated_files]} - self.mtimes.keys():
+            try:
+                self.mtimes[path] = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                self.mtimes[path] = -1
+
+    def is_stale(self) -> bool:
+        try:
+            return any(path.stat().st_mtime_ns != mtime for path, mtime in self.mtimes.items())
+        except FileNotFoundError:
+            return True
+
+
+@contextlib.contextmanager
+def _environment(values: Mapping[str, str]) -> Iterator[None]:
+    """Set the `protocol.ENVIRONMENT` variables to `values`, unsetting the missing ones, until exiting."""
+    def apply(values: Mapping[str, str]) -> None:
+        for name in protocol.ENVIRONMENT:
+            if name in values:
+                os.environ[name] = values[name]
+            else:
+                os.environ.pop(name, None)
+
+    saved = protocol.client_environment()
+    apply(values)
+    try:
+        yield
+    finally:
+        apply(saved)
+
+
+def _conforms(value: t.Any, hint: t.Any) -> bool:
+    """Whether the JSON `value` is valid for the annotation `hint` (JSON arrays standing for tuples)."""
+    origin, args = t.get_origin(hint), t.get_args(hint)
+    if origin in (t.Union, types.UnionType):
+        return any(_conforms(value, x) for x in args)
+    if origin is t.Literal:
+        return value in args
+    if origin is tuple:
+        return isinstance(value, (list, tuple)) and len(value) == len(args) and all(map(_conforms, value, args))
+    if origin is dict:
+        key, item = args
+        return isinstance(value, dict) and all(_conforms(k, key) and _conforms(v, item) for k, v in value.items())
+    if hint is None or hint is type(None):
+        return value is None
+    if hint is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, hint)
+
+
+def _check_params(method: t.Callable[..., t.Any], params: dict[str, t.Any]) -> str | None:
+    """The problem with calling `method` with the named `params`, if any."""
+    try:
+        inspect.signature(method).bind(**params)
+    except TypeError as e:
+        return str(e)
+    hints = t.get_type_hints(method)
+    return next((f"Invalid value for '{k}': {v!r}." for k, v in params.items() if not _conforms(v, hints[k])), None)
+
+
+def _select(root: pm.IPackage, project: str, package: str | None) -> list[pm.IPackage]:
+    """The packages of the graph of `root`, or the one named `package`."""
+    packages = graph.walk(root)
+    if package is None:
+        return packages
+    if selected := [x for x in packages if x.meta.name == package]:
+        return selected
+    raise ValueError(f"No package named '{package}' in the graph of {project}.")
+
+
+class Server:
+    def __init__(self, socket_path: Path | None = None) -> None:
+        self.socket_path = socket_path or protocol.default_socket_path()
+        """The path of the Unix socket the server listens on."""
+        self._entries: dict[Path, _Entry] = {}
+        self._environment = protocol.client_environment()
+        self._lock = asyncio.Lock()
+        self._stopped = asyncio.Event()
+        self._connections: dict[asyncio.Task[None], asyncio.StreamWriter] = {}
+        self._methods: dict[str, t.Callable[..., t.Awaitable[t.Any]]] = {
+            'ping': self.ping,
+            'export': self.export,
+            'sources': self.sources,
+            'flags': self.flags,
+            'dependencies': self.dependencies,
+            'invalidate': self.invalidate,
+            'shutdown': self.shutdown,
+        }
+
+    async def serve_forever(self) -> None:
+        """Listen on the socket until a `shutdown` request is received."""
+        if self.socket_path.exists():
+            if (client := Client.connect(self.socket_path)) is not None:
+                client.close()
+                raise RuntimeError(f"A lobs server is already listening on {self.socket_path}.")
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        try:
+            async with server:
+                await self._stopped.wait()
+                # Closing the connections ends their handlers, which would be cancelled otherwise
+                for writer in self._connections.values():
+                    writer.close()
+                await asyncio.gather(*self._connections, return_exceptions=True)
+        finally:
+            self.socket_path.unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = t.cast(asyncio.Task[None], asyncio.current_task())
+        self._connections[task] = writer
+        try:
+            with contextlib.closing(writer):
+                while line := await reader.readline():
+                    writer.write(protocol.encode(await self._dispatch(line)))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[task]
+
+    async def _dispatch(self, line: bytes) -> dict[str, t.Any]:
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as e:
+            return protocol.error(None, protocol.PARSE_ERROR, str(e))
+        if not isinstance(message, dict) or not isinstance(message.get('method'), str):
+            return protocol.error(None, protocol.INVALID_REQUEST, "Invalid request.")
+
+        id = message.get('id')
+        method = self._methods.get(message['method'])
+        if method is None:
+            return protocol.error(id, protocol.METHOD_NOT_FOUND, f"Unknown method '{message['method']}'.")
+        params = message.get('params') or {}
+        if not isinstance(params, dict):
+            return protocol.error(id, protocol.INVALID_PARAMS, "Only named parameters are supported.")
+        if (problem := _check_params(method, params)) is not None:
+            return protocol.error(id, protocol.INVALID_PARAMS, problem)
+        try:
+            return protocol.result(id, await method(**params))
+        except Exception as e:
+            return protocol.error(id, protocol.INTERNAL_ERROR, str(e), {'type': type(e).__name__})
+
+    async def _entry(self, project: str, environment: dict[str, str]) -> _Entry:
+        """The entry of `project`, evaluated again if stale or evaluated with another environment. The caller shall
+        hold the lock and have set the environment."""
+        path = Path(project).absolute()
+        entry = self._entries.get(path)
+        if entry is None or entry.environment != environment or entry.is_stale():
+            entry = self._entries[path] = await asyncio.to_thread(_Entry.evaluate, path, environment)
+        return entry
+
+    async def _query(self, project: str, env: dict[str, str] | None, query: t.Callable[[pm.IPackage], R]) -> R:
+        """Run `query` on the package of `project` in a worker thread, holding the lock, with the `env` of the client
+        (the one of the server if None)."""
+        environment = self._environment if env is None else {k: v for k, v in env.items() if k in protocol.ENVIRONMENT}
+        async with self._lock:
+            with _environment(environment):
+                entry = await self._entry(project, environment)
+                try:
+                    return await asyncio.to_thread(query, entry.package)
+                finally:
+                    entry.record()
+
+    async def ping(self) -> str:
+        return 'pong'
+
+    async def export(
+        self,
+        project: str,
+        exporter_tag: str,
+        shard: tuple[int, int] | None = None,
+        shard_cost: sharding.CostModel = 'size',
+        cwd: str | None = None,
+        only: str | None = None,
+        env: dict[str, str] | None = None,
+    ) -> list[dict[str, t.Any]]:
+        """Export the project (or the subgraph of its package named `only`), returning the exported packages
+        and their stages."""
+        def run(package: pm.IPackage) -> list[sharding.Assignment]:
+            # Only the references leading to the `only` package are resolved
+            if only is not None:
+                package = graph.find(package, only)
+            return exporter.run_export(
+                package,
+                exporter_tag,
+                (shard[0], shard[1]) if shard else None,
+                shard_cost,
+                Path(cwd) if cwd else None,
+            )
+
+        exported = await self._query(project, env, run)
+        return [{'package': a.package.meta.name, 'stage': a.stage} for a in exported]
+
+    async def sources(
+        self, project: str, package: str | None = None, env: dict[str, str] | None = None
+    ) -> dict[str, list[str]]:
+        """The expanded source files of each package of the graph (or of the named one)."""
+        return await self._query(project, env, lambda root: {
+            x.meta.name: [str(s) for s in graph.package_sources(x)] for x in _select(root, project, package)
+        })
+
+    async def flags(
+        self, project: str, package: str | None = None, env: dict[str, str] | None = None
+    ) -> dict[str, list[str]]:
+        """The compiler arguments the `cmake` exporter gives each C++ package of the graph (or the named one),
+        with the flags not supported by the `FlagProbe` of its configuration filtered out."""
+        def query(root: pm.IPackage) -> dict[str, list[str]]:
+            exporter = cmake.Exporter(root)
+            return {
+                x.meta.name: exporter.compile_options(x.project)
+                for x in _select(root, project, package)
+                if isinstance(x.project, (cpp.ManagedApplication, cpp.Library))
+            }
+
+        return await self._query(project, env, query)
+
+    async def dependencies(
+        self, project: str, package: str | None = None, env: dict[str, str] | None = None
+    ) -> dict[str, list[str]]:
+        """The names of the direct dependencies of each package of the graph (or of the named one)."""
+        return await self._query(project, env, lambda root: {
+            x.meta.name: [d.meta.name for d in x.dependencies] for x in _select(root, project, package)
+        })
+
+    async def invalidate(self, project: str | None = None) -> int:
+        """Forget the evaluated packages of `project` (or of every project), returning how many were dropped."""
+        async with self._lock:
+            if project is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            return int(self._entries.pop(Path(project).absolute(), None) is not None)
+
+    async def shutdown(self) -> None:
+        self._stopped.set()
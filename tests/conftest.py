@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Shared fixtures for the test suite."""
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+import lobs
+
+
+MakePackage = Callable[..., lobs.Package]
+
+
+@pytest.fixture
+def make_package(tmp_path: Path) -> MakePackage:
+    """Create a library package in its own folder under `tmp_path`, with empty (or sized) source files."""
+
+    def factory(
+        name: str,
+        sources: list[str] | dict[str, int] | None = None,
+        dependencies: list[lobs.Package | lobs.PackageRef] | None = None,
+        folder: Path | None = None,
+    ) -> lobs.Package:
+        folder = folder or tmp_path / name
+        folder.mkdir(parents=True, exist_ok=True)
+        sizes = sources if isinstance(sources, dict) else dict.fromkeys(sources or [], 0)
+        files: list[Path] = []
+        for src, size in sizes.items():
+            (folder / src).parent.mkdir(parents=True, exist_ok=True)
+            (folder / src).write_text("x" * size)
+            files.append(folder / src)
+        pkg = lobs.Package(
+            lobs.ProjectMeta(name, lobs.Version(0, 0, 1)),
+            lobs.cpp.Library(source_files=files),
+            dependencies,
+        )
+        pkg.package_path = folder / f"{name}.py"
+        return pkg
+
+    return factory
@@ -0,0 +1,39 @@
+# Generated by lobs, do not edit.
+set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS
+    "${CMAKE_CURRENT_LIST_DIR}/app.py"
+    "${CMAKE_CURRENT_LIST_DIR}/../lib_a/lib_a.py"
+    "${CMAKE_CURRENT_LIST_DIR}/../lib_b/lib_b.py"
+)
+
+if(NOT LOBS_REGENERATING)
+    # The lobs found by a previous configuration may have moved (e.g. with its virtual environment)
+    if(LOBS_EXECUTABLE AND NOT EXISTS "${LOBS_EXECUTABLE}")
+        unset(LOBS_EXECUTABLE CACHE)
+    endif()
+    find_program(
+        LOBS_EXECUTABLE lobs
+        HINTS "$ENV{VIRTUAL_ENV}/bin" "$ENV{VIRTUAL_ENV}/Scripts"
+        DOC "The lobs command re-exporting the project."
+    )
+    if(NOT LOBS_EXECUTABLE)
+        message(FATAL_ERROR "lobs was not found to re-export the project, set LOBS_EXECUTABLE to its path.")
+    endif()
+    file(READ "${CMAKE_CURRENT_LIST_DIR}/CMakeLists.txt" _lobs_before)
+    execute_process(
+        COMMAND "${LOBS_EXECUTABLE}" --no-server "app.py" export esp-idf --if-changed
+        WORKING_DIRECTORY "${CMAKE_CURRENT_LIST_DIR}"
+        RESULT_VARIABLE _lobs_result
+        ERROR_VARIABLE _lobs_output
+    )
+    if(_lobs_result)
+        message(FATAL_ERROR "lobs failed to re-export the project:\n${_lobs_output}")
+    endif()
+    file(READ "${CMAKE_CURRENT_LIST_DIR}/CMakeLists.txt" _lobs_after)
+    if(NOT _lobs_before STREQUAL _lobs_after)
+        # Process the re-exported file, the including one returns when LOBS_REGENERATED is set
+        set(LOBS_REGENERATING ON)
+        include("${CMAKE_CURRENT_LIST_DIR}/CMakeLists.txt")
+        unset(LOBS_REGENERATING)
+        set(LOBS_REGENERATED ON)
+    endif()
+endif()
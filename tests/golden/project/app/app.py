@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import lobs
+from lobs.exporter.cmake import CmakeConfig
+from lobs.exporter.esp_idf import EspIdfConfig
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+from lib_a.lib_a import lib_a  # noqa: E402
+from lib_b.lib_b import lib_b  # noqa: E402
+
+
+_main = Path(__file__).with_name("main")
+
+app = lobs.Package(
+    lobs.ProjectMeta(
+        "app",
+        lobs.Version(1, 2, 3),
+        "An application exercising every exporter feature.",
+        exporter_configuration=[CmakeConfig(regenerate=True), EspIdfConfig(regenerate=True)],
+    ),
+    lobs.cpp.ManagedApplication(
+        [_main / "main.cpp", _main / "more" / "y.cpp", _main / "extra" / "x.cpp"],
+        placements=[lobs.cpp.Placement(lobs.cpp.MemoryRegion.IRAM, source=_main / "extra" / "x.cpp")],
+        tests=[lobs.cpp.Test("smoke", labels=["fast", "unit"], timeout=10)],
+    ),
+    [lib_a, lib_b],
+)
+app.project.compilation_flags.w_all = True
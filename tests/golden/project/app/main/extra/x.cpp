@@ -0,0 +1 @@
+// app/main/extra/x.cpp
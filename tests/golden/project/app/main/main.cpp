@@ -0,0 +1 @@
+// app/main/main.cpp
@@ -0,0 +1 @@
+// app/main/more/y.cpp
@@ -0,0 +1,14 @@
+from pathlib import Path
+
+import lobs
+
+
+_here = Path(__file__).parent
+
+lib_a = lobs.Package(
+    lobs.ProjectMeta("lib_a", lobs.Version(0, 1, 0)),
+    lobs.cpp.Library(
+        include_dirs=[_here / "include"],
+        source_files=[_here / "src" / "sub" / "a2.cpp", _here / "src" / "a1.cpp", _here / "src" / "other" / "a3.cpp"],
+    ),
+)
@@ -0,0 +1 @@
+// lib_a/src/a1.cpp
@@ -0,0 +1 @@
+// lib_a/src/other/a3.cpp
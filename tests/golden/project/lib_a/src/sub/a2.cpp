@@ -0,0 +1 @@
+// lib_a/src/sub/a2.cpp
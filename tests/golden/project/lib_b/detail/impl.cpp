@@ -0,0 +1 @@
+// lib_b/detail/impl.cpp
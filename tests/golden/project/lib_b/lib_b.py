@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import lobs
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+from lib_a.lib_a import lib_a  # noqa: E402
+
+
+_here = Path(__file__).parent
+
+lib_b = lobs.Package(
+    lobs.ProjectMeta("lib_b", lobs.Version(0, 1, 0)),
+    lobs.cpp.Library(
+        include_dirs=[_here / "detail", _here],
+        source_files=[_here / "src" / "b.cpp", _here / "detail" / "impl.cpp"],
+    ),
+    [lib_a],
+)
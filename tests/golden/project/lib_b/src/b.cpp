@@ -0,0 +1 @@
+// lib_b/src/b.cpp
@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the C++ build profiles."""
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.domains.cpp import BuildProfile, ProfileGuidedOptimization
+from lobs.exporter import cmake, esp_idf
+
+
+class TestBuildProfileRendering:
+    """Test BuildProfile argument rendering."""
+
+    def test_empty_profile(self):
+        """Test that a default profile renders nothing."""
+        assert BuildProfile().compile_arguments() == []
+        assert BuildProfile().link_arguments() == []
+
+    def test_compile_arguments(self):
+        """Test the rendering of every compile setting."""
+        profile = BuildProfile(optimization=3, debug_info=True, arch='x86-64-v3', tune='native')
+        assert profile.compile_arguments() == ['-O3', '-g', '-march=x86-64-v3', '-mtune=native']
+
+    def test_pgo_instrument(self):
+        """Test that instrumentation applies to both compiling and linking."""
+        profile = BuildProfile(pgo=ProfileGuidedOptimization('instrument', Path('/tmp/prof')))
+        assert profile.compile_arguments() == ['-fprofile-generate=/tmp/prof']
+        assert profile.link_arguments() == ['-fprofile-generate=/tmp/prof']
+
+    def test_pgo_use(self):
+        """Test the use phase of the profile-guided optimization."""
+        profile = BuildProfile(pgo=ProfileGuidedOptimization('use', Path('/tmp/prof')))
+        assert profile.compile_arguments() == ['-fprofile-use=/tmp/prof']
+
+    def test_presets(self):
+        """Test the predefined profiles and their overrides."""
+        assert BuildProfile.release() == BuildProfile(optimization=2, interprocedural=True)
+        assert BuildProfile.release(arch='native').arch == 'native'
+        assert BuildProfile.debug().compile_arguments() == ['-Og', '-g']
+        assert BuildProfile.min_size().optimization == 's'
+
+
+class TestBuildProfileExport:
+    """Test that the exporters render the build profile."""
+
+    def _app(self, folder: Path, profile: BuildProfile) -> lobs.Package:
+        (folder / "main").mkdir(parents=True)
+        (folder / "main" / "main.cpp").write_text("")
+        pkg = lobs.Package(
+            lobs.ProjectMeta("app", lobs.Version(0, 0, 1)),
+            lobs.cpp.ManagedApplication([folder / "main" / "main.cpp"], build_profile=profile),
+        )
+        pkg.package_path = folder / "app.py"
+        return pkg
+
+    def test_cmake(self, tmp_path: Path):
+        """Test the cmake exporter output."""
+        profile = BuildProfile.release(pgo=ProfileGuidedOptimization('use', Path('/tmp/prof')))
+        cmake.Exporter(self._app(tmp_path, profile)).export()
+        content = (tmp_path / "CMakeLists.txt").read_text()
+        assert "    -O2\n    -fprofile-use=/tmp/prof\n" in content
+        assert "target_link_options(\n    app\n    PRIVATE\n    -fprofile-use=/tmp/prof\n)" in content
+        assert "include(CheckIPOSupported)\n" in content
+        assert "check_ipo_supported(\n    RESULT\n    LOBS_IPO_SUPPORTED\n    LANGUAGES\n    CXX\n)\n" in content
+        assert "if(LOBS_IPO_SUPPORTED)\n    set_target_properties(\n" in content
+        assert "INTERPROCEDURAL_OPTIMIZATION\n        ON\n" in content
+
+    def test_cmake_disabled(self, tmp_path: Path):
+        """Test that disabling interprocedural optimization does not require checking its support."""
+        cmake.Exporter(self._app(tmp_path, BuildProfile.release(interprocedural=False))).export()
+        content = (tmp_path / "CMakeLists.txt").read_text()
+        assert "CheckIPOSupported" not in content
+        assert "INTERPROCEDURAL_OPTIMIZATION\n    OFF\n" in content
+
+    def test_esp_idf(self, tmp_path: Path):
+        """Test that the esp-idf exporter skips the architecture settings."""
+        esp_idf.Exporter(self._app(tmp_path, BuildProfile.release(arch='native'))).export()
+        content = (tmp_path / "main" / "CMakeLists.txt").read_text()
+        assert "target_compile_options(${COMPONENT_LIB} PRIVATE -O2)" in content
+        assert "-march" not in content
+        assert "check_ipo_supported(" in content
+        assert "if(LOBS_IPO_SUPPORTED)\n    set_target_properties(\n        ${COMPONENT_LIB}\n" in content
+
+    def test_esp_idf_rejects_pgo(self, tmp_path: Path):
+        """Test that the esp-idf exporter rejects profile-guided optimization."""
+        profile = BuildProfile(pgo=ProfileGuidedOptimization('instrument', tmp_path))
+        with pytest.raises(ValueError, match="Profile-guided"):
+            esp_idf.Exporter(self._app(tmp_path, profile)).export()
@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the build timing ingestion."""
+import json
+import typing as t
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.core import graph
+from lobs.core.history import History
+from lobs.report import build_times
+
+from .conftest import MakePackage
+
+
+def _ninja_log(build_dir: Path, entries: list[tuple[int, int, str]]) -> None:
+    build_dir.mkdir(parents=True, exist_ok=True)
+    lines = ["# ninja log v5"] + [f"{s}\t{e}\t0\t{out}\tdeadbeef" for s, e, out in entries]
+    (build_dir / ".ninja_log").write_text("\n".join(lines) + "\n")
+
+
+class TestNinjaLog:
+    """Test parse_ninja_log()."""
+
+    def test_parse(self, tmp_path: Path):
+        """Test parsing steps and converting to seconds."""
+        _ninja_log(tmp_path, [(0, 1500, "a.o"), (1500, 2000, "app")])
+        steps = build_times.parse_ninja_log(tmp_path / ".ninja_log")
+        assert [(s.output, s.duration) for s in steps] == [("a.o", 1.5), ("app", 0.5)]
+
+    def test_latest_entry_wins(self, tmp_path: Path):
+        """Test that a rebuilt output only keeps its latest timing."""
+        _ninja_log(tmp_path, [(0, 1000, "a.o"), (0, 3000, "a.o")])
+        steps = build_times.parse_ninja_log(tmp_path / ".ninja_log")
+        assert [s.duration for s in steps] == [3.0]
+
+    def test_unsupported_version(self, tmp_path: Path):
+        """Test that old log formats are rejected."""
+        (tmp_path / ".ninja_log").write_text("# ninja log v4\n")
+        with pytest.raises(ValueError, match="Unsupported"):
+            build_times.parse_ninja_log(tmp_path / ".ninja_log")
+
+
+class TestAnalyse:
+    """Test attribution of build steps to packages."""
+
+    @pytest.fixture
+    def root(self, make_package: MakePackage):
+        util = make_package("util", ["util.cpp"])
+        return make_package("app", ["src/main.cpp", "src/other.cpp"], [util])
+
+    def test_cmake_targets(self, root: lobs.Package, tmp_path: Path):
+        """Test attribution of cmake exporter target names."""
+        build = tmp_path / "build"
+        _ninja_log(build, [
+            (0, 4000, "CMakeFiles/app.dir/src/main.cpp.o"),
+            (0, 1000, "CMakeFiles/app.dir/src/other.cpp.o"),
+            (0, 2000, "CMakeFiles/util.dir/util.cpp.o"),
+            (2000, 2500, "libutil.a"),
+            (4000, 5000, "app"),
+            (0, 100, "build.ninja"),
+        ])
+        report = build_times.analyse(root, build)
+
+        assert [(u.package, u.source, u.seconds) for u in report.units] == [
+            ("app", "src/main.cpp", 4.0),
+            ("util", "util.cpp", 2.0),
+            ("app", "src/other.cpp", 1.0),
+        ]
+        totals = {p.name: p for p in report.packages}
+        assert totals["app"].compile == 5.0
+        assert totals["app"].link == 1.0
+        assert totals["util"].link == 0.5
+        assert report.unattributed == pytest.approx(0.1)
+
+    def test_critical_path(self, root: lobs.Package, tmp_path: Path):
+        """Test that dependencies only delay the link step of their dependents."""
+        build = tmp_path / "build"
+        _ninja_log(build, [
+            (0, 1000, "CMakeFiles/app.dir/src/main.cpp.o"),
+            (0, 3000, "CMakeFiles/util.dir/util.cpp.o"),
+            (3000, 3500, "libutil.a"),
+            (3500, 4000, "app"),
+        ])
+        report = build_times.analyse(root, build)
+        assert {p.name: p.critical_path for p in report.packages} == {"util": 3.5, "app": 4.0}
+        assert report.critical_path == 4.0
+
+    def test_esp_idf_targets(self, root: lobs.Package, tmp_path: Path):
+        """Test attribution of esp-idf component target names."""
+        build = tmp_path / "build"
+        _ninja_log(build, [
+            (0, 1000, "esp-idf/main/CMakeFiles/__idf_main.dir/src/main.cpp.obj"),
+            (0, 2000, "esp-idf/util/CMakeFiles/__idf_util.dir/util.cpp.obj"),
+            (2000, 2100, "esp-idf/util/libutil.a"),
+        ])
+        report = build_times.analyse(root, build)
+        assert [(u.package, u.source) for u in report.units] == [("util", "util.cpp"), ("app", "src/main.cpp")]
+        assert {p.name: p.link for p in report.packages}["util"] == pytest.approx(0.1)
+
+    def test_shared_targets(self, tmp_path: Path, make_package: MakePackage):
+        """Test that the objects of shared sources are charged to the first package listing them."""
+        common = tmp_path / "common.cpp"
+        common.write_text("")
+        a, b = make_package("a", ["a.cpp"]), make_package("b", ["b.cpp"])
+        for pkg in (a, b):
+            t.cast(lobs.cpp.Library, pkg.project).source_files = [*graph.package_sources(pkg), common]
+        build = tmp_path / "build"
+        _ninja_log(build, [
+            (0, 1000, f"CMakeFiles/lobs_shared_1.dir/{common.as_posix().lstrip('/')}.o"),
+            (0, 500, "CMakeFiles/lobs_shared_2.dir/elsewhere.cpp.o"),
+        ])
+        report = build_times.analyse(make_package("workspace", [], [a, b]), build)
+        assert [(u.package, u.source) for u in report.units] == [("a", str(common)), (None, "elsewhere.cpp")]
+        assert {p.name: p.compile for p in report.packages} == {"a": 1.0, "b": 0.0, "workspace": 0.0}
+        assert report.unattributed == 0.5
+
+    def test_time_trace(self, root: lobs.Package, tmp_path: Path):
+        """Test that -ftime-trace files next to objects are read."""
+        build = tmp_path / "build"
+        _ninja_log(build, [(0, 1000, "CMakeFiles/app.dir/src/main.cpp.o")])
+        trace = build / "CMakeFiles/app.dir/src/main.cpp.json"
+        trace.parent.mkdir(parents=True)
+        trace.write_text(json.dumps({"traceEvents": [
+            {"name": "Total Frontend", "dur": 700000},
+            {"name": "Total Backend", "dur": 200000},
+            {"name": "Source", "dur": 500000},
+        ]}))
+        unit = build_times.analyse(root, build, time_trace=True).units[0]
+        assert (unit.frontend, unit.backend) == (0.7, 0.2)
+
+
+class TestHistory:
+    """Test the measurement History."""
+
+    def test_record_and_estimate(self, tmp_path: Path, make_package: MakePackage):
+        """Test that estimates are the median of the recorded samples."""
+        history = History(make_package("app", folder=tmp_path))
+        for value in (1.0, 5.0, 2.0):
+            history.record("kind", {"a": value})
+        assert history.estimates("kind") == {"a": 2.0}
+        assert History(make_package("app", folder=tmp_path)).estimates("missing") == {}
+
+    def test_samples_are_bounded(self, tmp_path: Path, make_package: MakePackage):
+        """Test that only the most recent samples are kept."""
+        history = History(make_package("app", folder=tmp_path))
+        for value in range(History.MAX_SAMPLES + 5):
+            history.record("kind", {"a": float(value)})
+        data = json.loads((tmp_path / ".lobs" / "kind.json").read_text())
+        assert data["samples"]["a"] == [float(x) for x in range(5, History.MAX_SAMPLES + 5)]
@@ -0,0 +1,142 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the structural checks of a package graph and the `check` command."""
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import lobs
+from lobs.__main__ import main
+from lobs.core import checks
+from lobs.exporter.esp_idf import EspIdfConfig
+
+from .conftest import MakePackage
+
+
+GOLDEN_PROJECT = Path(__file__).parent / "golden" / "project"
+
+
+def _messages(problems: list[checks.Problem]) -> list[tuple[str, str, str]]:
+    return [(x.package, x.check, x.message) for x in problems]
+
+
+class TestRunChecks:
+    """Test run_checks()."""
+
+    def test_valid_graph(self, make_package: MakePackage):
+        """Test that a valid graph has no problems."""
+        lib = make_package("lib", ["lib.cpp"])
+        assert checks.run_checks(make_package("app", ["main.cpp"], [lib])) == []
+
+    def test_files(self, tmp_path: Path, make_package: MakePackage):
+        """Test that missing files, and files of the wrong kind, are all reported."""
+        lib = make_package("lib", ["lib.cpp"])
+        assert isinstance(lib.project, lobs.cpp.Library)
+        lib.project.source_files = [tmp_path / "lib" / "lib.cpp", tmp_path / "lib" / "gone.cpp", tmp_path / "lib"]
+        lib.project.include_dirs = [tmp_path / "lib" / "lib.cpp", tmp_path / "nowhere" / "include"]
+        assert _messages(checks.run_checks(lib)) == [
+            ("lib", "files", f"source_files: {tmp_path / 'lib' / 'gone.cpp'} does not exist."),
+            ("lib", "files", f"source_files: {tmp_path / 'lib'} is not a file."),
+            ("lib", "files", f"include_dirs: {tmp_path / 'lib' / 'lib.cpp'} is not a folder."),
+            ("lib", "files", f"include_dirs: {tmp_path / 'nowhere' / 'include'} does not exist."),
+        ]
+
+    def test_directories_are_listed_once(self, monkeypatch: pytest.MonkeyPatch, make_package: MakePackage):
+        """Test that file existence is checked with one listing per directory, not per file."""
+        listed: list[Path] = []
+        scandir = os.scandir
+
+        def tracked(path: Path):
+            listed.append(path)
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", tracked)
+        lib = make_package("lib", ["a.cpp", "b.cpp", "c.cpp"])
+        checks.run_checks(make_package("app", ["main.cpp", "other.cpp"], [lib]))
+        assert sorted(listed) == sorted([lib.package_path.parent, lib.package_path.parents[1] / "app"])
+
+    def test_graph_problems(self, tmp_path: Path, make_package: MakePackage):
+        """Test that cycles and duplicated names are reported, without stopping the other checks."""
+        a = make_package("a", ["a.cpp"])
+        b = make_package("b", ["b.cpp"], [a])
+        a.dependencies = [b]
+        other = make_package("a", ["a.cpp"], folder=tmp_path / "other")
+        root = make_package("root", [], [a, other])
+        assert isinstance(b.project, lobs.cpp.Library)
+        b.project.compilation_flags.w_shadow = True  # type: ignore[attr-defined]
+        assert _messages(checks.run_checks(root)) == [
+            ("a", "cycles", "Dependency cycle detected: a -> b -> a"),
+            ("b", "flags", "Unknown compilation flag 'w_shadow', add it with `compilation_flags['w_shadow'] = True`."),
+            ("a", "names", f"Package name used by several packages: {a.package_path}, {other.package_path}"),
+        ]
+
+    def test_unresolved_reference(self, make_package: MakePackage):
+        """Test that dependencies whose project file is missing are reported."""
+        app = make_package("app", ["main.cpp"], [lobs.PackageRef("../missing.py")])
+        [problem] = checks.run_checks(app)
+        assert (problem.package, problem.check) == ("app", "dependencies")
+        assert "missing.py does not exist" in problem.message
+
+    def test_broken_references(self, tmp_path: Path, make_package: MakePackage):
+        """Test that each broken reference is reported, whatever its error, without hiding the other dependencies."""
+        (tmp_path / "syntax.py").write_text("lobs.Package(\n")
+        (tmp_path / "raises.py").write_text("raise RuntimeError('cannot evaluate')\n")
+        lib = make_package("lib", ["lib.cpp"])
+        assert isinstance(lib.project, lobs.cpp.Library)
+        lib.project.source_files = [tmp_path / "lib" / "lib.cpp", tmp_path / "lib" / "gone.cpp"]
+        references = [lobs.PackageRef("../syntax.py"), lobs.PackageRef("../raises.py")]
+        app = make_package("app", ["main.cpp"], [*references, lib])
+        problems = checks.run_checks(app)
+        assert [(x.package, x.check) for x in problems] == [
+            ("app", "dependencies"),
+            ("app", "dependencies"),
+            ("lib", "files"),
+        ]
+        assert problems[0].message.startswith("Cannot resolve ../syntax.py: SyntaxError: ")
+        assert problems[1].message == "Cannot resolve ../raises.py: RuntimeError: cannot evaluate"
+
+    def test_esp_idf(self, tmp_path: Path, make_package: MakePackage):
+        """Test that the rules of the ESP-IDF project layout are all checked."""
+        app = make_package("app", ["main.cpp"])
+        app.project = lobs.cpp.ManagedApplication(
+            [tmp_path / "app" / "main.cpp"],
+            placements=[lobs.cpp.Placement(lobs.cpp.MemoryRegion.IRAM, source=tmp_path / "app" / "other.cpp")],
+        )
+        app.meta.exporter_configuration = [EspIdfConfig(sdk_config_default=tmp_path / "sdkconfig.defaults")]
+        assert checks.configured_exporters(app) == ["esp-idf"]
+        problems = checks.run_checks(app, [checks.exporter_check("esp-idf")])
+        assert [x.message for x in problems] == [
+            f"The expected 'main' directory does not exist at {tmp_path / 'app' / 'main'}.",
+            f"The specified sdkconfig.default file does not exist at {tmp_path / 'sdkconfig.defaults'}.",
+            f"Placed sources are not sources of the component: {tmp_path / 'app' / 'other.cpp'}",
+            f"placements: {tmp_path / 'app' / 'other.cpp'} does not exist.",
+        ]
+
+
+class TestCheckCommand:
+    """Test the `check` command."""
+
+    def test_valid(self, tmp_path: Path):
+        """Test that a valid project passes the checks of every exporter."""
+        shutil.copytree(GOLDEN_PROJECT, tmp_path / "golden")
+        project = tmp_path / "golden" / "app" / "app.py"
+        result = CliRunner().invoke(
+            main, ["--no-server", str(project), "check", "--exporter", "cmake", "--exporter", "esp-idf"]
+        )
+        assert result.exit_code == 0, result.output
+        assert "No problems found." in result.output
+
+    def test_json(self, tmp_path: Path):
+        """Test that problems are output as JSON, and fail the command."""
+        shutil.copytree(GOLDEN_PROJECT, tmp_path / "golden")
+        (tmp_path / "golden" / "lib_a" / "src" / "a1.cpp").unlink()
+        project = tmp_path / "golden" / "app" / "app.py"
+        result = CliRunner().invoke(main, ["--no-server", str(project), "check", "--json"])
+        assert result.exit_code == 1
+        problems = json.loads(result.stdout)
+        assert [(x["package"], x["check"]) for x in problems] == [("lib_a", "files")]
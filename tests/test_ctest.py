@@ -0,0 +1,109 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the CTest registration of applications and the recorded test durations."""
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.core.history import History
+from lobs.exporter import cmake
+from lobs.report import ctest_times
+
+
+COST_DATA = """\
+unit 3 0.25
+integration tests 2 12.5
+broken line
+---
+integration tests
+"""
+
+
+class TestTestProperties:
+    """Test the rendering of the CTest properties."""
+
+    def test_no_properties(self):
+        """Test that a plain test has no properties."""
+        assert lobs.cpp.Test("unit").properties() == {}
+
+    def test_all_properties(self):
+        """Test the rendering of every property, lists being quoted."""
+        test = lobs.cpp.Test(
+            "hw",
+            labels=["slow", "hw"],
+            timeout=90,
+            resource_locks=["uart"],
+            resource_groups=[lobs.cpp.ResourceGroup({"gpus": 2}, count=2), lobs.cpp.ResourceGroup({"mem": 4})],
+        )
+        assert test.properties(1.5) == {
+            "LABELS": '"slow;hw"',
+            "TIMEOUT": "90",
+            "RESOURCE_LOCK": '"uart"',
+            "RESOURCE_GROUPS": '"2,gpus:2;mem:4"',
+            "COST": "1.5",
+        }
+
+    def test_explicit_cost(self):
+        """Test that an explicit cost takes precedence over the estimated one."""
+        assert lobs.cpp.Test("unit", cost=3).properties(1.5) == {"COST": "3"}
+
+
+class TestCostData:
+    """Test the ingestion of the CTest cost data."""
+
+    def test_parse(self, tmp_path: Path):
+        """Test that names may contain spaces, and that tests are sorted longest first."""
+        (tmp_path / "CTestCostData.txt").write_text(COST_DATA)
+        report = ctest_times.parse_cost_data(tmp_path / "CTestCostData.txt")
+        assert report.durations == {"integration tests": 12.5, "unit": 0.25}
+        assert list(report.durations) == ["integration tests", "unit"]
+        assert report.failed == ["integration tests"]
+
+    def test_missing(self, tmp_path: Path):
+        """Test that a build directory where no test was run is reported."""
+        with pytest.raises(FileNotFoundError, match="run the tests with ctest"):
+            ctest_times.analyse(tmp_path)
+
+
+class TestCmakeExport:
+    """Test the CTest registrations rendered by the cmake exporter."""
+
+    def _app(self, folder: Path, tests: list[lobs.cpp.Test], name: str = "app") -> lobs.Package:
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / "main.cpp").write_text("")
+        pkg = lobs.Package(
+            lobs.ProjectMeta(name, lobs.Version(0, 0, 1)),
+            lobs.cpp.ManagedApplication([folder / "main.cpp"], tests=tests),
+        )
+        pkg.package_path = folder / f"{name}.py"
+        return pkg
+
+    def test_no_tests(self, tmp_path: Path):
+        """Test that testing is not enabled without tests."""
+        cmake.Exporter(self._app(tmp_path, [])).export()
+        assert "enable_testing" not in (tmp_path / "CMakeLists.txt").read_text()
+
+    def test_registration(self, tmp_path: Path):
+        """Test the test registration, with the costs recorded in the history."""
+        app = self._app(tmp_path, [lobs.cpp.Test("unit", arguments=["--fast"]), lobs.cpp.Test("other")])
+        History(app).record("test-times", {"unit": 2.0})
+        cmake.Exporter(app).export()
+        content = (tmp_path / "CMakeLists.txt").read_text()
+        assert "enable_testing()\n" in content
+        assert "add_test(\n    NAME\n    unit\n    COMMAND\n    app\n    --fast\n)" in content
+        assert "set_tests_properties(\n    unit\n    PROPERTIES\n    COST\n    2\n)" in content
+        assert "set_tests_properties(other" not in content
+
+    def test_graph_applications(self, tmp_path: Path):
+        """Test that the tests of every application of the graph are registered, testing being enabled once."""
+        first = self._app(tmp_path / "first", [lobs.cpp.Test("first_unit")], "first")
+        second = self._app(tmp_path / "second", [lobs.cpp.Test("second_unit")], "second")
+        umbrella = lobs.Package(lobs.ProjectMeta("all", lobs.Version(0, 0, 1)), lobs.cpp.Library(), [first, second])
+        umbrella.package_path = tmp_path / "all.py"
+        cmake.Exporter(umbrella).export()
+        content = (tmp_path / "CMakeLists.txt").read_text()
+        assert content.count("enable_testing()\n") == 1
+        assert "add_test(\n    NAME\n    first_unit\n    COMMAND\n    first\n)" in content
+        assert "add_test(\n    NAME\n    second_unit\n    COMMAND\n    second\n)" in content
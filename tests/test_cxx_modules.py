@@ -0,0 +1,188 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the C++20 module pre-scan, the module graph validation and their CMake export."""
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.domains.cpp import modules
+from lobs.exporter import cmake
+from lobs.exporter import esp_idf
+
+from .conftest import MakePackage
+
+
+def _write(path: Path, text: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def _with_modules(pkg: lobs.Package, interfaces: dict[str, str], sources: dict[str, str] | None = None) -> None:
+    folder = pkg.package_path.parent
+    prj = pkg.project
+    assert isinstance(prj, lobs.cpp.Library)
+    prj.module_interfaces = [_write(folder / k, v) for k, v in interfaces.items()]
+    prj.source_files = [_write(folder / k, v) for k, v in (sources or {}).items()]
+
+
+class TestScan:
+    """Test the scan of the module declarations of a source file."""
+
+    def test_interface(self, tmp_path: Path):
+        """Test that interface units, their partitions and imports are recognized, not commented ones."""
+        unit = modules.scan(_write(tmp_path / "a.cppm", (
+            '// import commented;\n'
+            'module;\n'
+            '#include <vector>\n'
+            'export module app.core;\n'
+            'export import :detail;\n'
+            'import std;\n'
+            '/* import\n'
+            '   also_commented; */\n'
+            'const char* s = "import quoted;";\n'
+        )))
+        assert unit.provides == "app.core"
+        assert unit.interface
+        assert unit.imports == ["app.core:detail", "std"]
+
+    def test_implementation(self, tmp_path: Path):
+        """Test that implementation units import their module, and provide nothing."""
+        unit = modules.scan(_write(tmp_path / "a.cpp", "module app;\nimport other;\n"))
+        assert unit.module == "app"
+        assert unit.provides is None
+        assert unit.imports == ["app", "other"]
+
+    def test_internal_partition(self, tmp_path: Path):
+        """Test that partitions provide themselves, even if not exported."""
+        unit = modules.scan(_write(tmp_path / "a.cpp", "module app:impl;\n"))
+        assert unit.provides == "app:impl"
+        assert unit.imports == []
+
+    def test_plain_source(self, tmp_path: Path):
+        """Test that sources without declarations are not module units."""
+        unit = modules.scan(_write(tmp_path / "a.cpp", "#include <cstdio>\nint main() { return 0; }\n"))
+        assert unit == modules.ModuleUnit(tmp_path / "a.cpp")
+
+    def test_several_declarations(self, tmp_path: Path):
+        """Test that more than one module declaration is rejected."""
+        with pytest.raises(ValueError, match="more than one module declaration"):
+            modules.scan(_write(tmp_path / "a.cppm", "export module a;\nexport module b;\n"))
+
+
+class TestProjectFields:
+    """Test that the module interfaces do not change the fields of the projects given positionally."""
+
+    def test_positional_fields(self):
+        """Test that positional arguments bind to the fields they did before module interfaces were added."""
+        sources, includes = [Path("main.cpp")], [Path("include")]
+        app = lobs.cpp.ManagedApplication(sources, includes, 20, lobs.cpp.CompilationFlags(), "app")
+        assert (app.include_dirs, app.cxx_standard, app.executable_name) == (includes, 20, "app")
+        lib = lobs.cpp.Library(includes, sources, 20)
+        assert (lib.include_dirs, lib.source_files, lib.cxx_standard) == (includes, sources, 20)
+        assert app.module_interfaces == lib.module_interfaces == []
+
+
+class TestCheckModuleGraph:
+    """Test check_module_graph()."""
+
+    @staticmethod
+    def _unit(name: str, module: str | None = None, interface: bool = True, imports: list[str] | None = None):
+        return modules.ModuleUnit(Path(name), module, interface, imports or [])
+
+    def test_valid(self):
+        """Test that the target providing each module is returned."""
+        targets = {
+            "lib": modules.ModuleTarget([self._unit("lib.cppm", "lib")], [], []),
+            "app": modules.ModuleTarget([], [self._unit("main.cpp", imports=["lib", "std"])], ["lib"]),
+        }
+        assert modules.check_module_graph(targets) == {"lib": "lib"}
+
+    def test_errors_are_reported_together(self):
+        """Test that every problem of the graph is reported at once."""
+        targets = {
+            "a": modules.ModuleTarget(
+                [self._unit("a.cppm", "a"), self._unit("empty.cppm")],
+                [self._unit("hidden.cpp", "hidden"), self._unit("main.cpp", interface=False, imports=["b", "nope"])],
+                [],
+            ),
+            "b": modules.ModuleTarget([self._unit("b.cppm", "b"), self._unit("dup.cppm", "a")], [], []),
+        }
+        with pytest.raises(ValueError) as error:
+            modules.check_module_graph(targets)
+        assert str(error.value).splitlines() == [
+            "Invalid C++ modules:",
+            "empty.cppm: declared as a module interface of 'a', but exports no module.",
+            "hidden.cpp: provides module 'hidden', but is not a module interface of 'a'.",
+            "dup.cppm: module 'a' is already provided by 'a'.",
+            "main.cpp: imports module 'b' of 'b', which is not a dependency of 'a'.",
+            "main.cpp: imports unknown module 'nope'.",
+        ]
+
+    def test_cycle(self):
+        """Test that import cycles between modules are detected."""
+        targets = {
+            "lib": modules.ModuleTarget(
+                [self._unit("a.cppm", "a", imports=["b"]), self._unit("b.cppm", "b", imports=["a"])], [], []
+            ),
+        }
+        with pytest.raises(ValueError, match=r"C\+\+ module import cycle: a -> b -> a"):
+            modules.check_module_graph(targets)
+
+
+class TestCmakeExport:
+    """Test the export of module targets by the cmake exporter."""
+
+    def test_file_sets(self, make_package: MakePackage):
+        """Test that interfaces are exported as file sets, and that only module targets are scanned."""
+        lib = make_package("lib", [])
+        _with_modules(lib, {"lib.cppm": "export module lib;\n"}, {"lib.cpp": "module lib;\n"})
+        other = make_package("other", ["other.cpp"])
+        app = make_package("app", [], [lib, other])
+        _with_modules(app, {}, {"main.cpp": "import lib;\n"})
+        cmake.Exporter(app).export()
+        content = (app.package_path.parent / "CMakeLists.txt").read_text()
+        assert content.startswith("cmake_minimum_required(VERSION 3.28)\n")
+        assert "set(CMAKE_CXX_SCAN_FOR_MODULES OFF)\n" in content
+        assert (
+            "target_sources(\n    lib\n    PUBLIC\n    FILE_SET\n    CXX_MODULES\n"
+            "    BASE_DIRS\n    ${CMAKE_CURRENT_LIST_DIR}/../lib\n"
+            "    FILES\n    ${CMAKE_CURRENT_LIST_DIR}/../lib/lib.cppm\n)\n"
+        ) in content
+        for target in ("lib", "app"):
+            assert f"set_target_properties(\n    {target}\n    PROPERTIES\n    CXX_SCAN_FOR_MODULES\n" in content
+        assert "set_target_properties(other" not in content
+
+    def test_without_modules(self, make_package: MakePackage):
+        """Test that graphs without module interfaces are not scanned, nor exported differently."""
+        lib = make_package("lib", [])
+        _with_modules(lib, {}, {"lib.cpp": "export module lib;\n"})
+        cmake.Exporter(lib).export()
+        content = (lib.package_path.parent / "CMakeLists.txt").read_text()
+        assert content.startswith("cmake_minimum_required(VERSION 3.22)\n")
+        assert "MODULES" not in content
+
+    def test_invalid_graph(self, make_package: MakePackage):
+        """Test that module errors are raised at export time."""
+        lib = make_package("lib", [])
+        _with_modules(lib, {"lib.cppm": "export module lib;\nimport missing;\n"})
+        with pytest.raises(ValueError, match="imports unknown module 'missing'"):
+            cmake.Exporter(lib).export()
+
+    def test_standard_too_old(self, make_package: MakePackage):
+        """Test that targets using modules must be compiled as C++20 or later."""
+        lib = make_package("lib", [])
+        _with_modules(lib, {"lib.cppm": "export module lib;\n"})
+        assert isinstance(lib.project, lobs.cpp.Library)
+        lib.project.cxx_standard = 17
+        with pytest.raises(ValueError, match="require C\\+\\+20"):
+            cmake.Exporter(lib).export()
+
+    def test_esp_idf_rejects_modules(self, make_package: MakePackage):
+        """Test that the ESP-IDF exporter refuses module interfaces."""
+        lib = make_package("lib", [])
+        _with_modules(lib, {"lib.cppm": "export module lib;\n"})
+        with pytest.raises(ValueError, match="not supported by the ESP-IDF exporter"):
+            esp_idf.Exporter(lib).export()
@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Golden output tests: exports shall be byte-for-byte identical between runs and checkouts.
+
+The project under `golden/project` is copied to several checkout paths and exported in subprocesses with
+different hash seeds. Set `LOBS_UPDATE_GOLDEN=1` to regenerate the expected files under `golden/<exporter>`.
+"""
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.exporter.cmake.syntax import Variable
+from lobs.exporter.cmake.writer import CmakeFileWriter
+
+
+GOLDEN = Path(__file__).parent / "golden"
+PROJECT = GOLDEN / "project"
+HASH_SEEDS = ("0", "1", "4242")
+CHECKOUTS = ("checkout", "some/deeper/other-checkout")
+
+
+def _files(folder: Path) -> dict[str, bytes]:
+    return {
+        x.relative_to(folder).as_posix(): x.read_bytes()
+        for x in sorted(folder.rglob("*"))
+        # The recorded inputs (`.lobs`) are local state, not exported files
+        if x.is_file() and "__pycache__" not in x.parts and ".lobs" not in x.parts
+    }
+
+
+def _export(checkout: Path, exporter_tag: str, hash_seed: str) -> dict[str, bytes]:
+    """Export the golden project from `checkout`, returning the generated files."""
+    shutil.copytree(PROJECT, checkout)
+    sources = _files(checkout)
+    env = {
+        **os.environ,
+        "PYTHONHASHSEED": hash_seed,
+        "PYTHONPATH": str(Path(lobs.__file__).parents[1]),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    subprocess.run(
+        [sys.executable, "-m", "lobs", "--no-server", "app/app.py", "export", exporter_tag],
+        cwd=checkout,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    return {k: v for k, v in _files(checkout).items() if k not in sources}
+
+
+@pytest.mark.parametrize("exporter_tag", ["cmake", "esp-idf"])
+def test_golden_output(tmp_path: Path, exporter_tag: str):
+    """Test that the output is the same for every hash seed and checkout path, and matches the golden files."""
+    outputs = {
+        (seed, checkout): _export(tmp_path / f"seed-{seed}" / checkout, exporter_tag, seed)
+        for seed in HASH_SEEDS
+        for checkout in CHECKOUTS
+    }
+    reference = next(iter(outputs.values()))
+    assert reference
+    for key, output in outputs.items():
+        assert output == reference, f"Output differs for hash seed {key[0]} and checkout {key[1]}"
+
+    expected_dir = GOLDEN / exporter_tag
+    if os.environ.get("LOBS_UPDATE_GOLDEN"):
+        shutil.rmtree(expected_dir, ignore_errors=True)
+        for name, content in reference.items():
+            (expected_dir / name).parent.mkdir(parents=True, exist_ok=True)
+            (expected_dir / name).write_bytes(content)
+    assert reference == _files(expected_dir)
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path: Path):
+    """Test that exporting again leaves the generated files untouched, so builds do not reconfigure."""
+    checkout = tmp_path / "checkout"
+    _export(checkout, "cmake", "0")
+    cmake_lists = checkout / "app" / "CMakeLists.txt"
+    os.utime(cmake_lists, ns=(0, 0))
+    subprocess.run(
+        [sys.executable, "-m", "lobs", "--no-server", "app/app.py", "export", "cmake"],
+        cwd=checkout,
+        env={**os.environ, "PYTHONPATH": str(Path(lobs.__file__).parents[1])},
+        check=True,
+        capture_output=True,
+    )
+    assert cmake_lists.stat().st_mtime_ns == 0
+
+
+def test_short_lists_keep_their_items(tmp_path: Path):
+    """Test that lists written on a single line are not joined into a single item."""
+    writer = CmakeFileWriter(min_version="3.22")
+    writer.set(Variable("deps"), ["lib_a", "lib b"])
+    writer.call("list", "LENGTH", "deps", "count")
+    writer.call("message", "${count}")
+    assert "set(deps lib_a \"lib b\")" in writer.cnt
+    if shutil.which("cmake") is None:
+        pytest.skip("CMake is not available.")
+    script = tmp_path / "script.cmake"
+    script.write_text('\n'.join(writer.cnt))
+    result = subprocess.run(["cmake", "-P", str(script)], check=True, capture_output=True, text=True)
+    assert result.stderr.strip() == "2"
+
+
+def test_paths_outside_of_the_tree_are_kept(tmp_path: Path):
+    """Test that only the paths under the root of the project tree are made relative to the written file."""
+    writer = CmakeFileWriter(min_version="3.22", base_dir=tmp_path / "ws" / "app", root=tmp_path / "ws")
+    assert writer.resolve_path(tmp_path / "ws" / "lib" / "a.cpp") == "${CMAKE_CURRENT_LIST_DIR}/../lib/a.cpp"
+    assert writer.resolve_path(tmp_path / "toolchain" / "include") == (tmp_path / "toolchain" / "include").as_posix()
@@ -0,0 +1,139 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the compilation flag rendering and probing."""
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.domains.cpp.compiler_options import CompilationFlags
+from lobs.domains.cpp.flag_probe import FlagProbe
+from lobs.exporter import esp_idf
+
+
+@pytest.fixture
+def fake_compiler(tmp_path: Path) -> Path:
+    """A compiler that rejects any flag containing 'bogus' and logs its invocations."""
+    compiler = tmp_path / "fake-g++"
+    compiler.write_text(
+        "#!/bin/sh\n"
+        f"echo \"$@\" >> {tmp_path / 'calls.log'}\n"
+        "case \"$*\" in\n"
+        "  --version) echo 'fake-g++ 1.0'; exit 0 ;;\n"
+        "  *bogus*) exit 1 ;;\n"
+        "esac\n"
+        "exit 0\n"
+    )
+    compiler.chmod(0o755)
+    return compiler
+
+
+def _probe_calls(tmp_path: Path) -> list[str]:
+    log = tmp_path / "calls.log"
+    lines = log.read_text().splitlines() if log.exists() else []
+    return [x for x in lines if x != '--version']
+
+
+class TestCompilationFlagsRendering:
+    """Test CompilationFlags.to_arguments()."""
+
+    def test_no_flags_enabled(self):
+        """Test that default flags render to nothing."""
+        assert CompilationFlags().to_arguments() == []
+
+    def test_declaration_order(self):
+        """Test that flags are rendered in declaration order."""
+        flags = CompilationFlags(w_extra=True, w_all=True, w_no_sign_compare=True)
+        assert flags.to_arguments() == ['-Wall', '-Wextra', '-Wno-sign-compare']
+
+    def test_disabled_flags_are_skipped(self):
+        """Test that flags set to False are not rendered."""
+        flags = CompilationFlags(w_all=True, w_extra=False)
+        assert flags.to_arguments() == ['-Wall']
+
+    def test_dynamic_flag(self):
+        """Test that dynamically added flags are rendered."""
+        flags = CompilationFlags()
+        flags['w_comment'] = True
+        assert flags.to_arguments() == ['-Wcomment']
+
+
+class TestFlagProbe:
+    """Test FlagProbe against a fake compiler."""
+
+    def test_supported(self, fake_compiler: Path, tmp_path: Path):
+        """Test that each flag is reported as supported or not."""
+        probe = FlagProbe(compiler=fake_compiler, cache_dir=tmp_path / "cache")
+        assert probe.supported(['-Wall', '-Wbogus']) == {'-Wall': True, '-Wbogus': False}
+
+    def test_negative_warning_probes_positive_form(self, fake_compiler: Path, tmp_path: Path):
+        """Test that `-Wno-*` flags are probed through their positive form."""
+        probe = FlagProbe(compiler=fake_compiler, cache_dir=tmp_path / "cache")
+        assert probe.supported(['-Wno-bogus']) == {'-Wno-bogus': False}
+        assert '-Wbogus' in _probe_calls(tmp_path)[0]
+
+    def test_results_are_cached_on_disk(self, fake_compiler: Path, tmp_path: Path):
+        """Test that a second probe with the same compiler does not invoke it again."""
+        FlagProbe(compiler=fake_compiler, cache_dir=tmp_path / "cache").supported(['-Wall', '-Wbogus'])
+        calls = len(_probe_calls(tmp_path))
+
+        result = FlagProbe(compiler=fake_compiler, cache_dir=tmp_path / "cache").supported(['-Wbogus', '-Wall'])
+        assert result == {'-Wall': True, '-Wbogus': False}
+        assert len(_probe_calls(tmp_path)) == calls
+
+    def test_only_new_flags_are_probed(self, fake_compiler: Path, tmp_path: Path):
+        """Test that flags already in the cache are not probed again."""
+        FlagProbe(compiler=fake_compiler, cache_dir=tmp_path / "cache").supported(['-Wall'])
+        FlagProbe(compiler=fake_compiler, cache_dir=tmp_path / "cache").supported(['-Wall', '-Wextra'])
+        calls = _probe_calls(tmp_path)
+        assert len(calls) == 2
+        assert '-Wextra' in calls[1]
+
+    def test_filter_drops_unsupported(self, fake_compiler: Path, tmp_path: Path):
+        """Test that unsupported flags are dropped with a warning."""
+        probe = FlagProbe(compiler=fake_compiler, cache_dir=tmp_path / "cache")
+        with pytest.warns(UserWarning, match="-Wbogus"):
+            assert probe.filter(['-Wall', '-Wbogus', '-Wextra']) == ['-Wall', '-Wextra']
+
+    def test_filter_error(self, fake_compiler: Path, tmp_path: Path):
+        """Test that unsupported flags raise when configured to."""
+        probe = FlagProbe(compiler=fake_compiler, on_unsupported='error', cache_dir=tmp_path / "cache")
+        with pytest.raises(ValueError, match="-Wbogus"):
+            probe.filter(['-Wall', '-Wbogus'])
+
+    def test_missing_compiler(self, tmp_path: Path):
+        """Test that a missing compiler is reported."""
+        probe = FlagProbe(compiler=tmp_path / "nope", cache_dir=tmp_path / "cache")
+        with pytest.raises(FileNotFoundError):
+            probe.supported(['-Wall'])
+
+
+class TestEspIdfProbe:
+    """Test the flag probing of the ESP-IDF exporter."""
+
+    @staticmethod
+    def _package(folder: Path, project: lobs.cpp.Library | lobs.cpp.ManagedApplication, *dependencies: lobs.Package):
+        pkg = lobs.Package(lobs.ProjectMeta(folder.name, lobs.Version(0, 0, 1)), project, list(dependencies))
+        pkg.package_path = folder / f"{folder.name}.py"
+        return pkg
+
+    def test_dependencies_use_the_application_probe(self, fake_compiler: Path, tmp_path: Path):
+        """Test that the components of all the dependencies, transitive ones included, are filtered in one batch."""
+        (tmp_path / "lib_a").mkdir()
+        (tmp_path / "lib_b").mkdir()
+        (tmp_path / "app" / "main").mkdir(parents=True)
+        lib_a = self._package(tmp_path / "lib_a", lobs.cpp.Library([]))
+        assert isinstance(lib_a.project, lobs.cpp.Library)
+        lib_a.project.compilation_flags['w_bogus'] = True
+        lib_b = self._package(tmp_path / "lib_b", lobs.cpp.Library([]), lib_a)
+        main = tmp_path / "app" / "main" / "main.cpp"
+        main.touch()
+        app = self._package(tmp_path / "app", lobs.cpp.ManagedApplication([main]), lib_b)
+        probe = FlagProbe(compiler=fake_compiler, cache_dir=tmp_path / "cache")
+        app.meta.exporter_configuration = [esp_idf.EspIdfConfig(flag_probe=probe)]
+        with pytest.warns(UserWarning, match="-Wbogus"):
+            esp_idf.Exporter(app).export()
+        assert "-Wbogus" not in (tmp_path / "lib_a" / "CMakeLists.txt").read_text()
+        assert (tmp_path / "lib_b" / "CMakeLists.txt").exists()
+        assert len(_probe_calls(tmp_path)) == 1
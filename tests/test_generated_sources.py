@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the generated source steps."""
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.core import graph
+from lobs.core.language.base import expand_sources, run_providers
+from lobs.domains.cpp.generated import INPUTS, GeneratorStep
+from lobs.exporter import cmake, esp_idf
+
+from .conftest import MakePackage
+
+
+@pytest.fixture
+def generator(tmp_path: Path) -> Path:
+    """A generator writing `<input stem>.cpp` and `.hpp` files to its first argument, logging its runs."""
+    script = tmp_path / "fake-gen"
+    script.write_text(
+        "#!/bin/sh\n"
+        f"echo run >> {tmp_path / 'runs.log'}\n"
+        "out=$1; shift\n"
+        "for f in \"$@\"; do\n"
+        "  name=$(basename \"$f\" .in)\n"
+        "  cp \"$f\" \"$out/$name.cpp\"\n"
+        "  echo '#pragma once' > \"$out/$name.hpp\"\n"
+        "done\n"
+    )
+    script.chmod(0o755)
+    return script
+
+
+def _runs(tmp_path: Path) -> int:
+    log = tmp_path / "runs.log"
+    return len(log.read_text().splitlines()) if log.exists() else 0
+
+
+@pytest.fixture
+def make_step(tmp_path: Path, generator: Path):
+    """Create a step generating from `msg.in`, with the cache under `tmp_path`."""
+    source = tmp_path / "msg.in"
+    if not source.exists():
+        source.write_text("int msg;\n")
+
+    def factory(outputs: list[str] | None = None) -> GeneratorStep:
+        return GeneratorStep(
+            [str(generator), '{out_dir}', INPUTS],
+            [source],
+            outputs if outputs is not None else ['msg.cpp', 'msg.hpp'],
+            tmp_path / "generated",
+            cache_dir=tmp_path / "cache",
+        )
+
+    return factory
+
+
+class TestGeneratorStep:
+    """Test running and caching GeneratorStep."""
+
+    def test_outputs_are_materialized(self, tmp_path: Path, make_step):
+        """Test that the outputs are written to the output directory, in declaration order."""
+        step = make_step()
+        assert step.provide() == [tmp_path / "generated" / "msg.cpp", tmp_path / "generated" / "msg.hpp"]
+        assert (tmp_path / "generated" / "msg.cpp").read_text() == "int msg;\n"
+        assert _runs(tmp_path) == 1
+
+    def test_unchanged_inputs_are_not_regenerated(self, tmp_path: Path, make_step):
+        """Test that another evaluation with the same inputs uses the cache, leaving the outputs untouched."""
+        make_step().provide()
+        output = tmp_path / "generated" / "msg.cpp"
+        os.utime(output, ns=(0, 0))
+        make_step().provide()
+        assert _runs(tmp_path) == 1
+        assert output.stat().st_mtime_ns == 0
+
+    def test_changed_input_is_regenerated(self, tmp_path: Path, make_step):
+        """Test that changing an input re-runs the step and updates the outputs."""
+        make_step().provide()
+        (tmp_path / "msg.in").write_text("int changed;\n")
+        make_step().provide()
+        assert _runs(tmp_path) == 2
+        assert (tmp_path / "generated" / "msg.cpp").read_text() == "int changed;\n"
+
+    def test_removed_output_is_restored_from_cache(self, tmp_path: Path, make_step):
+        """Test that outputs deleted from the output directory are copied back without running the step."""
+        make_step().provide()
+        (tmp_path / "generated" / "msg.hpp").unlink()
+        make_step().provide()
+        assert _runs(tmp_path) == 1
+        assert (tmp_path / "generated" / "msg.hpp").read_text() == "#pragma once\n"
+
+    def test_rebuilt_generator_is_hashed_again(self, make_step, generator: Path):
+        """Test that changing the generator binary changes the cache key, in the same process."""
+        key = make_step().input_hash()
+        generator.write_text(generator.read_text() + "# rebuilt\n")
+        assert make_step().input_hash() != key
+
+    def test_key_is_shared_across_checkouts(self, tmp_path: Path):
+        """Test that the cache key of identical checkouts at different locations is the same."""
+        steps = []
+        for checkout in (tmp_path / "a", tmp_path / "b" / "nested"):
+            checkout.mkdir(parents=True)
+            (checkout / "msg.in").write_text("int msg;\n")
+            command = ['cp', str(checkout / "msg.in"), '{out_dir}']
+            steps.append(GeneratorStep(command, [checkout / "msg.in"], ['msg.in'], checkout / "gen", cwd=checkout))
+        assert steps[0].input_hash() == steps[1].input_hash()
+
+    def test_missing_output(self, make_step):
+        """Test that an output the command did not produce is an error."""
+        with pytest.raises(ValueError, match="did not produce: msg.pb.cc"):
+            make_step(['msg.cpp', 'msg.pb.cc']).provide()
+
+    def test_failing_command(self, tmp_path: Path):
+        """Test that a failing command is an error carrying its output."""
+        step = GeneratorStep(['sh', '-c', 'echo broken >&2; exit 3'], [], ['x.cpp'], tmp_path, cache_dir=tmp_path)
+        with pytest.raises(ValueError, match=r"failed \(3\): broken"):
+            step.provide()
+
+
+class TestSourceProviders:
+    """Test source providers in the sources of projects."""
+
+    def test_expand_sources(self, tmp_path: Path, make_step):
+        """Test that a step expands to its outputs in place."""
+        (tmp_path / "main.cpp").touch()
+        sources = expand_sources([tmp_path / "main.cpp", make_step()])
+        generated = tmp_path / "generated"
+        assert sources == [tmp_path / "main.cpp", generated / "msg.cpp", generated / "msg.hpp"]
+
+    def test_providers_run_concurrently(self):
+        """Test that distinct providers run at the same time, and each only once."""
+        barrier = threading.Barrier(2, timeout=5)
+        calls: list[int] = []
+
+        class Provider:
+            def provide(self) -> list[Path]:
+                calls.append(1)
+                barrier.wait()
+                return []
+
+        a, b = Provider(), Provider()
+        assert run_providers([a, b, a]) == {id(a): [], id(b): []}
+        assert len(calls) == 2
+
+    def test_graph_export(self, tmp_path: Path, make_step, make_package: MakePackage):
+        """Test that the CMake exporter lists the generated sources of the graph."""
+        lib = make_package("lib", [])
+        lib.project = lobs.cpp.Library(source_files=[make_step()])
+        graph.provide_sources([lib])
+        assert graph.package_sources(lib) == [tmp_path / "generated" / "msg.cpp", tmp_path / "generated" / "msg.hpp"]
+        cmake.Exporter(lib).export()
+        content = (tmp_path / "lib" / "CMakeLists.txt").read_text()
+        # Outside of the folders of the packages, the paths are not made relative
+        assert f"{(tmp_path / 'generated' / 'msg.cpp').as_posix()}\n" in content
+
+    def test_provided_include_dirs(self, tmp_path: Path, make_package: MakePackage):
+        """Test that the exporters expand the include directories given by providers and generators."""
+        class Provider:
+            def provide(self) -> list[Path]:
+                return [tmp_path / "generated"]
+
+        lib = make_package("lib")
+        lib.project = lobs.cpp.Library(include_dirs=[Provider(), (x for x in [tmp_path / "other"])])
+        graph.provide_sources([lib])
+        cmake.Exporter(lib).export()
+        content = (tmp_path / "lib" / "CMakeLists.txt").read_text()
+        dirs = f"{(tmp_path / 'generated').as_posix()}\n    {(tmp_path / 'other').as_posix()}\n"
+        assert f"    INTERFACE\n    {dirs}" in content
+
+        lib.project = lobs.cpp.Library(include_dirs=[Provider(), (x for x in [tmp_path / "other"])])
+        writer = esp_idf.Exporter._generate_component(lib.project, [], component_dir=tmp_path / "lib")
+        content = writer.write_to_dir(tmp_path / "lib").read_text()
+        assert dirs in content
@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the C++ link settings."""
+import shutil
+import subprocess
+from pathlib import Path
+
+import lobs
+from lobs.domains.cpp import LinkConfig
+from lobs.exporter import cmake, esp_idf
+
+
+class TestLinkConfig:
+    """Test LinkConfig argument rendering."""
+
+    def test_defaults_render_nothing(self):
+        """Test that the default settings keep the toolchain behaviour."""
+        assert LinkConfig().compile_arguments() == []
+
+    def test_split_dwarf(self):
+        """Test the split DWARF compile argument."""
+        assert LinkConfig(split_dwarf=True).compile_arguments() == ['-gsplit-dwarf']
+
+    def test_fast(self):
+        """Test that the fast settings can be overridden."""
+        config = LinkConfig.fast(link_jobs=2)
+        assert config.linkers == ('mold', 'lld')
+        assert config.link_jobs == 2
+
+
+class TestLinkConfigExport:
+    """Test that the exporters render the link settings."""
+
+    def _app(self, folder: Path, config: LinkConfig) -> lobs.Package:
+        (folder / "main").mkdir(parents=True)
+        (folder / "main" / "main.cpp").write_text("")
+        pkg = lobs.Package(
+            lobs.ProjectMeta("app", lobs.Version(0, 0, 1)),
+            lobs.cpp.ManagedApplication([folder / "main" / "main.cpp"], link_config=config),
+        )
+        pkg.package_path = folder / "app.py"
+        return pkg
+
+    def test_cmake(self, tmp_path: Path):
+        """Test that the cmake exporter selects the linker at configure time, not from the exporting machine."""
+        cmake.Exporter(self._app(tmp_path, LinkConfig.fast(link_jobs=2))).export()
+        content = (tmp_path / "CMakeLists.txt").read_text()
+        assert "set_property(\n    GLOBAL\n    APPEND\n    PROPERTY\n    JOB_POOLS\n    lobs_link=2\n)\n" in content
+        assert "JOB_POOL_LINK\n    lobs_link\n" in content
+        assert "target_compile_options(app PRIVATE -gsplit-dwarf)" in content
+        assert (
+            "include(CheckLinkerFlag)\n\n"
+            "foreach(_lobs_linker IN ITEMS mold lld)\n"
+            "    check_linker_flag(\n"
+            "        CXX\n        -fuse-ld=${_lobs_linker}\n        LOBS_LINKER_${_lobs_linker}\n    )\n"
+            "    if(LOBS_LINKER_${_lobs_linker})\n"
+            "        target_link_options(\n"
+            "            app\n            PRIVATE\n            -fuse-ld=${_lobs_linker}\n        )\n"
+            "        if(_lobs_linker MATCHES \"^(mold|lld|gold)$\")\n"
+            "            target_link_options(app PRIVATE -Wl,--gdb-index)\n"
+            "        endif()\n"
+            "        break()\n"
+            "    endif()\n"
+            "endforeach()\n"
+        ) in content
+
+    def test_auto_pool_size(self, tmp_path: Path):
+        """Test that the automatic pool size is computed at configure time, bounded by both memory and cores."""
+        cmake.Exporter(self._app(tmp_path, LinkConfig(link_jobs='auto', memory_per_link=2 << 30))).export()
+        content = (tmp_path / "CMakeLists.txt").read_text()
+        assert "QUERY\n    TOTAL_PHYSICAL_MEMORY\n" in content
+        assert "QUERY\n    NUMBER_OF_PHYSICAL_CORES\n" in content
+        assert 'math(\n    EXPR\n    _lobs_link_jobs\n    "${_lobs_memory} / 2048"\n)\n' in content
+        assert "lobs_link=${_lobs_link_jobs}" in content
+        if shutil.which("cmake") is None:
+            return
+        script = content[content.index("cmake_host_system_information"):content.index("set_property")]
+        (tmp_path / "pool.cmake").write_text(script + 'message("${_lobs_link_jobs}")\n')
+        result = subprocess.run(["cmake", "-P", str(tmp_path / "pool.cmake")], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert int(result.stderr) >= 1
+
+    def test_esp_idf(self, tmp_path: Path):
+        """Test that the esp-idf exporter only renders the job pool."""
+        esp_idf.Exporter(self._app(tmp_path, LinkConfig.fast(link_jobs=2))).export()
+        content = (tmp_path / "CMakeLists.txt").read_text()
+        assert "JOB_POOLS\n    lobs_link=2\n" in content
+        assert "set(CMAKE_JOB_POOL_LINK lobs_link)" in content
+        assert "-fuse-ld" not in (tmp_path / "main" / "CMakeLists.txt").read_text()
@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the dependencies declared by reference, and the demand-driven evaluation of the graph."""
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import lobs
+from lobs.__main__ import main
+from lobs.core import checks, graph
+
+
+PROJECT = '''
+from pathlib import Path
+
+import lobs
+
+_here = Path(__file__).parent
+
+{name} = lobs.Package(
+    lobs.ProjectMeta("{name}", lobs.Version(0, 0, 1)),
+    lobs.cpp.{kind}([_here / "{name}.cpp"]),
+    [{dependencies}],
+)
+'''
+
+
+def _project(root: Path, name: str, *dependencies: str, kind: str = "Library") -> Path:
+    folder = root / name
+    folder.mkdir(parents=True)
+    (folder / f"{name}.cpp").touch()
+    path = folder / f"{name}.py"
+    path.write_text(PROJECT.format(name=name, kind=kind, dependencies=", ".join(dependencies)))
+    return path
+
+
+@pytest.fixture
+def workspace(tmp_path: Path) -> Path:
+    """A workspace referencing an application, its library, and a component whose evaluation fails."""
+    _project(tmp_path, "lib")
+    _project(tmp_path, "app", 'lobs.PackageRef("../lib", "lib")', kind="ManagedApplication")
+    broken = _project(tmp_path, "broken")
+    broken.write_text("raise RuntimeError('broken was evaluated')\n")
+    return _project(tmp_path, "workspace", 'lobs.PackageRef("../app/app.py", "app")', 'lobs.PackageRef("../broken")')
+
+
+class TestPackageRef:
+    """Test the resolution of package references."""
+
+    def test_lazy(self, workspace: Path):
+        """Test that references are only evaluated when the dependencies are accessed."""
+        package = lobs.Package.from_file(workspace)
+        with pytest.raises(RuntimeError, match="broken was evaluated"):
+            package.dependencies
+
+    def test_dependency_names(self, workspace: Path):
+        """Test that the names declared by references are used without evaluating them."""
+        package = lobs.Package.from_file(workspace)
+        package.declared_dependencies[1] = lobs.PackageRef("../broken", "broken")
+        assert package.dependency_names == ["app", "broken"]
+        assert all(isinstance(x, lobs.PackageRef) for x in package.declared_dependencies)
+
+    def test_shared_resolution(self, tmp_path: Path):
+        """Test that references to the same project file resolve to the same package."""
+        _project(tmp_path, "lib")
+        _project(tmp_path, "a", 'lobs.PackageRef("../lib")')
+        _project(tmp_path, "b", 'lobs.PackageRef("../lib/lib.py")')
+        root = lobs.Package.from_file(_project(tmp_path, "root", 'lobs.PackageRef("../a")', 'lobs.PackageRef("../b")'))
+        a, b = root.dependencies
+        assert a.dependencies[0] is b.dependencies[0]
+        assert [x.meta.name for x in graph.walk(root)] == ["lib", "a", "b", "root"]
+        assert a.evaluated_files == [tmp_path / "a" / "a.py"]
+
+    def test_name_mismatch(self, tmp_path: Path):
+        """Test that the declared name must match the package of the referenced file."""
+        _project(tmp_path, "lib")
+        root = lobs.Package.from_file(_project(tmp_path, "root", 'lobs.PackageRef("../lib", "other")'))
+        with pytest.raises(ValueError, match="defines package 'lib', but 'other' was expected"):
+            root.dependencies
+
+
+    def test_eager_imports(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        """Test that references to files importing packages resolve to their own package, known only once."""
+        monkeypatch.setattr(sys, "path", list(sys.path))
+        lib = f"lib_{uuid.uuid4().hex}"
+        _project(tmp_path, lib)
+        imports = f"import sys\nsys.path.insert(0, {str(tmp_path)!r})\nfrom {lib}.{lib} import {lib}\n"
+        for name, dependencies in (("other", [lib]), ("app", [lib, 'lobs.PackageRef("../other")'])):
+            path = _project(tmp_path, name, *dependencies)
+            path.write_text(imports + path.read_text())
+        app = lobs.Package.from_file(tmp_path / "app" / "app.py")
+        assert app.dependency_names == [lib, "other"]
+        assert [x.meta.name for x in graph.walk(app)] == [lib, "other", "app"]
+        assert app.dependencies[1].dependencies[0] is app.dependencies[0]
+        assert checks.check_names(app.resolved_packages()) == []
+
+
+class TestOnly:
+    """Test the export of a subgraph of the project."""
+
+    def test_find(self, workspace: Path):
+        """Test that only the packages leading to the searched one are evaluated."""
+        package = graph.find(lobs.Package.from_file(workspace), "app")
+        assert package.package_path == workspace.parents[1] / "app" / "app.py"
+
+    def test_find_deeper(self, workspace: Path):
+        """Test that references of other names are only resolved to search the next level."""
+        package = lobs.Package.from_file(workspace)
+        package.declared_dependencies[1] = lobs.PackageRef("../broken", "broken")
+        assert graph.find(package, "app").meta.name == "app"
+        with pytest.raises(RuntimeError, match="broken was evaluated"):
+            graph.find(package, "lib")
+
+    def test_find_unknown(self, tmp_path: Path):
+        """Test that searching for an unknown package fails, once the whole graph was searched."""
+        _project(tmp_path, "lib")
+        root = lobs.Package.from_file(_project(tmp_path, "root", 'lobs.PackageRef("../lib")'))
+        with pytest.raises(ValueError, match="No package named 'nope' in the graph of 'root'"):
+            graph.find(root, "nope")
+
+    def test_cli(self, workspace: Path):
+        """Test that `export --only` exports the subgraph of the package, without evaluating the others."""
+        result = CliRunner().invoke(main, ["--no-server", str(workspace), "export", "cmake", "--only", "app"])
+        assert result.exit_code == 0, result.output
+        root = workspace.parents[1]
+        assert "target_link_libraries(app PRIVATE lib)" in (root / "app" / "CMakeLists.txt").read_text()
+        assert not (root / "workspace" / "CMakeLists.txt").exists()
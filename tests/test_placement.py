@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the memory region placements and the ESP-IDF linker fragments."""
+import typing as t
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.domains.cpp import MemoryRegion, Placement
+from lobs.exporter import esp_idf
+
+
+def _app(folder: Path, placements: list[Placement]) -> lobs.Package:
+    (folder / "main").mkdir(parents=True, exist_ok=True)
+    sources = [folder / "main" / "main.cpp", folder / "main" / "isr.cpp"]
+    for src in sources:
+        src.write_text("")
+    pkg = lobs.Package(
+        lobs.ProjectMeta("app", lobs.Version(0, 0, 1)),
+        lobs.cpp.ManagedApplication(sources, placements=placements),
+    )
+    pkg.package_path = folder / "app.py"
+    return pkg
+
+
+class TestPlacement:
+    """Test Placement construction."""
+
+    def test_object_from_source(self):
+        """Test that the object name is derived from the source file."""
+        assert Placement(MemoryRegion.IRAM, source=Path("src/isr.cpp")).object == "isr"
+
+    def test_object_name(self):
+        """Test placing an object not built from the project sources."""
+        assert Placement(MemoryRegion.FLASH, object_name="libfoo").object == "libfoo"
+
+    @pytest.mark.parametrize("kwargs", [{}, {"source": Path("a.cpp"), "object_name": "a"}])
+    def test_requires_exactly_one_target(self, kwargs: dict[str, t.Any]):
+        """Test that a placement targets exactly one of source and object."""
+        with pytest.raises(ValueError, match="exactly one"):
+            Placement(MemoryRegion.IRAM, **kwargs)
+
+
+class TestLinkerFragment:
+    """Test the linker fragments generated by the ESP-IDF exporter."""
+
+    def test_fragment(self, tmp_path: Path):
+        """Test the fragment contents and its registration."""
+        placements = [
+            Placement(MemoryRegion.IRAM, source=tmp_path / "main" / "isr.cpp"),
+            Placement(MemoryRegion.DRAM, source=tmp_path / "main" / "main.cpp", symbols=["lut", "table"]),
+            Placement(MemoryRegion.FLASH, object_name="startup"),
+        ]
+        esp_idf.Exporter(_app(tmp_path, placements)).export()
+        assert (tmp_path / "main" / "lobs_placement.lf").read_text() == (
+            "[mapping:main]\n"
+            "archive: libmain.a\n"
+            "entries:\n"
+            "    isr (noflash)\n"
+            "    main:lut (noflash_data)\n"
+            "    main:table (noflash_data)\n"
+            "    startup (default)\n"
+        )
+        assert "LDFRAGMENTS lobs_placement.lf" in (tmp_path / "main" / "CMakeLists.txt").read_text()
+
+    def test_no_placements(self, tmp_path: Path):
+        """Test that no fragment is generated, and a stale one is removed, without placements."""
+        (tmp_path / "main").mkdir()
+        (tmp_path / "main" / "lobs_placement.lf").write_text("stale")
+        esp_idf.Exporter(_app(tmp_path, [])).export()
+        assert not (tmp_path / "main" / "lobs_placement.lf").exists()
+        assert "LDFRAGMENTS" not in (tmp_path / "main" / "CMakeLists.txt").read_text()
+
+    def test_foreign_source(self, tmp_path: Path):
+        """Test that placing a source of another component is rejected."""
+        other = tmp_path / "other.cpp"
+        other.write_text("")
+        with pytest.raises(ValueError, match="do not belong to component 'main'"):
+            esp_idf.Exporter(_app(tmp_path, [Placement(MemoryRegion.IRAM, source=other)])).export()
+
+    def test_ambiguous_object(self, tmp_path: Path):
+        """Test that placing a source whose object name is shared with another source is rejected."""
+        app = _app(tmp_path, [Placement(MemoryRegion.IRAM, source=tmp_path / "main" / "isr.cpp")])
+        assert isinstance(app.project, lobs.cpp.ManagedApplication)
+        (tmp_path / "main" / "sub").mkdir()
+        (tmp_path / "main" / "sub" / "isr.c").write_text("")
+        app.project.source_files = [*app.project.source_files, tmp_path / "main" / "sub" / "isr.c"]
+        assert esp_idf.Exporter(app).check() == [
+            f"Placed sources share their object name: {tmp_path / 'main' / 'isr.cpp'}"
+        ]
+        with pytest.raises(ValueError, match="share their object name with another source of component 'main'"):
+            esp_idf.Exporter(app).export()
@@ -0,0 +1,148 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the recording of export inputs and the self-regenerating CMake projects."""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import lobs
+from lobs.__main__ import main
+from lobs.core import inputs
+from lobs.exporter.cmake.regenerate import HOOK_MODULE
+
+
+PROJECT = '''
+from pathlib import Path
+import sys
+
+import lobs
+from lobs.exporter.cmake import CmakeConfig
+
+sys.path.insert(0, str(Path(__file__).parent))
+from {helper} import STANDARD  # noqa: E402
+
+_here = Path(__file__).parent
+
+app = lobs.Package(
+    lobs.ProjectMeta("app", lobs.Version(1, 0, 0), exporter_configuration=[CmakeConfig(regenerate=True)]),
+    lobs.cpp.ManagedApplication([lobs.Glob(_here / "src", "*.cpp")], cxx_standard=STANDARD),
+)
+'''
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A project file importing a helper module (of a unique name), with sources matched by a glob."""
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    monkeypatch.chdir(tmp_path)
+    helper = f"helper_{uuid.uuid4().hex}"
+    (tmp_path / f"{helper}.py").write_text("STANDARD = 20\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.cpp").write_text("int main() {}\n")
+    path = tmp_path / "app.py"
+    path.write_text(PROJECT.format(helper=helper))
+    return path
+
+
+def _helper(project: Path) -> Path:
+    return next(project.parent.glob("helper_*.py"))
+
+
+def _export(project: Path, *args: str) -> str:
+    result = CliRunner().invoke(main, ["--no-server", str(project), "export", "cmake", *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+class TestExportInputs:
+    """Test the recording of the files an export depends on."""
+
+    def test_imported_files_are_recorded(self, project: Path):
+        """Test that the project file and the modules it imported are recorded, but not installed ones."""
+        package = lobs.Package.from_file(project)
+        assert package.evaluated_files == [project, _helper(project)]
+
+    def test_globs_are_recorded(self, project: Path):
+        """Test that the matches of the source globs are recorded."""
+        recorded = inputs.ExportInputs.collect(lobs.Package.from_file(project))
+        assert list(recorded.files) == sorted([project.as_posix(), _helper(project).as_posix()])
+        src = project.parent / "src"
+        assert recorded.globs == [(src.as_posix(), "*.cpp", [(src / "main.cpp").as_posix()])]
+
+    def test_changes(self, project: Path):
+        """Test that content changes and new glob matches are detected, but not touched files."""
+        recorded = inputs.ExportInputs.collect(lobs.Package.from_file(project))
+        os.utime(project, ns=(0, 0))
+        assert recorded.changed() == []
+        _helper(project).write_text("STANDARD = 17\n")
+        (project.parent / "src" / "other.cpp").touch()
+        assert recorded.changed() == [_helper(project).as_posix(), f"{(project.parent / 'src').as_posix()}/*.cpp"]
+
+    def test_version_change(self, project: Path):
+        """Test that exports of another lobs version are considered stale."""
+        recorded = inputs.ExportInputs.collect(lobs.Package.from_file(project))
+        recorded.version = "0.0.0"
+        assert recorded.changed() == [f"lobs 0.0.0 -> {lobs.__version__}"]
+
+
+class TestRegeneration:
+    """Test the regeneration hook and `export --if-changed`."""
+
+    def test_hook(self, project: Path):
+        """Test that the hook is included before the project, and lists the inputs as configure dependencies."""
+        _export(project)
+        content = project.with_name("CMakeLists.txt").read_text()
+        assert content.index(HOOK_MODULE) < content.index("project(")
+        assert "if(LOBS_REGENERATED)\n    return()\nendif()\n" in content
+        hook = project.with_name(HOOK_MODULE).read_text()
+        assert f'    "${{CMAKE_CURRENT_LIST_DIR}}/{_helper(project).name}"\n' in hook
+        assert 'file(GLOB _lobs_matches CONFIGURE_DEPENDS "${CMAKE_CURRENT_LIST_DIR}/src/*.cpp")' in hook
+        assert 'export cmake --if-changed' in hook
+        assert 'HINTS "$ENV{VIRTUAL_ENV}/bin"' in hook
+        assert 'COMMAND "${LOBS_EXECUTABLE}" --no-server' in hook
+        assert 'WORKING_DIRECTORY "${CMAKE_CURRENT_LIST_DIR}"' in hook
+        assert str(project.parent) not in hook
+
+    def test_hook_recursive_glob(self, project: Path):
+        """Test that recursive patterns are watched from their folders before the first wildcard."""
+        project.write_text(project.read_text().replace('"*.cpp"', '"lib/**/gen/*.cpp"'))
+        _export(project)
+        hook = project.with_name(HOOK_MODULE).read_text()
+        assert 'file(GLOB_RECURSE _lobs_matches CONFIGURE_DEPENDS "${CMAKE_CURRENT_LIST_DIR}/src/lib/*.cpp")' in hook
+
+    def test_if_changed(self, project: Path):
+        """Test that `--if-changed` only exports when an input changed."""
+        _export(project)
+        cmake_lists = project.with_name("CMakeLists.txt")
+        cmake_lists.unlink()
+        assert "up to date" in _export(project, "--if-changed")
+        assert not cmake_lists.exists()
+        _helper(project).write_text("STANDARD = 17\n")
+        assert "Changed:" in _export(project, "--if-changed")
+        assert "set(CMAKE_CXX_STANDARD 17)" in cmake_lists.read_text()
+
+    def test_if_changed_without_manifest(self, project: Path):
+        """Test that `--if-changed` exports when nothing was recorded."""
+        _export(project, "--if-changed")
+        assert project.with_name("CMakeLists.txt").is_file()
+
+    def test_if_changed_with_variants(self, project: Path):
+        """Test that `--if-changed` checks the declared variants, which are exported in place of the package."""
+        project.write_text(project.read_text().replace(
+            "exporter_configuration=[CmakeConfig(regenerate=True)]",
+            'exporter_configuration=[CmakeConfig(regenerate=True), lobs.VariantMatrix([lobs.Variant("a"), '
+            'lobs.Variant("b")])]',
+        ))
+        _export(project)
+        recorded = inputs.ExportInputs.load(inputs.manifest_path(project, "cmake"))
+        assert recorded is not None and recorded.variants == ["a", "b"]
+        assert "up to date" in _export(project, "--if-changed")
+        inputs.manifest_path(project, "cmake", "b").unlink()
+        (project.parent / "variants" / "b" / "CMakeLists.txt").unlink()
+        _export(project, "--if-changed")
+        assert (project.parent / "variants" / "b" / "CMakeLists.txt").is_file()
@@ -0,0 +1,280 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the lobs server and its client."""
+import asyncio
+import collections.abc as c
+import os
+import re
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from lobs.__main__ import main
+from lobs.server import Client, RemoteError, Server
+
+
+PROJECT = '''
+from pathlib import Path
+
+import lobs
+
+_tf = Path(__file__)
+
+app = lobs.Package(
+    lobs.ProjectMeta("app", lobs.Version(1, 0, 0)),
+    lobs.cpp.ManagedApplication([_tf.with_name("{source}")]),
+)
+app.project.compilation_flags.w_all = True
+'''
+
+ESP_IDF_PROJECT = '''
+from pathlib import Path
+
+import lobs
+from lobs.exporter.esp_idf import EspIdfConfig
+
+_tf = Path(__file__)
+
+app = lobs.Package(
+    lobs.ProjectMeta("app", lobs.Version(1, 0, 0), exporter_configuration=[
+        EspIdfConfig(sdk_config_default=Path("sdkconfig.defaults")),
+    ]),
+    lobs.cpp.ManagedApplication([_tf.parent / "main" / "main.cpp"]),
+)
+'''
+
+PROBED_PROJECT = '''
+from pathlib import Path
+
+import lobs
+from lobs.domains.cpp import LinkConfig
+from lobs.domains.cpp.flag_probe import FlagProbe
+from lobs.exporter.cmake import CmakeConfig
+
+_tf = Path(__file__)
+
+app = lobs.Package(
+    lobs.ProjectMeta("app", lobs.Version(1, 0, 0), exporter_configuration=[
+        CmakeConfig(flag_probe=FlagProbe({compiler}cache_dir=_tf.with_name("cache"))),
+    ]),
+    lobs.cpp.ManagedApplication([_tf.with_name("main.cpp")], link_config=LinkConfig(split_dwarf=True)),
+)
+app.project.compilation_flags.w_all = True
+app.project.compilation_flags["w_bogus"] = True
+'''
+
+REF_PROJECT = '''
+from pathlib import Path
+
+import lobs
+
+{name} = lobs.Package(
+    lobs.ProjectMeta("{name}", lobs.Version(1, 0, 0)),
+    lobs.cpp.{kind}([Path(__file__).with_name("{name}.cpp")]),
+    [{dependencies}],
+)
+'''
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """A project file with a single application."""
+    (tmp_path / "main.cpp").write_text("int main() {}\n")
+    path = tmp_path / "app.py"
+    path.write_text(PROJECT.format(source="main.cpp"))
+    return path
+
+
+@pytest.fixture
+def fake_compiler(tmp_path: Path) -> Path:
+    """A compiler rejecting any flag containing 'bogus'."""
+    compiler = tmp_path / "fake-g++"
+    compiler.write_text("#!/bin/sh\ncase \"$*\" in *bogus*) exit 1 ;; esac\necho 'fake-g++ 1.0'\n")
+    compiler.chmod(0o755)
+    return compiler
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> c.Iterator[Server]:
+    """A server listening on a socket in `tmp_path`, running in a background thread."""
+    server = Server(tmp_path / "lobs.sock")
+    thread = threading.Thread(target=asyncio.run, args=(server.serve_forever(),))
+    thread.start()
+    for _ in range(100):
+        if (client := Client.connect(server.socket_path)) is not None:
+            client.close()
+            break
+        threading.Event().wait(0.05)
+    yield server
+    client = Client.connect(server.socket_path)
+    assert client is not None
+    with client:
+        client.call("shutdown")
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def client(server: Server) -> c.Iterator[Client]:
+    client = Client.connect(server.socket_path)
+    assert client is not None
+    with client:
+        yield client
+
+
+class TestServer:
+    """Test the methods served over the socket."""
+
+    def test_ping(self, client: Client):
+        """Test the liveness check."""
+        assert client.call("ping") == "pong"
+
+    def test_queries(self, client: Client, project: Path):
+        """Test the queries on the evaluated package graph."""
+        assert client.call("sources", project=str(project)) == {"app": [str(project.with_name("main.cpp"))]}
+        assert client.call("flags", project=str(project), package="app") == {"app": ["-Wall"]}
+        assert client.call("dependencies", project=str(project)) == {"app": []}
+
+    def test_probed_flags(self, client: Client, tmp_path: Path, fake_compiler: Path):
+        """Test that the flags are those of the exporter: probed, and with the link configuration arguments."""
+        (tmp_path / "main.cpp").touch()
+        (tmp_path / "app.py").write_text(PROBED_PROJECT.format(compiler=f"{str(fake_compiler)!r}, "))
+        with pytest.warns(UserWarning, match="-Wbogus"):
+            flags = client.call("flags", project=str(tmp_path / "app.py"))
+        assert flags == {"app": ["-Wall", "-gsplit-dwarf"]}
+
+    def test_client_environment(self, client: Client, server: Server, tmp_path: Path, fake_compiler: Path):
+        """Test that packages are evaluated and exported with the toolchain of the client, not the server's."""
+        (tmp_path / "main.cpp").touch()
+        project = tmp_path / "app.py"
+        project.write_text(PROBED_PROJECT.format(compiler=""))
+        cxx = os.environ.get("CXX")
+        env = {"CXX": str(fake_compiler), "PATH": os.environ["PATH"], "HOME": "ignored"}
+        with pytest.warns(UserWarning, match=re.escape(f"compiler '{fake_compiler}'")):
+            assert client.call("flags", project=str(project), env=env) == {"app": ["-Wall", "-gsplit-dwarf"]}
+        entry = server._entries[project]
+        assert entry.environment == {"CXX": str(fake_compiler), "PATH": os.environ["PATH"]}
+        assert os.environ.get("CXX") == cxx
+        # Another toolchain evaluates the package again
+        client.call("sources", project=str(project), env={"CXX": "c++"})
+        assert server._entries[project] is not entry
+
+    def test_packages_are_cached(self, client: Client, server: Server, project: Path):
+        """Test that packages are evaluated once, and again after an explicit invalidation."""
+        client.call("sources", project=str(project))
+        entry = server._entries[project]
+        client.call("flags", project=str(project))
+        assert server._entries[project] is entry
+        assert client.call("invalidate", project=str(project)) == 1
+        assert project not in server._entries
+
+    def test_changed_package_is_reevaluated(self, client: Client, project: Path):
+        """Test that a change to the package file is picked up without invalidation."""
+        client.call("sources", project=str(project))
+        project.with_name("other.cpp").write_text("int main() {}\n")
+        project.write_text(PROJECT.format(source="other.cpp"))
+        stat = project.stat()
+        os.utime(project, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert client.call("sources", project=str(project)) == {"app": [str(project.with_name("other.cpp"))]}
+
+    def test_export(self, client: Client, project: Path):
+        """Test that exports are run in the server and report what was exported."""
+        exported = client.call("export", project=str(project), exporter_tag="cmake", cwd=str(project.parent))
+        assert exported == [{"package": "app", "stage": 0}]
+        assert "add_executable" in project.with_name("CMakeLists.txt").read_text()
+
+    def test_export_in_client_directory(self, client: Client, tmp_path: Path):
+        """Test that relative configuration paths are resolved in the directory of the client, not the server's."""
+        (tmp_path / "main").mkdir()
+        (tmp_path / "main" / "main.cpp").write_text("int main() {}\n")
+        (tmp_path / "esp.py").write_text(ESP_IDF_PROJECT)
+        (tmp_path / "client").mkdir()
+        (tmp_path / "client" / "sdkconfig.defaults").touch()
+        cwd = os.getcwd()
+        client.call("export", project=str(tmp_path / "esp.py"), exporter_tag="esp-idf", cwd=str(tmp_path / "client"))
+        assert os.getcwd() == cwd
+        assert "${CMAKE_CURRENT_LIST_DIR}/client/sdkconfig.defaults" in (tmp_path / "CMakeLists.txt").read_text()
+
+    def test_changed_import_is_reevaluated(self, client: Client, project: Path, monkeypatch: pytest.MonkeyPatch):
+        """Test that a change to a module imported by the package file is picked up, not the cached module."""
+        monkeypatch.setattr(sys, "path", [str(project.parent), *sys.path])
+        helper = project.with_name(f"sources_{uuid.uuid4().hex}.py")
+        helper.write_text('SOURCE = "main.cpp"\n')
+        project.with_name("other.cpp").write_text("int main() {}\n")
+        project.write_text(f"from {helper.stem} import SOURCE\n" + PROJECT.replace('"{source}"', 'SOURCE'))
+        assert client.call("sources", project=str(project)) == {"app": [str(project.with_name("main.cpp"))]}
+        helper.write_text('SOURCE = "other.cpp"\n')
+        stat = helper.stat()
+        os.utime(helper, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert client.call("sources", project=str(project)) == {"app": [str(project.with_name("other.cpp"))]}
+
+    def test_export_only(self, client: Client, server: Server, tmp_path: Path):
+        """Test that exporting a subgraph only evaluates the references leading to it, and depends on them only."""
+        (tmp_path / "lib.cpp").touch()
+        (tmp_path / "lib.py").write_text(REF_PROJECT.format(name="lib", kind="Library", dependencies=""))
+        (tmp_path / "broken.py").write_text("raise RuntimeError('broken was evaluated')\n")
+        workspace = tmp_path / "workspace.py"
+        workspace.write_text(REF_PROJECT.format(
+            name="workspace",
+            kind="Library",
+            dependencies='lobs.PackageRef("lib.py", "lib"), lobs.PackageRef("broken.py", "broken")',
+        ))
+        exported = client.call("export", project=str(workspace), exporter_tag="cmake", only="lib")
+        assert exported == [{"package": "lib", "stage": 0}]
+        assert sorted(server._entries[workspace].mtimes) == [tmp_path / "lib.py", workspace]
+
+    def test_errors(self, client: Client, project: Path):
+        """Test that failures are reported as errors, leaving the connection usable."""
+        with pytest.raises(RemoteError, match="Unknown method"):
+            client.call("nope")
+        with pytest.raises(RemoteError, match="No package named 'lib'"):
+            client.call("sources", project=str(project), package="lib")
+        with pytest.raises(RemoteError) as info:
+            client.call("ping", extra=1)
+        assert info.value.code == -32602
+        assert client.call("ping") == "pong"
+
+    def test_invalid_params(self, client: Client, project: Path):
+        """Test that parameters are checked against the signature of the method, before calling it."""
+        invalid: list[dict[str, object]] = [{"project": 1}, {"project": str(project), "shard": [0]}, {}]
+        for params in invalid:
+            with pytest.raises(RemoteError) as info:
+                client.call("export", exporter_tag="cmake", **params)
+            assert info.value.code == -32602
+        assert not project.with_name("CMakeLists.txt").exists()
+
+    def test_internal_errors(self, client: Client, tmp_path: Path):
+        """Test that a failing method reports an internal error, along with the exception type."""
+        (tmp_path / "app.py").write_text("raise TypeError('not a package')\n")
+        with pytest.raises(RemoteError, match="not a package") as info:
+            client.call("sources", project=str(tmp_path / "app.py"))
+        assert (info.value.code, info.value.data) == (-32603, {"type": "TypeError"})
+
+    def test_second_server_is_refused(self, server: Server):
+        """Test that a server does not take over the socket of a running one."""
+        with pytest.raises(RuntimeError, match="already listening"):
+            asyncio.run(Server(server.socket_path).serve_forever())
+
+
+class TestCli:
+    """Test the command line integration."""
+
+    def test_export_is_forwarded(self, server: Server, project: Path, monkeypatch: pytest.MonkeyPatch):
+        """Test that `export` is served by the running server, in the working directory of the caller."""
+        monkeypatch.setenv("LOBS_SOCKET", str(server.socket_path))
+        monkeypatch.chdir(project.parent)
+        result = CliRunner().invoke(main, [str(project), "export", "cmake"])
+        assert result.exit_code == 0, result.output
+        assert project in server._entries
+        assert project.with_name("CMakeLists.txt").is_file()
+
+    def test_commands_without_project(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        """Test that command names are not taken for the optional project path."""
+        monkeypatch.chdir(tmp_path)
+        result = CliRunner().invoke(main, ["serve", "--help"])
+        assert result.exit_code == 0, result.output
+        assert "--socket" in result.output
@@ -0,0 +1,138 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the package graph sharding."""
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import lobs
+from lobs.__main__ import main
+from lobs.core import exporter
+from lobs.core import sharding
+from lobs.core.history import History
+
+from .conftest import MakePackage
+
+
+@pytest.fixture
+def workspace(make_package: MakePackage) -> lobs.Package:
+    """A workspace package depending on two applications sharing a common library."""
+    common = make_package("common", {"common.cpp": 400})
+    net = make_package("net", {"net.cpp": 300, "tls.cpp": 300}, [common])
+    gui = make_package("gui", {"gui.cpp": 500}, [common])
+    app_a = make_package("app-a", {"a.cpp": 200}, [net])
+    app_b = make_package("app-b", {"b.cpp": 200}, [gui])
+    return make_package("workspace", {}, [app_a, app_b])
+
+
+class TestParseShard:
+    """Test parse_shard()."""
+
+    def test_valid(self):
+        """Test that shards are given one-based and returned zero-based."""
+        assert sharding.parse_shard("1/4") == (0, 4)
+        assert sharding.parse_shard("4/4") == (3, 4)
+
+    @pytest.mark.parametrize("spec", ["0/4", "5/4", "1", "a/b", "1/2/3"])
+    def test_invalid(self, spec: str):
+        """Test that malformed or out of range specifications are rejected."""
+        with pytest.raises(ValueError, match="Invalid shard"):
+            sharding.parse_shard(spec)
+
+
+class TestEstimateCosts:
+    """Test estimate_costs()."""
+
+    def test_sources(self, workspace: lobs.Package):
+        """Test the source count model, where packages cost at least 1."""
+        costs = sharding.estimate_costs(workspace, 'sources')
+        assert costs["net"] == 2.0
+        assert costs["workspace"] == 1.0
+
+    def test_size(self, workspace: lobs.Package):
+        """Test the source size model."""
+        costs = sharding.estimate_costs(workspace, 'size')
+        assert costs["net"] == 600.0
+        assert costs["gui"] == 500.0
+
+    def test_timings_fall_back_to_scaled_size(self, workspace: lobs.Package):
+        """Test that recorded timings are used, and scaled sizes where missing."""
+        History(workspace).record('build-times.packages', {"common": 2.0})
+        costs = sharding.estimate_costs(workspace, 'timings')
+        assert costs["common"] == 2.0
+        assert costs["gui"] == pytest.approx(2.5)
+
+    def test_default_ignores_history(self, workspace: lobs.Package):
+        """Test that the default costs do not depend on the history of the worker."""
+        History(workspace).record('build-times.packages', {"common": 2.0})
+        assert sharding.estimate_costs(workspace) == sharding.estimate_costs(workspace, 'size')
+
+
+class TestPartition:
+    """Test partition()."""
+
+    @pytest.mark.parametrize("shards", [1, 2, 3, 7])
+    def test_every_package_once(self, workspace: lobs.Package, shards: int):
+        """Test that every package is assigned to exactly one valid shard."""
+        assignments = sharding.partition(workspace, shards, sharding.estimate_costs(workspace, 'size'))
+        assert sorted(a.package.meta.name for a in assignments) == [
+            "app-a", "app-b", "common", "gui", "net", "workspace",
+        ]
+        assert all(0 <= a.shard < shards for a in assignments)
+
+    @pytest.mark.parametrize("shards", [1, 2, 3])
+    def test_dependencies_are_on_same_shard_or_earlier_stage(self, workspace: lobs.Package, shards: int):
+        """Test the stage invariant of the partition."""
+        assignments = sharding.partition(workspace, shards, sharding.estimate_costs(workspace, 'size'))
+        by_pkg = {id(a.package): a for a in assignments}
+        for a in assignments:
+            for dep in a.package.dependencies:
+                d = by_pkg[id(dep)]
+                assert (d.shard == a.shard and d.stage <= a.stage) or d.stage < a.stage
+
+    def test_balance(self, workspace: lobs.Package):
+        """Test that the loads of two shards are close to each other."""
+        costs = sharding.estimate_costs(workspace, 'size')
+        assignments = sharding.partition(workspace, 2, costs)
+        loads = [sum(costs[a.package.meta.name] for a in assignments if a.shard == i) for i in range(2)]
+        assert max(loads) - min(loads) <= 500
+
+    def test_deterministic(self, workspace: lobs.Package):
+        """Test that the partition only depends on the graph and the costs."""
+        costs = sharding.estimate_costs(workspace, 'size')
+        first = [(a.package.meta.name, a.shard, a.stage) for a in sharding.partition(workspace, 3, costs)]
+        for _ in range(5):
+            again = [(a.package.meta.name, a.shard, a.stage) for a in sharding.partition(workspace, 3, costs)]
+            assert again == first
+
+    def test_shard_packages_in_stage_order(self, workspace: lobs.Package):
+        """Test that a shard lists its packages by stage."""
+        assignments = sharding.partition(workspace, 2, sharding.estimate_costs(workspace, 'size'))
+        for index in range(2):
+            stages = [a.stage for a in sharding.shard_packages(assignments, index)]
+            assert stages == sorted(stages)
+
+    def test_invalid_shard_count(self, workspace: lobs.Package):
+        """Test that zero shards is rejected."""
+        with pytest.raises(ValueError):
+            sharding.partition(workspace, 0, sharding.estimate_costs(workspace, 'size'))
+
+
+class TestRunExport:
+    """Test the sharded exports."""
+
+    def test_graph_exporters_are_not_sharded(self, workspace: lobs.Package):
+        """Test that exporters rendering the whole graph in a single project refuse to export a shard."""
+        with pytest.raises(ValueError, match="cannot be sharded"):
+            exporter.run_export(workspace, "cmake", (0, 2))
+        assert not (workspace.package_path.parent / "CMakeLists.txt").exists()
+
+    def test_cli(self, tmp_path: Path):
+        """Test that `--shard` is rejected for such exporters."""
+        (tmp_path / "app.py").write_text("")
+        args = ["--no-server", str(tmp_path / "app.py"), "export", "cmake", "--shard", "1/2"]
+        result = CliRunner().invoke(main, args)
+        assert result.exit_code == 2
+        assert "renders the whole package graph at once" in result.output
@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the export of package graphs by the cmake exporter, and their shared sources."""
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.exporter import cmake
+from lobs.exporter.cmake.shared_objects import SharedSources, factor_shared_sources
+
+from .conftest import MakePackage
+
+
+ROOT = "${CMAKE_CURRENT_LIST_DIR}"
+
+
+class TestFactorSharedSources:
+    """Test factor_shared_sources()."""
+
+    def test_groups_by_consumers(self):
+        """Test that sources are grouped by the set of targets using them."""
+        a, b, c, d = (Path(x) for x in ("a.cpp", "b.cpp", "c.cpp", "d.cpp"))
+        groups, remaining = factor_shared_sources({
+            "x": (0, [a, b, c]),
+            "y": (0, [b, c, a]),
+            "z": (0, [c, d]),
+        })
+        assert groups == [SharedSources(("x", "y"), [a, b]), SharedSources(("x", "y", "z"), [c])]
+        assert remaining == {"x": [], "y": [], "z": [d]}
+
+    def test_different_keys(self):
+        """Test that sources are not shared between targets compiling them differently."""
+        a = Path("a.cpp")
+        groups, remaining = factor_shared_sources({"x": (0, [a]), "y": (1, [a]), "z": (0, [a, a])})
+        assert groups == [SharedSources(("x", "z"), [a])]
+        assert remaining == {"x": [], "y": [a], "z": []}
+
+
+def _app(folder: Path, name: str, sources: list[Path], dependencies: list[lobs.Package]) -> lobs.Package:
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / "main.cpp").write_text("")
+    pkg = lobs.Package(
+        lobs.ProjectMeta(name, lobs.Version(0, 0, 1)),
+        lobs.cpp.ManagedApplication([folder / "main.cpp", *sources]),
+        dependencies,
+    )
+    pkg.package_path = folder / f"{name}.py"
+    return pkg
+
+
+class TestGraphExport:
+    """Test the export of a package graph as a single CMake project."""
+
+    @pytest.fixture
+    def workspace(self, tmp_path: Path, make_package: MakePackage) -> lobs.Package:
+        """Two applications sharing a source file and a library, gathered by a workspace library."""
+        headers = make_package("headers", [])
+        headers.project.include_dirs = [tmp_path / "headers"]
+        common = make_package("common", ["common.cpp"], [headers])
+        (tmp_path / "util.cpp").write_text("")
+        app_a = _app(tmp_path / "app-a", "app-a", [tmp_path / "util.cpp"], [common])
+        app_b = _app(tmp_path / "app-b", "app-b", [tmp_path / "util.cpp"], [common])
+        return make_package("workspace", [], [app_a, app_b])
+
+    def test_targets(self, tmp_path: Path, workspace: lobs.Package):
+        """Test that every package is a target, linked along the dependency edges."""
+        cmake.Exporter(workspace).export()
+        content = (tmp_path / "workspace" / "CMakeLists.txt").read_text()
+        assert "add_library(headers INTERFACE)" in content
+        assert f"target_include_directories(\n    headers\n    INTERFACE\n    {ROOT}/../headers\n)" in content
+        assert f"add_library(\n    common\n    STATIC\n    {ROOT}/../common/common.cpp\n)" in content
+        assert "target_link_libraries(common PUBLIC headers)" in content
+        assert "add_library(workspace INTERFACE)" in content
+        assert "add_dependencies(workspace app-a app-b)" in content
+
+    def test_shared_sources(self, tmp_path: Path, workspace: lobs.Package):
+        """Test that the shared source is compiled once, and linked into both applications."""
+        cmake.Exporter(workspace).export()
+        content = (tmp_path / "workspace" / "CMakeLists.txt").read_text()
+        assert content.count(f"{ROOT}/../util.cpp") == 1
+        assert f"add_library(\n    lobs_shared_1\n    OBJECT\n    {ROOT}/../util.cpp\n)" in content
+        assert "target_link_libraries(lobs_shared_1 PRIVATE common)" in content
+        assert "target_link_libraries(\n    app-a\n    PRIVATE\n    common\n    lobs_shared_1\n)" in content
+
+    def test_different_flags(self, tmp_path: Path, workspace: lobs.Package):
+        """Test that sources compiled with different flags are not shared."""
+        app = workspace.dependencies[0].project
+        assert isinstance(app, lobs.cpp.ManagedApplication)
+        app.compilation_flags.w_all = True
+        cmake.Exporter(workspace).export()
+        content = (tmp_path / "workspace" / "CMakeLists.txt").read_text()
+        assert "lobs_shared_" not in content
+        assert content.count(f"{ROOT}/../util.cpp") == 2
+
+    def test_disabled(self, tmp_path: Path, workspace: lobs.Package):
+        """Test that sharing can be turned off."""
+        workspace.meta.exporter_configuration = [cmake.CmakeConfig(shared_objects=False)]
+        cmake.Exporter(workspace).export()
+        assert "lobs_shared_" not in (tmp_path / "workspace" / "CMakeLists.txt").read_text()
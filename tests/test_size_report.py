@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the ESP-IDF firmware size report."""
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.report import size
+
+from .conftest import MakePackage
+
+
+MAP_FILE = """\
+Archive member included to satisfy reference by file (symbol)
+
+esp-idf/util/libutil.a(util.cpp.obj)
+                              esp-idf/main/libmain.a(main.cpp.obj) (util_fn)
+
+Memory Configuration
+
+Name             Origin             Length             Attributes
+iram0_0_seg      0x40080000         0x00020000         xr
+
+Linker script and memory map
+
+ .text.ignored  0x00000000       0x10 esp-idf/main/libmain.a(main.cpp.obj)
+
+.iram0.text     0x40080000      0x200
+ *(.iram1 .iram1.*)
+ .iram1.0       0x40080000       0x40 esp-idf/main/libmain.a(main.cpp.obj)
+                0x40080000                isr_handler
+ .iram1.some_very_long_section_name_that_wraps
+                0x40080040       0x20 esp-idf/util/libutil.a(util.cpp.obj)
+ *fill*         0x40080060        0x4 
+ .iram1.1       0x40080064      0x100 esp-idf/freertos/libfreertos.a(tasks.c.obj)
+
+.dram0.data     0x3ffb0000       0x80
+ .data.table    0x3ffb0000       0x30 esp-idf/util/libutil.a(util.cpp.obj)
+ COMMON         0x3ffb0030       0x10 esp-idf/main/libmain.a(main.cpp.obj)
+
+.flash.text     0x400d0020     0x1000
+ .text.main     0x400d0020      0x300 esp-idf/main/libmain.a(main.cpp.obj)
+ .text.util     0x400d0320      0x100 /opt/esp/lib/libutil.a(other.o)
+ .text.crt      0x400d0420       0x20 CMakeFiles/app.elf.dir/project_elf_src_esp32.c.obj
+
+.debug_info     0x00000000    0x10000
+ .debug_info    0x00000000     0x1000 esp-idf/main/libmain.a(main.cpp.obj)
+"""
+
+
+@pytest.fixture
+def root(make_package: MakePackage) -> lobs.Package:
+    return make_package("app", [], [make_package("util", [])])
+
+
+@pytest.fixture
+def map_file(tmp_path: Path) -> Path:
+    path = tmp_path / "app.map"
+    path.write_text(MAP_FILE)
+    return path
+
+
+class TestParseMap:
+    """Test parse_map()."""
+
+    def test_region_of(self):
+        """Test the classification of output sections."""
+        assert size.region_of('.iram0.text') == 'iram'
+        assert size.region_of('.dram0.bss') == 'dram'
+        assert size.region_of('.flash.rodata') == 'flash'
+        assert size.region_of('.rtc.text') == 'rtc'
+        assert size.region_of('.debug_info') is None
+
+    def test_parse(self, map_file: Path):
+        """Test summing input sections by archive and region, including wrapped and fill lines."""
+        assert size.parse_map(map_file) == {
+            ('main', 'iram'): 0x40,
+            ('util', 'iram'): 0x20,
+            (None, 'iram'): 0x4,
+            ('freertos', 'iram'): 0x100,
+            ('util', 'dram'): 0x30,
+            ('main', 'dram'): 0x10,
+            ('main', 'flash'): 0x300,
+            ('util', 'flash'): 0x100,
+            (None, 'flash'): 0x20,
+        }
+
+
+class TestSizeReport:
+    """Test the attribution to packages and the budget checks."""
+
+    def test_analyse(self, root: lobs.Package, map_file: Path):
+        """Test that archives are attributed to packages, and the rest reported apart."""
+        report = size.analyse(root, map_file)
+        assert report.packages["app"] == {'iram': 0x40, 'dram': 0x10, 'flash': 0x300, 'rtc': 0}
+        assert report.packages["util"] == {'iram': 0x20, 'dram': 0x30, 'flash': 0x100, 'rtc': 0}
+        assert report.packages[size.OTHER]['iram'] == 0x104
+        assert report.totals['iram'] == 0x164
+
+    def test_roundtrip(self, root: lobs.Package, map_file: Path):
+        """Test that a report can be stored and loaded back as a baseline."""
+        report = size.analyse(root, map_file)
+        assert size.SizeReport.from_dict(report.to_dict()) == report
+
+    def test_budgets(self):
+        """Test that growth is only accepted within the budgets."""
+        baseline = size.SizeReport({"app": {'iram': 100, 'flash': 1000}})
+        grown = size.SizeReport({"app": {'iram': 110, 'flash': 900}})
+        assert size.check_budgets(grown, baseline, {'iram': 10}) == []
+        violations = size.check_budgets(grown, baseline, {})
+        assert len(violations) == 1
+        assert violations[0].startswith("iram: grew by 10 bytes")
@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the seeding of the CMake toolchain detection results."""
+import json
+from pathlib import Path
+
+import pytest
+
+import lobs
+from lobs.exporter import cmake
+from lobs.exporter.cmake.toolchain_seed import INITIAL_CACHE, PRESETS, SEED_MODULE, ToolchainSeed
+
+
+@pytest.fixture
+def fake_compiler(tmp_path: Path) -> Path:
+    compiler = tmp_path / "bin" / "fake-g++"
+    compiler.parent.mkdir()
+    compiler.write_text("#!/bin/sh\necho 'fake-g++ 1.0'\n")
+    compiler.chmod(0o755)
+    return compiler
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("LOBS_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+def _app(folder: Path, config: cmake.CmakeConfig) -> lobs.Package:
+    (folder / "main.cpp").write_text("")
+    pkg = lobs.Package(
+        lobs.ProjectMeta("app", lobs.Version(0, 0, 1), exporter_configuration=[config]),
+        lobs.cpp.ManagedApplication([folder / "main.cpp"]),
+    )
+    pkg.package_path = folder / "app.py"
+    return pkg
+
+
+class TestToolchainSeed:
+    """Test ToolchainSeed."""
+
+    def test_keyed_by_fingerprint(self, fake_compiler: Path, cache_dir: Path):
+        """Test that the seed folder depends on the compiler, not on its path."""
+        seed = ToolchainSeed.for_compiler(fake_compiler)
+        assert seed.compiler == fake_compiler
+        assert seed.folder.parent == cache_dir / "toolchains"
+
+        copy = fake_compiler.with_name("g++-copy")
+        copy.write_bytes(fake_compiler.read_bytes())
+        copy.chmod(0o755)
+        assert ToolchainSeed.for_compiler(copy).folder == seed.folder
+
+    def test_missing_compiler(self):
+        """Test that an unknown compiler is reported."""
+        with pytest.raises(FileNotFoundError):
+            ToolchainSeed.for_compiler("no-such-compiler-g++")
+
+    def test_initial_cache(self, fake_compiler: Path):
+        """Test that the initial cache sets the compiler and the seed folder."""
+        seed = ToolchainSeed.for_compiler(fake_compiler)
+        assert seed.initial_cache().splitlines()[1:] == [
+            f'set(CMAKE_CXX_COMPILER "{fake_compiler}" CACHE FILEPATH "")',
+            f'set(LOBS_TOOLCHAIN_SEED "{seed.folder}" CACHE PATH "")',
+        ]
+
+
+class TestCmakeExport:
+    """Test the files emitted by the cmake exporter."""
+
+    def test_disabled(self, tmp_path: Path):
+        """Test that nothing is emitted by default."""
+        cmake.Exporter(_app(tmp_path, cmake.CmakeConfig())).export()
+        assert SEED_MODULE not in (tmp_path / "CMakeLists.txt").read_text()
+        assert not (tmp_path / PRESETS).exists()
+
+    def test_enabled(self, tmp_path: Path, fake_compiler: Path):
+        """Test that the module is included before the project, with the presets and initial cache."""
+        config = cmake.CmakeConfig(seed_toolchain=True, compiler=str(fake_compiler))
+        cmake.Exporter(_app(tmp_path, config)).export()
+        content = (tmp_path / "CMakeLists.txt").read_text()
+        assert content.index(SEED_MODULE) < content.index("project(")
+        assert "CMAKE_PLATFORM_INFO_INITIALIZED" in (tmp_path / SEED_MODULE).read_text()
+        assert (tmp_path / INITIAL_CACHE).is_file()
+
+        presets = json.loads((tmp_path / PRESETS).read_text())
+        configure = presets["configurePresets"][0]
+        assert configure["name"] == "app"
+        assert configure["generator"] == "Ninja"
+        assert configure["cacheVariables"]["CMAKE_CXX_COMPILER"]["value"] == str(fake_compiler)
+        assert presets["buildPresets"] == [{"name": "app", "configurePreset": "app"}]
@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: 2025-present Ricardo Marchesan <ricardo@azevem.com>
+#
+# SPDX-License-Identifier: MIT
+"""Test suite for the variant matrix exports."""
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import lobs
+from lobs.__main__ import main
+from lobs.core import exporter
+from lobs.core import graph
+from lobs.core.variants import SharedWork, Variant, VariantMatrix
+from lobs.exporter.cmake import CmakeConfig
+from lobs.exporter.esp_idf import EspIdfConfig
+
+from .conftest import MakePackage
+
+
+GOLDEN_PROJECT = Path(__file__).parent / "golden" / "project"
+
+
+@pytest.fixture
+def application(make_package: MakePackage) -> lobs.Package:
+    """An application depending on a library."""
+    lib = make_package("lib", ["lib.cpp"])
+    app = make_package("app", ["main.cpp"], [lib])
+    app.project = lobs.cpp.ManagedApplication(source_files=list(app.project.source_files))
+    return app
+
+
+class TestVariant:
+    """Test the declaration of variants."""
+
+    def test_parse(self):
+        """Test that command line declarations override the fields of the configuration, parsed by type."""
+        base = CmakeConfig(minimum_cmake_version="3.22")
+        variant = Variant.parse("rel:build_type=Release,minimum_cmake_version=3.28,shared_objects=off", base)
+        assert variant.name == "rel"
+        assert variant.configuration == [
+            CmakeConfig(minimum_cmake_version="3.28", build_type="Release", shared_objects=False)
+        ]
+        assert variant.relative_folder == Path("variants/rel")
+
+    def test_parse_unknown_field(self):
+        """Test that unknown fields are rejected."""
+        with pytest.raises(ValueError, match="Unknown field 'bogus' of CmakeConfig"):
+            Variant.parse("rel:bogus=1", CmakeConfig())
+
+    def test_parse_unsupported_type(self):
+        """Test that fields that cannot be given as text are rejected."""
+        with pytest.raises(ValueError, match="cannot be set from the command line"):
+            Variant.parse("rel:flag_probe=x", CmakeConfig())
+
+    def test_duplicated_names(self):
+        """Test that a matrix refuses variants of the same name."""
+        with pytest.raises(ValueError, match="Duplicated variant names: a"):
+            VariantMatrix([Variant("a"), Variant("b"), Variant("a")])
+
+    def test_select(self):
+        """Test that variants are selected by name, and unknown names are rejected."""
+        matrix = VariantMatrix([Variant("a"), Variant("b")])
+        assert [x.name for x in matrix.select(["b", "a"])] == ["b", "a"]
+        with pytest.raises(ValueError, match="Unknown variants: c"):
+            matrix.select(["c"])
+
+
+class TestSharedWork:
+    """Test SharedWork."""
+
+    def test_computed_once(self):
+        """Test that concurrent requests of a key compute it once."""
+        shared = SharedWork()
+        calls: list[int] = []
+        started = threading.Event()
+
+        def compute() -> int:
+            calls.append(1)
+            started.wait(timeout=5)
+            return 42
+
+        threads = [threading.Thread(target=shared.get, args=("key", compute)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+        assert shared.get("key", compute) == 42
+        assert len(calls) == 1
+
+
+class TestVariantExport:
+    """Test exporting the variants of a package."""
+
+    def test_matrix(self, application: lobs.Package, tmp_path: Path):
+        """Test that a declared matrix renders each variant into its own folder, and not the plain project."""
+        application.meta.exporter_configuration = [VariantMatrix([
+            Variant("debug", [CmakeConfig(build_type="Debug")]),
+            Variant("release", [CmakeConfig(build_type="Release")], Path("out")),
+        ])]
+        exporter.run_export(application, "cmake")
+        debug = (tmp_path / "app" / "variants" / "debug" / "CMakeLists.txt").read_text()
+        release = (tmp_path / "app" / "out" / "CMakeLists.txt").read_text()
+        assert "    set(CMAKE_BUILD_TYPE Debug)\n" in debug
+        assert "    set(CMAKE_BUILD_TYPE Release)\n" in release
+        assert "${CMAKE_CURRENT_LIST_DIR}/../../main.cpp" in debug
+        assert "${CMAKE_CURRENT_LIST_DIR}/../main.cpp" in release
+        assert not (tmp_path / "app" / "CMakeLists.txt").exists()
+
+    def test_variant_independent_work_is_shared(self, application: lobs.Package, monkeypatch: pytest.MonkeyPatch):
+        """Test that the graph is walked and its sources expanded once for all the variants."""
+        calls: list[str] = []
+        walk, package_sources = graph.walk, graph.package_sources
+
+        def tracked_walk(pkg: lobs.Package):
+            calls.append("walk")
+            return walk(pkg)
+
+        def tracked_sources(pkg: lobs.Package):
+            calls.append(pkg.meta.name)
+            return package_sources(pkg)
+
+        monkeypatch.setattr(graph, "walk", tracked_walk)
+        monkeypatch.setattr(graph, "package_sources", tracked_sources)
+        variants = [Variant(f"v{i}", [CmakeConfig(minimum_cmake_version=f"3.{20 + i}")]) for i in range(4)]
+        folders = exporter.run_variants(application, "cmake", variants)
+        assert all((x / "CMakeLists.txt").is_file() for x in folders)
+        # Once ahead of the exports, and once shared by them
+        assert calls.count("walk") == 2
+        assert sorted(x for x in calls if x != "walk") == ["app", "lib"]
+
+    def test_cli(self, tmp_path: Path):
+        """Test that variants declared on the command line are rendered from the package configuration."""
+        shutil.copytree(GOLDEN_PROJECT, tmp_path / "golden")
+        project = tmp_path / "golden" / "app" / "app.py"
+        result = CliRunner().invoke(
+            main,
+            ["--no-server", str(project), "export", "cmake", "--variant", "a:build_type=Debug", "--variant", "b:"],
+        )
+        assert result.exit_code == 0, result.output
+        assert "set(CMAKE_BUILD_TYPE Debug)" in (project.parent / "variants" / "a" / "CMakeLists.txt").read_text()
+        assert "CMAKE_BUILD_TYPE" not in (project.parent / "variants" / "b" / "CMakeLists.txt").read_text()
+
+    def test_cli_undeclared_variant(self, tmp_path: Path):
+        """Test that variants given by name must be declared by the package."""
+        shutil.copytree(GOLDEN_PROJECT, tmp_path / "golden")
+        project = tmp_path / "golden" / "app" / "app.py"
+        result = CliRunner().invoke(main, ["--no-server", str(project), "export", "cmake", "--variant", "debug"])
+        assert result.exit_code == 2
+        assert "declares no variants" in result.output
+
+    def test_esp_idf_targets(self, tmp_path: Path):
+        """Test that ESP-IDF variants share the components, and render the project for their target."""
+        shutil.copytree(GOLDEN_PROJECT, tmp_path / "golden")
+        package = lobs.Package.from_file(tmp_path / "golden" / "app" / "app.py")
+        variants = [Variant(x, [EspIdfConfig(target=x)]) for x in ("esp32", "esp32s3")]
+        exporter.run_variants(package, "esp-idf", variants)
+        app = tmp_path / "golden" / "app"
+        for target in ("esp32", "esp32s3"):
+            content = (app / "variants" / target / "CMakeLists.txt").read_text()
+            assert f"set(IDF_TARGET {target})\n" in content
+            assert "    ${CMAKE_CURRENT_LIST_DIR}/../../main\n" in content
+        assert (app / "main" / "CMakeLists.txt").is_file()
+        assert not (app / "CMakeLists.txt").exists()